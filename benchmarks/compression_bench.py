@@ -0,0 +1,90 @@
+'''Bytes on the wire and p95 latency of the main list endpoints, without and with CompressionMiddleware.
+
+The services are replaced with fixed in-memory data, so no database is needed and only
+serialization and compression are measured. TestClient does not go over a network, so the
+latency columns show the CPU cost of compressing, not the transfer time it saves:
+    python -m benchmarks.compression_bench > bench_output.txt
+'''
+import statistics
+import time
+from contextlib import ExitStack
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from data.common.compression import CompressionMiddleware
+from data.common.models.course import Course
+from data.common.models.report import Report
+from data.common.models.section import SectionSummary
+from data.common.models.user import User
+from data.common.models.view_courses import ViewStudentCourse
+from routers.courses import course_router
+
+REQUESTS = 200
+HEADERS = {'Authorization': 'Bearer benchmark', 'Accept-Encoding': 'gzip'}
+
+TEACHER = User(id=1, email='teacher@example.com', password='x', first_name='Alice', last_name='Parker', role='teacher')
+COURSE = Course(id=1, title='Core Python', description='This is core module', owner_id=1,
+                is_active='active', is_premium='public', tags=['python'], objectives=['learn'])
+CATALOG = [ViewStudentCourse.from_query_result(id=i, title=f'Course {i}',
+                                               description='Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 4,
+                                               course_rating=7.5, home_page_pic_hash='ab' * 32,
+                                               tags=['python', 'backend', 'databases'],
+                                               objectives=['Learn the basics', 'Build a project'])
+           for i in range(1, 101)]
+SECTIONS = [SectionSummary(id=i, title=f'Section {i}', description='Explain the topic',
+                           content_length=20000, content_hash='cd' * 32)
+            for i in range(1, 201)]
+REPORTS = [Report.from_query_result(user_id=i, course_id=1, status=2, rating=8, progress=50,
+                                    first_name='Student', last_name=f'Number {i}', title='Core Python')
+           for i in range(1, 501)]
+
+ENDPOINTS = {
+    'GET /courses/ (student, 100 courses)': '/courses/?limit=100',
+    'GET /courses/1/sections (200 sections)': '/courses/1/sections',
+    'GET /courses/1/reports (500 students)': '/courses/1/reports',
+}
+
+
+def _app(compressed: bool) -> FastAPI:
+    app = FastAPI()
+    app.include_router(course_router)
+    if compressed:
+        app.add_middleware(CompressionMiddleware)
+    return app
+
+
+def _measure(client: TestClient, url: str) -> tuple[int, float]:
+    wire_bytes = 0
+    latencies = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        response = client.get(url, headers=HEADERS)
+        latencies.append(time.perf_counter() - start)
+        # Content-Length is the size on the wire; response.content has already been decompressed
+        wire_bytes = int(response.headers['content-length'])
+    p95 = statistics.quantiles(latencies, n=20)[-1]
+    return wire_bytes, p95 * 1000
+
+
+def main():
+    student = TEACHER.copy(update={'role': 'student'})
+    with ExitStack() as stack:
+        stack.enter_context(patch('routers.courses.is_user_approved_by_admin', return_value=True))
+        get_user = stack.enter_context(patch('routers.courses.get_user_or_raise_401', return_value=TEACHER))
+        stack.enter_context(patch('services.courses_service.view_students_courses', return_value=CATALOG))
+        stack.enter_context(patch('services.courses_service.view_all_sections_for_a_course', return_value=SECTIONS))
+        stack.enter_context(patch('services.courses_service.get_course_by_id', return_value=COURSE))
+        stack.enter_context(patch('services.courses_service.get_reports_by_id', return_value=REPORTS))
+        stack.enter_context(patch('services.courses_service.get_course_version', return_value=1))
+
+        plain, gzipped = TestClient(_app(False)), TestClient(_app(True))
+        print(f'{"endpoint":42} {"bytes before":>12} {"bytes after":>12} {"p95 before":>11} {"p95 after":>10}')
+        for name, url in ENDPOINTS.items():
+            get_user.return_value = student if url.startswith('/courses/?') else TEACHER
+            bytes_before, p95_before = _measure(plain, url)
+            bytes_after, p95_after = _measure(gzipped, url)
+            print(f'{name:42} {bytes_before:12d} {bytes_after:12d} {p95_before:9.2f}ms {p95_after:8.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,8 @@
 from data.common.models.user import User
-from services.users_service import find_by_id, validate_token
+from services.users_service import get_principal, validate_token
 from fastapi import HTTPException
 from data.common.exceptions import Exception401Unauthorized
 from fastapi import status
-from data.database import read_query
 
 
 def get_user_params_or_raise_error(token: str) -> list:
@@ -22,14 +21,19 @@ def get_user_or_raise_401(authorization: str) -> User:
         raise Exception401Unauthorized("Problem with the authentication. Try Again!")
     
     user_id = token_params[0]
-    user = find_by_id(user_id)
+    principal = get_principal(user_id)
+    if principal is None:
+        raise Exception401Unauthorized("Problem with the authentication. Try Again!")
 
+    user, _ = principal
     return user
 
 
 def is_user_approved_by_admin(user_id: int)->bool:
     ''' Verify is user role is approved'''
-    sql='''SELECT is_approved FROM users WHERE id=?'''
-    if read_query(sql,(user_id,))[0][0]:
-        return True
-    return False
\ No newline at end of file
+    principal = get_principal(user_id)
+    if principal is None:
+        return False
+
+    _, is_approved = principal
+    return is_approved
\ No newline at end of file
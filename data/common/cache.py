@@ -0,0 +1,94 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+class TTLCache:
+    '''Thread-safe LRU cache whose entries also expire ttl seconds after they were stored'''
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value), least recently used first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self._ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    '''Runs at most one load per key at a time: callers arriving while it is in flight wait for it and share its result'''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: dict = {}
+        self.loads = 0
+        self.coalesced = 0
+
+    def do(self, key, load):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.loads += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = load()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'requests': self.loads + self.coalesced, 'loads': self.loads, 'coalesced': self.coalesced,
+                    'in_flight': len(self._flights)}
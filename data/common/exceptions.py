@@ -21,6 +21,14 @@ class Exception404NotFound(CustomHTTPException):
     def __init__(self, detail: str = None):
         super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
 
+class Exception413PayloadTooLarge(CustomHTTPException):
+    def __init__(self, detail: str = None):
+        super().__init__(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+
 class Exception500InternalServerError(CustomHTTPException):
     def __init__(self, detail: str = None):
         super().__init__(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=detail)
+
+class Exception503ServiceUnavailable(CustomHTTPException):
+    def __init__(self, detail: str = None):
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
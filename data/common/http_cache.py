@@ -0,0 +1,51 @@
+import hashlib
+import json
+from fastapi import Response, status
+
+# responses that depend on the caller: browsers may keep them, but must revalidate before every use
+REVALIDATE = 'private, no-cache'
+
+# appended inside the quotes of the ETag of a gzip coded response
+GZIP_ETAG_SUFFIX = '-gzip'
+
+
+def gzip_etag(etag: str) -> str:
+    '''ETag of the gzip coded form of a response: strong validators must differ between content codings'''
+    weak = 'W/' if etag.startswith('W/') else ''
+    return f'{weak}{etag.removeprefix("W/")[:-1]}{GZIP_ETAG_SUFFIX}"'
+
+
+def _opaque_tag(etag: str) -> str:
+    '''The etag without its weakness and content coding, which the weak comparison of If-None-Match ignores'''
+    tag = etag.removeprefix('W/')
+    if tag.endswith(GZIP_ETAG_SUFFIX + '"'):
+        tag = tag[:-len(GZIP_ETAG_SUFFIX) - 1] + '"'
+    return tag
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    '''Whether an If-None-Match header value matches the etag (weak comparison, as RFC 9110 requires for it),
+    in any of the content codings it was sent with'''
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = (candidate.strip() for candidate in if_none_match.split(','))
+    return any(_opaque_tag(candidate) == _opaque_tag(etag) for candidate in candidates)
+
+
+def hashed_etag(*parts) -> str:
+    '''Strong ETag of a response that is fully determined by the given JSON-serializable values'''
+    raw = json.dumps(parts, separators=(',', ':'), default=str).encode('utf-8')
+    return f'"{hashlib.sha256(raw).hexdigest()[:32]}"'
+
+
+def not_modified(etag: str, cache_control: str = REVALIDATE) -> Response:
+    '''304 for a response whose ETag depends on its content coding (see gzip_etag), so it varies by Accept-Encoding'''
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                    headers={'ETag': etag, 'Cache-Control': cache_control, 'Vary': 'Accept-Encoding'})
+
+
+def set_etag(response: Response, etag: str, cache_control: str = REVALIDATE):
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = cache_control
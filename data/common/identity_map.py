@@ -0,0 +1,59 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+MISSING = object()
+
+# (kind, key) -> entity loaded during the current request; None outside of a request
+_entities: ContextVar[dict | None] = ContextVar('identity_map', default=None)
+
+
+@contextmanager
+def request_scope():
+    '''Entities loaded inside the block are loaded at most once'''
+    token = _entities.set({})
+    try:
+        yield
+    finally:
+        _entities.reset(token)
+
+
+def get_or_load(kind: str, key, load):
+    '''The entity loaded earlier in this request, or the result of load(), which is then remembered.
+    Outside of a request scope load() is simply called.'''
+    entities = _entities.get()
+    if entities is None:
+        return load()
+    if (kind, key) not in entities:
+        entities[(kind, key)] = load()
+    return entities[(kind, key)]
+
+
+def peek(kind: str, key, default=MISSING):
+    '''The entity if it was already loaded in this request, without loading it'''
+    entities = _entities.get()
+    if entities is None:
+        return default
+    return entities.get((kind, key), default)
+
+
+def forget(kind: str, key):
+    '''Drop an entity after a write, so the rest of the request loads it again'''
+    entities = _entities.get()
+    if entities is not None:
+        entities.pop((kind, key), None)
+
+
+class IdentityMapMiddleware:
+    ''' Opens a fresh identity map for every HTTP request'''
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        # sync endpoints run in worker threads that get a copy of this context, so they share the same map
+        with request_scope():
+            await self.app(scope, receive, send)
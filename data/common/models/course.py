@@ -1,11 +1,14 @@
 from pydantic import BaseModel, constr, condecimal
 from data.common.constants import CourseStatus, CourseType, Regex
+from data.common.models.view_courses import course_pic_url
 
 class Course(BaseModel):
     id: int | None
     title: constr(min_length=1)
     description: constr(min_length=1)
     home_page_pic: bytes | None
+    home_page_pic_url: str | None
+    home_page_pic_hash: str | None
     course_rating: float | None
     owner_id: int | None
     is_active: constr(regex=Regex.ACTIVE_HIDDEN)
@@ -14,12 +17,13 @@ class Course(BaseModel):
     objectives: list[str] | None
 
     @classmethod
-    def from_query_result(cls, id, title, description, home_page_pic, course_rating, owner_id, is_active, is_premium, tags, objectives):
+    def from_query_result(cls, id, title, description, home_page_pic_hash, course_rating, owner_id, is_active, is_premium, tags, objectives):
         return cls(
             id=id,
             title=title,
             description=description,
-            home_page_pic=home_page_pic,
+            home_page_pic_url=course_pic_url(id, home_page_pic_hash),
+            home_page_pic_hash=home_page_pic_hash,
             course_rating=course_rating,
             owner_id=owner_id,
             is_active=CourseStatus.ACTIVE if is_active else CourseStatus.HIDDEN,
@@ -19,4 +19,22 @@ class Section(BaseModel):
             content=content,
             external_link=external_link,
             courses_id=courses_id
-            )
\ No newline at end of file
+            )
+
+class SectionSummary(BaseModel):
+    ''' Section without its content, for tables of contents'''
+    id: int
+    title: str
+    description: str | None
+    content_length: int
+    content_hash: str | None
+
+    @classmethod
+    def from_query_result(cls, id, title, description, content_length, content_hash):
+        return cls(
+            id=id,
+            title=title,
+            description=description,
+            content_length=content_length or 0,
+            content_hash=content_hash
+            )
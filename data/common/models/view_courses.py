@@ -1,6 +1,15 @@
 from pydantic import BaseModel
 from data.common.constants import CourseStatus, CourseType
 
+
+def course_pic_url(course_id: int, pic_hash: str | None, variant: str = None) -> str | None:
+    ''' URL of the course picture, versioned by its content hash so that it can be cached forever'''
+    if pic_hash is None:
+        return None
+    if variant is None:
+        return f'/courses/{course_id}/pic?v={pic_hash}'
+    return f'/courses/{course_id}/pic?variant={variant}&v={pic_hash}'
+
 class ViewPublicCourse(BaseModel):
     id: int | None
     title: str
@@ -23,19 +32,21 @@ class ViewStudentCourse(BaseModel):
     title: str
     description: str
     course_rating: float | None
-    home_page_pic: bytes | None
+    home_page_pic_url: str | None
+    home_page_pic_hash: str | None
     tags: list[str] | None
     objectives: list[str] | None
     progress: float | None
 
     @classmethod
-    def from_query_result(cls, id, title, description, course_rating, home_page_pic, tags, objectives, progress=None):
+    def from_query_result(cls, id, title, description, course_rating, home_page_pic_hash, tags, objectives, progress=None):
         return cls(
             id=id,
             title=title,
             description=description,
             course_rating=course_rating,
-            home_page_pic=home_page_pic,
+            home_page_pic_url=course_pic_url(id, home_page_pic_hash, 'thumb'),
+            home_page_pic_hash=home_page_pic_hash,
             tags=tags,
             objectives=objectives,
             progress=progress
@@ -46,20 +57,22 @@ class ViewTeacherCourse(BaseModel):
     title: str
     description: str
     course_rating: float | None
-    home_page_pic: bytes | None
+    home_page_pic_url: str | None
+    home_page_pic_hash: str | None
     is_active: str
     is_premium: str
     tags: list[str] | None
     objectives: list[str] | None
     
     @classmethod
-    def from_query_result(cls, id, title, description, course_rating, home_page_pic, is_active, is_premium, tags, objectives):
+    def from_query_result(cls, id, title, description, course_rating, home_page_pic_hash, is_active, is_premium, tags, objectives):
         return cls(
             id=id,
             title=title,
             description=description,
             course_rating=course_rating,
-            home_page_pic=home_page_pic,
+            home_page_pic_url=course_pic_url(id, home_page_pic_hash, 'thumb'),
+            home_page_pic_hash=home_page_pic_hash,
             is_active=CourseStatus.ACTIVE if is_active else CourseStatus.HIDDEN,
             is_premium=CourseType.PREMIUM if is_premium else CourseType.PUBLIC,
             tags=tags,
@@ -72,25 +85,27 @@ class ViewAdminCourse(BaseModel):
     title: str
     description: str
     course_rating: float | None
-    home_page_pic: bytes | None
+    home_page_pic_url: str | None
+    home_page_pic_hash: str | None
     is_active: str
     is_premium: str
-    expertise_area: str
-    objective: str
+    tags: list[str]
+    objectives: list[str]
     number_students: int
     
     @classmethod
-    def from_query_result(cls, id, title, description, course_rating, home_page_pic, is_active, is_premium, expertise_area, objective, number_students):
+    def from_query_result(cls, id, title, description, course_rating, home_page_pic_hash, is_active, is_premium, number_students, tags, objectives):
         return cls(
             id=id,
             title=title,
             description=description,
             course_rating=course_rating,
-            home_page_pic=home_page_pic,
+            home_page_pic_url=course_pic_url(id, home_page_pic_hash, 'thumb'),
+            home_page_pic_hash=home_page_pic_hash,
             is_active=CourseStatus.ACTIVE if is_active else CourseStatus.HIDDEN,
             is_premium=CourseType.PREMIUM if is_premium else CourseType.PUBLIC,
-            expertise_area=expertise_area,
-            objective=objective,
+            tags=tags,
+            objectives=objectives,
             number_students=number_students
             )
 
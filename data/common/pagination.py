@@ -0,0 +1,46 @@
+import base64
+import json
+from data.common.exceptions import Exception400BadRequest
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def encode_cursor(**position) -> str:
+    '''Opaque cursor pointing right after the given position'''
+    raw = json.dumps(position, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str | None) -> dict | None:
+    '''Position stored in a cursor produced by encode_cursor'''
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except ValueError:
+        raise Exception400BadRequest('Invalid cursor.')
+    if not isinstance(position, dict):
+        raise Exception400BadRequest('Invalid cursor.')
+    return position
+
+
+def decode_after_id(cursor: str | None) -> int | None:
+    '''Id of the last item of the previous page'''
+    position = decode_cursor(cursor)
+    if position is None:
+        return None
+    after_id = position.get('id')
+    if not isinstance(after_id, int):
+        raise Exception400BadRequest('Invalid cursor.')
+    return after_id
+
+
+def next_page_cursor(items: list, limit: int) -> str | None:
+    '''Cursor of the page after items, or None when items is the last page'''
+    ids = {item.id for item in items}
+    if len(ids) < limit:
+        return None
+    return encode_cursor(id=max(ids))
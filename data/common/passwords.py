@@ -0,0 +1,115 @@
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import threading
+import bcrypt
+from data.common.exceptions import Exception503ServiceUnavailable
+
+# Sync endpoints run in anyio's worker thread pool (40 threads by default), and every admitted
+# call keeps its request thread blocked until the hash is done. HASH_WORKERS + HASH_MAX_QUEUED
+# is therefore the most threads a login storm can hold; keep it well below the pool size so
+# catalog and section reads always find a free thread.
+HASH_WORKERS = 2               # processes doing bcrypt work
+HASH_MAX_QUEUED = 6            # requests allowed to wait for a free worker before we answer 503
+HASH_TIMEOUT_SECONDS = 10      # longest a request waits for its hash before we answer 503
+
+
+class HashingPool:
+    ''' Bounded process pool for bcrypt, so password work never competes with request threads for CPU.
+
+    At most workers + max_queued calls are admitted at a time; any call beyond that is rejected
+    immediately with 503 instead of piling up behind a login storm. A call that times out also gets 503,
+    and a pool whose worker died is replaced on the next call.
+    '''
+
+    def __init__(self, workers: int = HASH_WORKERS,
+                 max_queued: int = HASH_MAX_QUEUED,
+                 timeout: float = HASH_TIMEOUT_SECONDS):
+        self._workers = workers
+        self._max_queued = max_queued
+        self._timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + max_queued)
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        self._pending = 0
+        self._rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn instead of fork: the server process already runs threads
+                self._executor = ProcessPoolExecutor(max_workers=self._workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise Exception503ServiceUnavailable('Too many login attempts right now. Try again.')
+
+        with self._lock:
+            self._pending += 1
+        try:
+            executor = self._get_executor()
+            future = executor.submit(fn, *args)
+            return future.result(timeout=self._timeout)
+        except TimeoutError:
+            future.cancel()
+            raise Exception503ServiceUnavailable('Password check is taking too long. Try again.')
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise Exception503ServiceUnavailable('Password check failed. Try again.')
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+
+    def _discard(self, executor: ProcessPoolExecutor):
+        ''' Drop a broken executor, unless another call already replaced it'''
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def hashpw(self, password: bytes, salt: bytes) -> bytes:
+        return self._run(bcrypt.hashpw, password, salt)
+
+    def checkpw(self, password: bytes, hashed_password: bytes) -> bool:
+        return self._run(bcrypt.checkpw, password, hashed_password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'workers': self._workers,
+                'in_flight': min(self._pending, self._workers),
+                'queued': max(self._pending - self._workers, 0),
+                'max_queued': self._max_queued,
+                'rejected': self._rejected,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_hashing_pool = HashingPool()
+
+
+def hashpw(password: bytes, salt: bytes) -> bytes:
+    return _hashing_pool.hashpw(password, salt)
+
+
+def checkpw(password: bytes, hashed_password: bytes) -> bool:
+    return _hashing_pool.checkpw(password, hashed_password)
+
+
+def hashing_stats() -> dict:
+    return _hashing_pool.stats()
+
+
+def shutdown():
+    _hashing_pool.shutdown()
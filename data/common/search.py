@@ -0,0 +1,63 @@
+import re
+
+# a search value starting with this matches at the start of any word of the column instead of only at its start
+WORD_PREFIX_MARKER = '*'
+
+# InnoDB does not index words shorter than innodb_ft_min_token_size (3 by default)
+FULLTEXT_MIN_TOKEN = 3
+
+# innodb_ft_default_stopword: these words are not indexed either
+FULLTEXT_STOPWORDS = frozenset({
+    'a', 'about', 'an', 'are', 'as', 'at', 'be', 'by', 'com', 'de', 'en', 'for', 'from', 'how', 'i', 'in',
+    'is', 'it', 'la', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'what', 'when', 'where', 'who',
+    'will', 'with', 'und', 'www',
+})
+
+_WORD = re.compile(r'\w+')
+
+
+def escape_like(value: str) -> str:
+    ''' value with the LIKE wildcards escaped, so it is matched literally'''
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _indexed(word: str) -> bool:
+    '''Whether every word starting with word is in the fulltext index'''
+    return len(word) >= FULLTEXT_MIN_TOKEN and not any(stopword.startswith(word) for stopword in FULLTEXT_STOPWORDS)
+
+
+def fulltext_query(value: str) -> str | None:
+    ''' Boolean mode MATCH query requiring a word starting with each word of value that the index can find,
+        or None if there is no such word'''
+    words = [word for word in _WORD.findall(value.casefold()) if _indexed(word)]
+    if not words:
+        return None
+    return ' '.join(f'+{word}*' for word in words)
+
+
+def word_prefix_pattern(value: str) -> str:
+    ''' REGEXP pattern matching value where it starts a word'''
+    pattern = re.escape(value)
+    if _WORD.match(value):
+        pattern = f'(^|[^[:alnum:]_]){pattern}'
+    return pattern
+
+
+def text_filter(column: str, value: str) -> tuple[str, list]:
+    ''' WHERE clause and parameters searching column for value.
+
+    A plain value is a prefix search that the B-tree index of the column can serve.
+    '*value' is a word-prefix search: it matches where value starts any word of the column, so
+    '*park' finds 'alice.parker@abv.bg' but '*rker' does not. REGEXP decides the match; when the
+    words of value are in the FULLTEXT index of the column, MATCH first narrows the rows down to
+    the ones having them, which never drops a row REGEXP would keep.
+    '''
+    if not value.startswith(WORD_PREFIX_MARKER):
+        return f'{column} LIKE ?', [escape_like(value) + '%']
+
+    value = value[len(WORD_PREFIX_MARKER):]
+    pattern = word_prefix_pattern(value)
+    query = fulltext_query(value)
+    if query is None:
+        return f'{column} REGEXP ?', [pattern]
+    return f'MATCH({column}) AGAINST (? IN BOOLEAN MODE) AND {column} REGEXP ?', [query, pattern]
@@ -0,0 +1,55 @@
+from typing import AsyncIterator
+from fastapi import Request
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+from data.common.exceptions import Exception400BadRequest, Exception413PayloadTooLarge
+from data.image_store import MAX_IMAGE_SIZE
+
+MULTIPART_OVERHEAD = 16 * 1024     # bytes of boundaries and part headers allowed around the picture
+MAX_UPLOAD_SIZE = MAX_IMAGE_SIZE + MULTIPART_OVERHEAD
+
+
+class _TooLarge(MultiPartException):
+    # a MultiPartException, so that the parser closes the files it opened before re-raising it
+    pass
+
+
+async def _capped(request: Request):
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > MAX_UPLOAD_SIZE:
+            raise _TooLarge('upload too large')
+        yield chunk
+
+
+async def picture_upload(request: Request) -> AsyncIterator[UploadFile]:
+    ''' The 'pic' file of a multipart request, refused with 413 before or while the body arrives
+        once it is larger than a picture may be.
+
+    Used as a dependency instead of an UploadFile parameter: FastAPI would read and spool
+    the whole body before any size check could run. Like FastAPI's, the file spools to disk
+    past 1 MB, so an upload never holds a whole large picture in memory.
+    '''
+    too_large = Exception413PayloadTooLarge(f'The picture must not be larger than {MAX_IMAGE_SIZE // 1024} KB.')
+    content_length = request.headers.get('content-length', '')
+    if content_length.isdigit() and int(content_length) > MAX_UPLOAD_SIZE:
+        raise too_large
+    if not request.headers.get('content-type', '').startswith('multipart/form-data'):
+        raise Exception400BadRequest('The picture must be sent as multipart/form-data.')
+
+    try:
+        form = await MultiPartParser(request.headers, _capped(request), max_files=1, max_fields=10).parse()
+    except _TooLarge:
+        raise too_large
+    except MultiPartException as exc:
+        raise Exception400BadRequest(exc.message)
+
+    try:
+        pic = form.get('pic')
+        if not isinstance(pic, UploadFile):
+            raise Exception400BadRequest('The picture must be sent in the pic field.')
+        yield pic
+    finally:
+        # FastAPI only closes the files of the form it parsed itself
+        await form.close()
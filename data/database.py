@@ -1,16 +1,242 @@
+from collections import deque
+from contextlib import contextmanager
+import threading
+import time
 from mariadb import connect
 from mariadb.connections import Connection
+from data.common.exceptions import Exception503ServiceUnavailable
 # import mysql.connector
 
 
-def _get_connection() -> Connection:
-    return connect(
-        user='root',
-        password='root',
-        host='localhost',
-        port=3306,
-        database='e-learning'
-    )
+DB_CONFIG = {
+    'user': 'root',
+    'password': 'root',
+    'host': 'localhost',
+    'port': 3306,
+    'database': 'e-learning',
+    'autocommit': True
+}
+
+POOL_MIN_SIZE = 2              # connections kept open even when idle
+POOL_MAX_SIZE = 10             # hard cap of open connections
+POOL_MAX_IDLE_SECONDS = 300    # idle connections above the minimum are closed after this
+POOL_PING_AFTER_SECONDS = 5    # connections idle longer than this are pinged on checkout
+POOL_CHECKOUT_TIMEOUT = 10     # seconds to wait for a free connection before giving up
+
+
+def _connect() -> Connection:
+    return connect(**DB_CONFIG)
+
+
+class ConnectionPool:
+    '''Bounded, thread-safe pool of database connections'''
+
+    def __init__(self, factory=_connect,
+                 min_size: int = POOL_MIN_SIZE,
+                 max_size: int = POOL_MAX_SIZE,
+                 max_idle: float = POOL_MAX_IDLE_SECONDS,
+                 ping_after: float = POOL_PING_AFTER_SECONDS,
+                 timeout: float = POOL_CHECKOUT_TIMEOUT):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError('Pool size must satisfy 0 <= min_size <= max_size and max_size >= 1')
+
+        self._factory = factory
+        self._min_size = min_size
+        self._max_size = max_size
+        self._max_idle = max_idle
+        self._ping_after = ping_after
+        self._timeout = timeout
+
+        self._idle = deque()  # (connection, last_used) pairs, most recently used on the right
+        self._size = 0        # open connections, idle and checked out
+        self._cond = threading.Condition()
+
+        self._checkouts = 0
+        self._created = 0
+        self._evicted = 0
+        self._discarded = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def fill(self):
+        '''Open connections until the pool holds its minimum size'''
+        while True:
+            with self._cond:
+                if self._size >= self._min_size:
+                    return
+                self._size += 1
+            conn = self._create()
+            self.release(conn)
+
+    def acquire(self) -> Connection:
+        '''Check out a healthy connection, waiting up to the checkout timeout for one to free up'''
+        started = time.monotonic()
+        deadline = started + self._timeout
+        stale = []
+        conn = None
+
+        with self._cond:
+            while True:
+                stale.extend(self._evict_idle())
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self._max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    self._close_all(stale)
+                    raise Exception503ServiceUnavailable('The database is busy. Try again.')
+                self._cond.wait(remaining)
+
+        self._close_all(stale)
+
+        if conn is not None and time.monotonic() - last_used > self._ping_after and not self._is_healthy(conn):
+            with self._cond:
+                self._discarded += 1
+            self._close_all([conn])
+            conn = None
+
+        if conn is None:
+            conn = self._create()
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        return conn
+
+    def release(self, conn: Connection, broken: bool = False):
+        '''Return a connection to the pool, or drop it if it can no longer be used'''
+        with self._cond:
+            if broken:
+                self._size -= 1
+                self._discarded += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+        if broken:
+            self._close_all([conn])
+
+    def stats(self) -> dict:
+        '''Snapshot of pool occupancy and wait-time metrics'''
+        with self._cond:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'min_size': self._min_size,
+                'max_size': self._max_size,
+                'checkouts': self._checkouts,
+                'created': self._created,
+                'evicted': self._evicted,
+                'discarded': self._discarded,
+                'timeouts': self._timeouts,
+                'wait_ms_total': round(self._wait_total * 1000, 3),
+                'wait_ms_max': round(self._wait_max * 1000, 3),
+                'wait_ms_avg': round(self._wait_total * 1000 / self._checkouts, 3) if self._checkouts else 0.0
+            }
+
+    def close(self):
+        '''Close every idle connection; checked out ones are closed when released as broken'''
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+        self._close_all(idle)
+
+    def _create(self) -> Connection:
+        try:
+            conn = self._factory()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created += 1
+        return conn
+
+    def _evict_idle(self) -> list:
+        '''Pop connections idle longer than max_idle, never going below min_size. Caller holds the lock.'''
+        now = time.monotonic()
+        evicted = []
+        while self._idle and self._size > self._min_size and now - self._idle[0][1] > self._max_idle:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._evicted += 1
+            evicted.append(conn)
+        return evicted
+
+    @staticmethod
+    def _is_healthy(conn: Connection) -> bool:
+        try:
+            conn.ping()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_all(connections: list):
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    '''The process-wide pool, created and warmed up on first use'''
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = ConnectionPool()
+                pool.fill()
+                _pool = pool
+    return _pool
+
+
+def pool_stats() -> dict:
+    return get_pool().stats()
+
+
+@contextmanager
+def _get_connection():
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+    except Exception:
+        try:
+            conn.rollback()
+        except Exception:
+            pool.release(conn, broken=True)
+            raise
+        pool.release(conn)
+        raise
+    else:
+        pool.release(conn)
+
+
+@contextmanager
+def transaction():
+    '''Cursor whose statements are committed together when the block ends, or rolled back if it raises'''
+    with _get_connection() as conn:
+        conn.begin()
+        cursor = conn.cursor()
+        yield cursor
+        conn.commit()
 
 
 def read_query(sql: str, sql_params=()):
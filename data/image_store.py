@@ -0,0 +1,147 @@
+import hashlib
+import io
+import os
+import tempfile
+from typing import BinaryIO
+from PIL import Image, ImageOps
+from data.common.exceptions import Exception400BadRequest, Exception413PayloadTooLarge
+
+IMAGE_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'media', 'course_pics')
+MAX_IMAGE_SIZE = 5 * 1024 * 1024   # bytes
+# a few KB of PNG can describe a huge image; decoding one costs width * height * 3 bytes and more
+MAX_IMAGE_PIXELS = 25_000_000      # e.g. 5000 x 5000
+CHUNK_SIZE = 64 * 1024
+
+# resized copies stored next to every original: name -> bounding box in pixels
+VARIANTS = {
+    'thumb': (320, 180),
+    'medium': (960, 540),
+}
+VARIANT_MEDIA_TYPE = 'image/jpeg'
+VARIANT_QUALITY = 80
+
+_MEDIA_TYPES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+
+
+def image_path(digest: str) -> str:
+    '''Location of the image with the given SHA-256 hex digest'''
+    return os.path.join(IMAGE_STORE_DIR, digest[:2], digest)
+
+
+def variant_path(digest: str, variant: str) -> str:
+    '''Location of a resized copy of the image'''
+    return f'{image_path(digest)}.{variant}.jpg'
+
+
+def image_exists(digest: str) -> bool:
+    return os.path.isfile(image_path(digest))
+
+
+def save_image(data: bytes) -> str:
+    '''Store the image under its content hash and return the hash. Identical images are stored once.'''
+    return save_image_stream(io.BytesIO(data), max_size=None)
+
+
+def save_image_stream(stream: BinaryIO, max_size: int | None = MAX_IMAGE_SIZE) -> str:
+    '''Copy the stream chunk by chunk into the store, hashing it on the way, and return the hash.
+
+    Raises 413 as soon as more than max_size bytes were read, and 400 for an image of more than
+    MAX_IMAGE_PIXELS pixels. Only CHUNK_SIZE bytes are read at a time; the stream itself decides
+    whether the whole image is in memory, as it is for save_image.
+    '''
+    os.makedirs(IMAGE_STORE_DIR, exist_ok=True)
+    # the temp file lives in the store itself, so the final rename is atomic and readers never see a partial image
+    fd, tmp_path = tempfile.mkstemp(dir=IMAGE_STORE_DIR, prefix='.upload-')
+    try:
+        sha256 = hashlib.sha256()
+        size = 0
+        with os.fdopen(fd, 'wb') as tmp:
+            while chunk := stream.read(CHUNK_SIZE):
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise Exception413PayloadTooLarge(f'The picture must not be larger than {max_size // 1024} KB.')
+                sha256.update(chunk)
+                tmp.write(chunk)
+
+        if not _dimensions_allowed(tmp_path):
+            raise Exception400BadRequest(f'The picture must not have more than {MAX_IMAGE_PIXELS // 1_000_000} megapixels.')
+
+        digest = sha256.hexdigest()
+        path = image_path(digest)
+        if os.path.isfile(path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return digest
+
+
+def _dimensions_allowed(path: str) -> bool:
+    '''Whether the image has at most MAX_IMAGE_PIXELS pixels, read from its header without decoding it'''
+    try:
+        with Image.open(path) as image:
+            return image.width * image.height <= MAX_IMAGE_PIXELS
+    except Image.DecompressionBombError:
+        return False
+    except Exception:
+        # not an image, or a header Pillow cannot parse; create_variant skips those too
+        return True
+
+
+def image_media_type(digest: str) -> str:
+    '''Content type of a stored image, sniffed from its first bytes'''
+    with open(image_path(digest), 'rb') as image:
+        head = image.read(12)
+    for magic, media_type in _MEDIA_TYPES:
+        if head.startswith(magic):
+            return media_type
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'application/octet-stream'
+
+
+def create_variant(digest: str, variant: str) -> str | None:
+    '''Resize the original into the variant and return its path, or None if the original cannot be decoded'''
+    path = variant_path(digest, variant)
+    if os.path.isfile(path):
+        return path
+
+    try:
+        with Image.open(image_path(digest)) as original:
+            # checked on the header, before anything is decoded; pictures stored before the limit may exceed it
+            if original.width * original.height > MAX_IMAGE_PIXELS:
+                return None
+            image = ImageOps.exif_transpose(original)
+            image.thumbnail(VARIANTS[variant])
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.variant-')
+            try:
+                with os.fdopen(fd, 'wb') as tmp:
+                    image.save(tmp, format='JPEG', quality=VARIANT_QUALITY, optimize=True, progressive=True)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+    except (OSError, Image.DecompressionBombError):
+        return None
+
+    return path
+
+
+def create_variants(digest: str):
+    '''Create every resized copy of a freshly stored image'''
+    for variant in VARIANTS:
+        create_variant(digest, variant)
@@ -0,0 +1,34 @@
+'''Compresses the content of existing sections with data.section_content.encode_content.
+
+Sections written since compressed storage was added are already compressed; this catches up the older rows.
+    python -m data.migrations.compress_section_content
+'''
+from data.database import read_query, update_query
+from data.section_content import COMPRESSED_MARKER, encode_content
+
+BATCH_SIZE = 100
+
+
+def compress_section_content(batch_size: int = BATCH_SIZE) -> int:
+    '''Compress the sections in batches and return how many were rewritten'''
+    compressed = 0
+    after_id = 0
+    while True:
+        data = read_query('''SELECT id, content FROM sections
+                             WHERE id > ? AND content IS NOT NULL AND LEFT(content, ?) <> ?
+                             ORDER BY id LIMIT ?''',
+                          (after_id, len(COMPRESSED_MARKER), COMPRESSED_MARKER, batch_size))
+        if not data:
+            return compressed
+
+        for section_id, content in data:
+            stored = encode_content(content)
+            # the content check skips rows edited since they were read
+            if stored != content and update_query('UPDATE sections SET content = ? WHERE id = ? AND content = ?',
+                                                  (stored, section_id, content)):
+                compressed += 1
+        after_id = data[-1][0]
+
+
+if __name__ == '__main__':
+    print(f'Compressed the content of {compress_section_content()} sections.')
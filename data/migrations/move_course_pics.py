@@ -0,0 +1,42 @@
+'''Moves course pictures from the courses.home_page_pic BLOB column to the image store.
+
+Run once after data_base/migrations/001_course_pic_hash.sql:
+    python -m data.migrations.move_course_pics
+'''
+from data.common.exceptions import Exception400BadRequest
+from data.database import read_query, update_query
+from data.image_store import create_variants, save_image
+
+BATCH_SIZE = 100
+
+
+def move_course_pics(batch_size: int = BATCH_SIZE) -> int:
+    '''Move the pictures in batches and return how many were moved.
+
+    Pictures the image store refuses keep their BLOB and are reported, so a rerun after
+    fixing them moves only those.
+    '''
+    moved = 0
+    last_id = 0
+    while True:
+        data = read_query('''SELECT id, home_page_pic FROM courses
+                             WHERE home_page_pic IS NOT NULL AND id > ?
+                             ORDER BY id LIMIT ?''', (last_id, batch_size))
+        if not data:
+            return moved
+
+        for course_id, pic in data:
+            last_id = course_id
+            try:
+                pic_hash = save_image(bytes(pic))
+            except Exception400BadRequest as exc:
+                print(f'Skipped the picture of course {course_id}: {exc.detail}')
+                continue
+            create_variants(pic_hash)
+            update_query('UPDATE courses SET home_page_pic_hash = ?, home_page_pic = NULL WHERE id = ?',
+                         (pic_hash, course_id))
+            moved += 1
+
+
+if __name__ == '__main__':
+    print(f'Moved {move_course_pics()} course pictures to the image store.')
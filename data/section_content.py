@@ -0,0 +1,41 @@
+import base64
+import zlib
+
+COMPRESS_CONTENT = True        # store new and updated section content compressed
+COMPRESS_MIN_LENGTH = 1024     # characters; shorter content is not worth compressing
+COMPRESSION_LEVEL = 6
+
+# prefix of compressed content in sections.content, followed by the base64 of the zlib stream
+COMPRESSED_MARKER = '\x1fzlib1:'
+
+
+def is_compressed(stored: str | None) -> bool:
+    return stored is not None and stored.startswith(COMPRESSED_MARKER)
+
+
+def encode_content(content: str | None) -> str | None:
+    '''Value to store in sections.content for the given section text.
+
+    Content that happens to start with the marker is always compressed, so decoding it gives it back unchanged.
+    '''
+    if content is None:
+        return None
+
+    forced = content.startswith(COMPRESSED_MARKER)
+    if not forced and (not COMPRESS_CONTENT or len(content) < COMPRESS_MIN_LENGTH):
+        return content
+
+    packed = zlib.compress(content.encode('utf-8'), COMPRESSION_LEVEL)
+    encoded = COMPRESSED_MARKER + base64.b64encode(packed).decode('ascii')
+    if not forced and len(encoded) >= len(content):
+        return content
+    return encoded
+
+
+def decode_content(stored: str | None) -> str | None:
+    '''Section text of a value read from sections.content, compressed or not'''
+    if not is_compressed(stored):
+        return stored
+
+    packed = base64.b64decode(stored[len(COMPRESSED_MARKER):])
+    return zlib.decompress(packed).decode('utf-8')
@@ -28,6 +28,16 @@ VALUES
     (3, 2, 1, 7, NULL),
     (3, 4, 1, 7, NULL);
 
+-- Rating counters of the courses rated above
+UPDATE courses AS c
+JOIN (SELECT courses_id, SUM(rating) AS rating_sum, COUNT(rating) AS rating_count
+      FROM users_have_courses GROUP BY courses_id) AS r ON r.courses_id = c.id
+SET c.rating_sum = r.rating_sum, c.rating_count = r.rating_count;
+
+-- Student counters of the courses enrolled above
+UPDATE courses AS c
+SET c.students_count = (SELECT count(*) FROM users_have_courses WHERE courses_id = c.id);
+
 -- Insert data into the objectives table
 INSERT INTO objectives (id, description)
 VALUES
@@ -61,3 +71,10 @@ VALUES
     (3, 'Dicts', 'Vivamus lorem elit, luctus quis neque ut, congue venenatis purus. In rutrum ullamcorper nisl, at euismod urna aliquam sed. Curabitur ut velit magna. Donec quis sem vel felis pretium accumsan. Donec tempus ullamcorper risus, sed tristique orci. Class ap...', 'Explain dictionaries', 'any', 1),
     (4, 'Basic OOP', 'Aenean commodo bibendum mi id efficitur. Nam auctor, mauris eget blandit lacinia, turpis erat mattis felis, nec feugiat est justo eget leo. Suspendisse potenti. Cras sodales sapien lacus, vel pretium nunc tempus at. Maecenas sed ex quis sapien ornare g...', 'Explain basic OOP', 'any', 2),
     (5, 'Abstractions', 'Morbi ut arcu risus. Phasellus porta commodo lorem, vitae faucibus ipsum commodo in. Aliquam ornare, nunc vel luctus vulputate, ipsum dui gravida leo, dapibus euismod ligula nisi non dolor. Sed sodales ante est, ac scelerisque elit dignissim sed. Sed in...', 'Explain Abstraction', 'any', 2);
+
+-- Content length and hash of the sections above
+UPDATE sections SET content_length = CHAR_LENGTH(content), content_hash = SHA2(content, 256);
+
+-- Section counters of the courses above
+UPDATE courses AS c
+SET c.sections_count = (SELECT count(id) FROM sections WHERE courses_id = c.id);
@@ -28,7 +28,10 @@ CREATE TABLE IF NOT EXISTS `e-learning`.`users` (
   `is_verified` TINYINT(4) NULL DEFAULT NULL,
   `is_approved` TINYINT(4) NULL DEFAULT NULL,
   PRIMARY KEY (`id`),
-  UNIQUE INDEX `email_UNIQUE` (`email` ASC) VISIBLE)
+  UNIQUE INDEX `email_UNIQUE` (`email` ASC) VISIBLE,
+  INDEX `last_name_idx` (`last_name` ASC) VISIBLE,
+  FULLTEXT INDEX `email_FULLTEXT` (`email`),
+  FULLTEXT INDEX `last_name_FULLTEXT` (`last_name`))
 ENGINE = InnoDB
 DEFAULT CHARACTER SET = utf8mb4;
 
@@ -57,12 +60,19 @@ CREATE TABLE IF NOT EXISTS `e-learning`.`courses` (
   `title` VARCHAR(45) NULL DEFAULT NULL,
   `description` VARCHAR(500) NULL DEFAULT NULL,
   `home_page_pic` BLOB NULL DEFAULT NULL,
+  `home_page_pic_hash` CHAR(64) NULL DEFAULT NULL,
   `owner_id` INT(11) NOT NULL,
   `is_active` TINYINT(1) NULL DEFAULT NULL,
   `is_premium` TINYINT(1) NOT NULL,
   `course_rating` DECIMAL(10,1) NULL DEFAULT NULL,
+  `rating_sum` INT(11) NOT NULL DEFAULT 0,
+  `rating_count` INT(11) NOT NULL DEFAULT 0,
+  `sections_count` INT(11) NOT NULL DEFAULT 0,
+  `students_count` INT(11) NOT NULL DEFAULT 0,
+  `version` INT(11) NOT NULL DEFAULT 0,
   PRIMARY KEY (`id`),
   UNIQUE INDEX `title_UNIQUE` (`title` ASC) VISIBLE,
+  FULLTEXT INDEX `title_FULLTEXT` (`title`),
   INDEX `fk_courses_Teachers1_idx` (`owner_id` ASC) VISIBLE,
   CONSTRAINT `fk_courses_Teachers1`
     FOREIGN KEY (`owner_id`)
@@ -77,7 +87,8 @@ DEFAULT CHARACTER SET = utf8mb4;
 CREATE TABLE IF NOT EXISTS `e-learning`.`objectives` (
   `id` INT(11) NOT NULL AUTO_INCREMENT,
   `description` VARCHAR(100) NULL DEFAULT NULL,
-  PRIMARY KEY (`id`))
+  PRIMARY KEY (`id`),
+  UNIQUE INDEX `description_UNIQUE` (`description` ASC) VISIBLE)
 ENGINE = InnoDB
 DEFAULT CHARACTER SET = utf8mb4;
 
@@ -107,7 +118,8 @@ DEFAULT CHARACTER SET = utf8mb4;
 CREATE TABLE IF NOT EXISTS `e-learning`.`tags` (
   `id` INT(11) NOT NULL AUTO_INCREMENT,
   `expertise_area` VARCHAR(45) NULL DEFAULT NULL,
-  PRIMARY KEY (`id`))
+  PRIMARY KEY (`id`),
+  UNIQUE INDEX `expertise_area_UNIQUE` (`expertise_area` ASC) VISIBLE)
 ENGINE = InnoDB
 DEFAULT CHARACTER SET = utf8mb4;
 
@@ -138,6 +150,8 @@ CREATE TABLE IF NOT EXISTS `e-learning`.`sections` (
   `id` INT(11) NOT NULL AUTO_INCREMENT,
   `title` VARCHAR(45) NULL DEFAULT NULL,
   `content` LONGTEXT NULL DEFAULT NULL,
+  `content_length` INT(11) NOT NULL DEFAULT 0,
+  `content_hash` CHAR(64) NULL DEFAULT NULL,
   `description` VARCHAR(45) NULL DEFAULT NULL,
   `external_link` VARCHAR(45) NULL DEFAULT NULL,
   `courses_id` INT(11) NOT NULL,
@@ -159,6 +173,7 @@ CREATE TABLE IF NOT EXISTS `e-learning`.`users_have_courses` (
   `status` TINYINT(3) NULL DEFAULT NULL,
   `rating` INT(11) NULL DEFAULT NULL,
   `progress` TINYINT(100) NULL DEFAULT NULL,
+  `viewed_sections` INT(11) NOT NULL DEFAULT 0,
   PRIMARY KEY (`users_id`, `courses_id`),
   INDEX `fk_users_has_Courses_Courses1_idx` (`courses_id` ASC) VISIBLE,
   INDEX `fk_users_has_Courses_users1_idx` (`users_id` ASC) VISIBLE,
@@ -195,6 +210,26 @@ ENGINE = InnoDB
 DEFAULT CHARACTER SET = utf8mb4;
 
 
+-- -----------------------------------------------------
+-- Table `e-learning`.`email_outbox`
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS `e-learning`.`email_outbox` (
+  `id` INT(11) NOT NULL AUTO_INCREMENT,
+  `recipient` VARCHAR(100) NOT NULL,
+  `subject` VARCHAR(200) NOT NULL,
+  `body` TEXT NOT NULL,
+  `attempts` INT(11) NOT NULL DEFAULT 0,
+  `next_attempt_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `claim_token` CHAR(32) NULL DEFAULT NULL,
+  `last_error` VARCHAR(500) NULL DEFAULT NULL,
+  `sent_at` DATETIME NULL DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  INDEX `email_outbox_pending_idx` (`sent_at` ASC, `next_attempt_at` ASC) VISIBLE,
+  INDEX `email_outbox_claim_idx` (`claim_token` ASC) VISIBLE)
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb4;
+
+
 SET SQL_MODE=@OLD_SQL_MODE;
 SET FOREIGN_KEY_CHECKS=@OLD_FOREIGN_KEY_CHECKS;
 SET UNIQUE_CHECKS=@OLD_UNIQUE_CHECKS;
@@ -0,0 +1,4 @@
+-- Course pictures move from the courses.home_page_pic BLOB to the content-addressed image store.
+-- Run `python -m data.migrations.move_course_pics` afterwards to move the existing pictures.
+ALTER TABLE `e-learning`.`courses`
+  ADD COLUMN `home_page_pic_hash` CHAR(64) NULL DEFAULT NULL AFTER `home_page_pic`;
@@ -0,0 +1,17 @@
+-- Emails are no longer sent inside HTTP requests: endpoints write them to the outbox
+-- and services/email_service.py delivers them in the background.
+CREATE TABLE IF NOT EXISTS `e-learning`.`email_outbox` (
+  `id` INT(11) NOT NULL AUTO_INCREMENT,
+  `recipient` VARCHAR(100) NOT NULL,
+  `subject` VARCHAR(200) NOT NULL,
+  `body` TEXT NOT NULL,
+  `attempts` INT(11) NOT NULL DEFAULT 0,
+  `next_attempt_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `claim_token` CHAR(32) NULL DEFAULT NULL,
+  `last_error` VARCHAR(500) NULL DEFAULT NULL,
+  `sent_at` DATETIME NULL DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  INDEX `email_outbox_pending_idx` (`sent_at` ASC, `next_attempt_at` ASC),
+  INDEX `email_outbox_claim_idx` (`claim_token` ASC))
+ENGINE = InnoDB
+DEFAULT CHARACTER SET = utf8mb4;
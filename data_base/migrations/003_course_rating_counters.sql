@@ -0,0 +1,11 @@
+-- Course ratings are maintained incrementally from a running sum and count of the students' ratings.
+ALTER TABLE `e-learning`.`courses`
+  ADD COLUMN `rating_sum` INT(11) NOT NULL DEFAULT 0 AFTER `course_rating`,
+  ADD COLUMN `rating_count` INT(11) NOT NULL DEFAULT 0 AFTER `rating_sum`;
+
+UPDATE `e-learning`.`courses` AS c
+JOIN (SELECT courses_id, SUM(rating) AS rating_sum, COUNT(rating) AS rating_count
+      FROM `e-learning`.`users_have_courses` GROUP BY courses_id) AS r ON r.courses_id = c.id
+SET c.rating_sum = r.rating_sum,
+    c.rating_count = r.rating_count,
+    c.course_rating = IF(r.rating_count > 0, ROUND(r.rating_sum / r.rating_count, 1), NULL);
@@ -0,0 +1,14 @@
+-- Student progress is maintained from a per-course section count and a per-enrollment viewed count.
+ALTER TABLE `e-learning`.`courses`
+  ADD COLUMN `sections_count` INT(11) NOT NULL DEFAULT 0 AFTER `rating_count`;
+
+ALTER TABLE `e-learning`.`users_have_courses`
+  ADD COLUMN `viewed_sections` INT(11) NOT NULL DEFAULT 0 AFTER `progress`;
+
+UPDATE `e-learning`.`courses` AS c
+SET c.sections_count = (SELECT count(id) FROM `e-learning`.`sections` WHERE courses_id = c.id);
+
+UPDATE `e-learning`.`users_have_courses` AS uc
+SET uc.viewed_sections = (SELECT count(*) FROM `e-learning`.`users_has_sections` AS us
+                          JOIN `e-learning`.`sections` AS s ON s.id = us.sections_id
+                          WHERE us.users_id = uc.users_id AND s.courses_id = uc.courses_id);
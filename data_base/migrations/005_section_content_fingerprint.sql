@@ -0,0 +1,8 @@
+-- Section lists show the length and hash of the content instead of the content itself.
+ALTER TABLE `e-learning`.`sections`
+  ADD COLUMN `content_length` INT(11) NOT NULL DEFAULT 0 AFTER `content`,
+  ADD COLUMN `content_hash` CHAR(64) NULL DEFAULT NULL AFTER `content_length`;
+
+UPDATE `e-learning`.`sections`
+SET content_length = CHAR_LENGTH(content),
+    content_hash = SHA2(content, 256);
@@ -0,0 +1,3 @@
+-- Every write to a course or its sections bumps courses.version; read endpoints derive their ETags from it.
+ALTER TABLE `e-learning`.`courses`
+  ADD COLUMN `version` INT(11) NOT NULL DEFAULT 0 AFTER `sections_count`;
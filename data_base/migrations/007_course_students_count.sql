@@ -0,0 +1,6 @@
+-- The admin catalog reads the number of enrolled students from a counter kept on the course.
+ALTER TABLE `e-learning`.`courses`
+  ADD COLUMN `students_count` INT(11) NOT NULL DEFAULT 0 AFTER `sections_count`;
+
+UPDATE `e-learning`.`courses` AS c
+SET c.students_count = (SELECT count(*) FROM `e-learning`.`users_have_courses` WHERE courses_id = c.id);
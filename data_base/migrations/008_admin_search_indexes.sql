@@ -0,0 +1,13 @@
+-- Admin search matches email, last name and title by prefix through B-tree indexes,
+-- and '*' searches by word through FULLTEXT indexes.
+ALTER TABLE `e-learning`.`users`
+  ADD INDEX `last_name_idx` (`last_name` ASC);
+
+ALTER TABLE `e-learning`.`users`
+  ADD FULLTEXT INDEX `email_FULLTEXT` (`email`);
+
+ALTER TABLE `e-learning`.`users`
+  ADD FULLTEXT INDEX `last_name_FULLTEXT` (`last_name`);
+
+ALTER TABLE `e-learning`.`courses`
+  ADD FULLTEXT INDEX `title_FULLTEXT` (`title`);
@@ -0,0 +1,43 @@
+-- Tags and objectives are created with INSERT IGNORE, so each name must be unique.
+-- Links to a duplicated name move to its oldest row before the duplicates are dropped.
+UPDATE IGNORE `e-learning`.`courses_have_tags` AS ct
+JOIN `e-learning`.`tags` AS t ON t.id = ct.tags_id
+JOIN (SELECT expertise_area, MIN(id) AS keep_id FROM `e-learning`.`tags` GROUP BY expertise_area) AS k
+  ON k.expertise_area = t.expertise_area
+SET ct.tags_id = k.keep_id
+WHERE ct.tags_id <> k.keep_id;
+
+DELETE ct FROM `e-learning`.`courses_have_tags` AS ct
+JOIN `e-learning`.`tags` AS t ON t.id = ct.tags_id
+JOIN (SELECT expertise_area, MIN(id) AS keep_id FROM `e-learning`.`tags` GROUP BY expertise_area) AS k
+  ON k.expertise_area = t.expertise_area
+WHERE ct.tags_id <> k.keep_id;
+
+DELETE t FROM `e-learning`.`tags` AS t
+JOIN (SELECT expertise_area, MIN(id) AS keep_id FROM `e-learning`.`tags` GROUP BY expertise_area) AS k
+  ON k.expertise_area = t.expertise_area
+WHERE t.id <> k.keep_id;
+
+UPDATE IGNORE `e-learning`.`courses_have_objectives` AS co
+JOIN `e-learning`.`objectives` AS o ON o.id = co.objectives_id
+JOIN (SELECT description, MIN(id) AS keep_id FROM `e-learning`.`objectives` GROUP BY description) AS k
+  ON k.description = o.description
+SET co.objectives_id = k.keep_id
+WHERE co.objectives_id <> k.keep_id;
+
+DELETE co FROM `e-learning`.`courses_have_objectives` AS co
+JOIN `e-learning`.`objectives` AS o ON o.id = co.objectives_id
+JOIN (SELECT description, MIN(id) AS keep_id FROM `e-learning`.`objectives` GROUP BY description) AS k
+  ON k.description = o.description
+WHERE co.objectives_id <> k.keep_id;
+
+DELETE o FROM `e-learning`.`objectives` AS o
+JOIN (SELECT description, MIN(id) AS keep_id FROM `e-learning`.`objectives` GROUP BY description) AS k
+  ON k.description = o.description
+WHERE o.id <> k.keep_id;
+
+ALTER TABLE `e-learning`.`tags`
+  ADD UNIQUE INDEX `expertise_area_UNIQUE` (`expertise_area` ASC);
+
+ALTER TABLE `e-learning`.`objectives`
+  ADD UNIQUE INDEX `description_UNIQUE` (`description` ASC);
@@ -209,16 +209,27 @@ export const fetchAllCourses = async () => {
       headers.Authorization = `Bearer ${authToken}`;
     }
 
-    const response = await fetch('http://localhost:8000/courses/', {
-      method: 'GET',
-      headers,
-    });
-
-    if (!response.ok) {
-      throw new Error('Failed to fetch courses');
-    }
-
-    return response.json();
+    // the catalog comes in pages; follow the X-Next-Cursor header until the last one
+    const courses = [];
+    let cursor = null;
+    do {
+      const url = cursor
+        ? `http://localhost:8000/courses/?cursor=${encodeURIComponent(cursor)}`
+        : 'http://localhost:8000/courses/';
+      const response = await fetch(url, {
+        method: 'GET',
+        headers,
+      });
+
+      if (!response.ok) {
+        throw new Error('Failed to fetch courses');
+      }
+
+      courses.push(...(await response.json()));
+      cursor = response.headers.get('X-Next-Cursor');
+    } while (cursor);
+
+    return courses;
   } catch (error) {
     console.error('Error fetching courses:', error);
     throw error;
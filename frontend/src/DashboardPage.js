@@ -108,9 +108,9 @@ const CourseList = ({ courses }) => {
             onClick={() => handlePaperClick(course.id)}
           >
             <div style={{ height: '50%', position: 'relative' }}>
-              {course.home_page_pic ? (
+              {course.home_page_pic_url ? (
                 <img
-                  src={`data:image/jpeg;base64,${course.home_page_pic}`}
+                  src={`http://localhost:8000${course.home_page_pic_url}`}
                   alt="Course Pic"
                   style={{ width: '100%', height: '100%', objectFit: 'cover' }}
                 />
@@ -62,7 +62,7 @@ const SectionsPage = () => {
             <Box width="50%" maxWidth={500} margin="auto">
               <Card style={{ width: '100%', height: '100%' }}>
                 <img
-                  src={`data:image/jpeg;base64,${course.home_page_pic}`}
+                  src={`http://localhost:8000${course.home_page_pic_url}`}
                   alt="Course Pic Not Available"
                   style={{ width: '100%', height: '100%', objectFit: 'cover' }}
                 />
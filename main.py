@@ -4,6 +4,11 @@ from routers.users import user_router
 from routers.courses import course_router
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from data.common.pagination import NEXT_CURSOR_HEADER
+from data.common.compression import CompressionMiddleware
+from data.common.identity_map import IdentityMapMiddleware
+from data.common import passwords
+from services.email_service import outbox_worker
 
 
 app = FastAPI()
@@ -13,13 +18,27 @@ app.include_router(user_router)
 app.include_router(course_router)
 
 
+@app.on_event('startup')
+def start_email_outbox():
+    outbox_worker.start()
+
+
+@app.on_event('shutdown')
+def stop_background_work():
+    outbox_worker.stop(timeout=5)
+    passwords.shutdown()
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Replace with the appropriate list of allowed origins
     allow_credentials=True,
     allow_methods=["*"],  # Replace with the appropriate list of allowed HTTP methods
     allow_headers=["*"],  # Replace with the appropriate list of allowed headers
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(IdentityMapMiddleware)
 
 
 if __name__ == "__main__":
@@ -1,16 +1,24 @@
-from fastapi import APIRouter, Body, Header, UploadFile, status, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, Header, Query, Response, UploadFile, status, HTTPException
 from data.common.auth import get_user_or_raise_401, is_user_approved_by_admin
 from data.common.models.course import Course
 from data.common.models.course_update import CourseUpdate
-from data.common.models.section import Section
+from data.common.models.section import Section, SectionSummary
 from data.common.models.view_courses import ViewStudentCourse
 from services import  courses_service
 from data.common.responses import OK200, BadRequest400, Forbidden403, NotFound404, Conflict409, InternalServerError500
 from data.common.exceptions import Exception403Forbidden
-from fastapi.responses import JSONResponse
+from data.common.uploads import picture_upload
+from data.common.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, decode_after_id, next_page_cursor
+from fastapi.responses import FileResponse, JSONResponse
+from data.common.http_cache import REVALIDATE, etag_matches, hashed_etag, not_modified, set_etag
+from fastapi.encoders import jsonable_encoder
+from services.suggestions import SUGGEST_TOP_K
+from data.image_store import VARIANT_MEDIA_TYPE, create_variant, image_exists, image_media_type, image_path
 
 course_router = APIRouter(prefix="/courses")
 
+MAX_SECTIONS_PER_SYNC = 1000
+
 @course_router.delete('/{course_id}/student_removals/{student_id}', tags=['Courses'])
 def admin_removes_student_from_course(course_id: int, student_id: int, authorization: str = Header()):
     ''' Admin removes student from course'''
@@ -67,8 +75,9 @@ def admin_removes_course(course_id: int, authorization: str = Header()):
 @course_router.get('/enrolled_courses', tags=['Courses'], response_model=list[ViewStudentCourse])
 def view_enrolled_courses(title: str | None = None,
                           tag: str | None = None, 
+                          q: str | None = None,
                           authorization: str = Header()) -> list[ViewStudentCourse]:
-    ''' View enrolled public and premium courses by students only'''
+    ''' View enrolled public and premium courses by students only. q ranks them by a full-text search.'''
     if authorization is None:
         raise HTTPException(status_code=403)
 
@@ -79,7 +88,7 @@ def view_enrolled_courses(title: str | None = None,
         return JSONResponse(status_code=409, content={'detail': 'Your role is still not approved.'})
 
     if user.is_student():
-        return courses_service.view_enrolled_courses(id, title, tag)
+        return courses_service.view_enrolled_courses(id, title, tag, q)
 
     else:
         return JSONResponse(status_code=409,content={'detail': 'Only students can view their enrolled courses!'} )
@@ -97,17 +106,36 @@ def get_courses_student_is_waiting_approval_for(authorization: str = Header()):
 
     return courses
 
+@course_router.get('/suggest', tags=['Courses'], response_model=list[str])
+def suggest_courses(prefix: str = Query(min_length=1, max_length=100),
+                    limit: int = Query(SUGGEST_TOP_K, ge=1, le=SUGGEST_TOP_K),
+                    authorization: str = Header(None)):
+    ''' Course titles and tag names starting with prefix, best rated first, for search typeahead.
+        Anonymous users are only offered public courses.'''
+    include_premium = False
+    if authorization:
+        get_user_or_raise_401(authorization)
+        include_premium = True
+
+    return courses_service.suggest_courses(prefix, include_premium, limit)
+
 @course_router.get('/{course_id}', tags=['Courses'])
-def get_course(course_id: int, authorization: str = Header()):
+def get_course(course_id: int, response: Response, authorization: str = Header(), if_none_match: str | None = Header(None)):
     '''Retrieve course details.'''
 
     get_user_or_raise_401(authorization)
 
+    # the version is read before the course, so a concurrent write can only make the ETag older than the body
+    version = courses_service.get_course_version(course_id)
+    if version is None:
+        return NotFound404(f'Course {course_id} does not exist!')
+
+    etag = f'"course-{course_id}-v{version}"'
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    set_etag(response, etag)
     return courses_service.get_course_by_id(course_id)
-    if course is None:
-        return NotFound({'detail': f'Course {course_id} does not exist!'})
-    else: 
-        course
 
 
 @course_router.get('/{course_id}/sections/{section_id}', tags=['Courses'])
@@ -135,6 +163,30 @@ def view_section(course_id: int,section_id: int, authorization: str = Header()):
     return section
 
 
+@course_router.post('/{course_id}/progress', tags=['Courses'])
+def mark_sections_viewed(course_id: int,
+                         section_ids: list[int] = Body(embed=True, max_items=MAX_SECTIONS_PER_SYNC),
+                         authorization: str = Header()):
+    ''' Mark many sections of a course as viewed at once, e.g. when an offline client syncs'''
+
+    if authorization is None:
+        raise Exception403Forbidden() 
+
+    user = get_user_or_raise_401(authorization)
+    # Verify if role is approved
+    if not is_user_approved_by_admin(user.id):
+        return Conflict409('Your role is still not approved.')
+    #verify if user enrolled in course
+    if not courses_service.is_student_enrolled_in_course(course_id, user.id):
+        return NotFound404('This student is not enrolled in this course.')
+
+    progress = courses_service.mark_sections_viewed(course_id, user.id, section_ids)
+    if progress is None:
+        return InternalServerError500('Something went wrong. Try again.')
+
+    return {'progress': progress}
+
+
 @course_router.post('/', status_code=status.HTTP_201_CREATED, tags=['Courses'])
 def create_course(course: Course, authorization: str = Header(None)):
     user = get_user_or_raise_401(authorization)
@@ -193,8 +245,8 @@ def deactivate_course(course_id: int, authorization: str = Header(None)) -> None
 
 
 @course_router.put('/pic/{course_id}', tags=['Courses'])
-def upload_pic_to_course(course_id: int, pic: UploadFile, authorization: str = Header(None),) -> OK200:
-    '''Uploads a picture to a course.'''
+def upload_pic_to_course(course_id: int, pic: UploadFile = Depends(picture_upload), authorization: str = Header(None),) -> OK200:
+    '''Uploads a picture to a course, sent as the pic field of a multipart form.'''
 
     if authorization is None:
         raise Exception403Forbidden()
@@ -203,13 +255,41 @@ def upload_pic_to_course(course_id: int, pic: UploadFile, authorization: str = H
     if course is None:
         return NotFound404(f'Course {course_id} does not exist!')
     
-    picture_data = pic.file.read()
-    courses_service.upload_pic(course_id, picture_data)
+    courses_service.upload_pic(course_id, pic.file)
     return OK200("Picture uploaded successfully")
 
 
+@course_router.get('/{course_id}/pic', tags=['Courses'])
+def get_course_pic(course_id: int,
+                   variant: str | None = Query(None, regex='^(thumb|medium)$'),
+                   v: str | None = None,
+                   if_none_match: str | None = Header(None)):
+    '''Streams the course picture or one of its resized variants.
+       No authorization, so that it can be used directly as an image source.'''
+
+    pic_hash = courses_service.get_course_pic_hash(course_id)
+    if pic_hash is None or not image_exists(pic_hash):
+        return NotFound404(f'Course {course_id} has no picture.')
+
+    # pictures uploaded before the variants existed get them on first request
+    path = create_variant(pic_hash, variant) if variant else None
+    if path is None:
+        path, media_type, etag = image_path(pic_hash), image_media_type(pic_hash), f'"{pic_hash}"'
+    else:
+        media_type, etag = VARIANT_MEDIA_TYPE, f'"{pic_hash}-{variant}"'
+
+    # URLs carrying the content hash never change, any other URL has to be revalidated
+    cache_control = 'public, max-age=31536000, immutable' if v == pic_hash else 'no-cache'
+    headers = {'ETag': etag, 'Cache-Control': cache_control}
+
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
 @course_router.post('/{course_id}', status_code=status.HTTP_201_CREATED, tags=['Courses'])
-def create_section(course_id: int, section: Section, authorization: str = Header()):
+def create_section(course_id: int, section: Section, background_tasks: BackgroundTasks, authorization: str = Header()):
     '''Create a section within a course.'''
 
     user = get_user_or_raise_401(authorization)
@@ -226,12 +306,14 @@ def create_section(course_id: int, section: Section, authorization: str = Header
 
     created_section = courses_service.create_section(course_id, section)
     created_section.courses_id = course_id
+    # every enrolled student now has one more section to go
+    background_tasks.add_task(courses_service.recompute_course_progress, course_id)
 
     return created_section
 
 
 @course_router.put('/{course_id}/sections/{section_id}',tags=['Courses'])
-def update_section(course_id: int, section_id: int, section: Section, authorization: str = Header()):
+def update_section(course_id: int, section_id: int, section: Section, background_tasks: BackgroundTasks, authorization: str = Header()):
     '''Update a section within a course.'''
     
     user = get_user_or_raise_401(authorization)
@@ -250,7 +332,12 @@ def update_section(course_id: int, section_id: int, section: Section, authorizat
     if existing_section is None:
         return NotFound404(f'Section {section_id} does not exist!')
     else:
-        return courses_service.update_section(existing_section, section)
+        updated_section = courses_service.update_section(existing_section, section)
+        if updated_section.courses_id != existing_section.courses_id:
+            # the section moved: both courses changed their section set
+            background_tasks.add_task(courses_service.recompute_course_progress, existing_section.courses_id)
+            background_tasks.add_task(courses_service.recompute_course_progress, updated_section.courses_id)
+        return updated_section
     
 
 @course_router.put('/{course_id}/ratings', tags=['Courses'])
@@ -271,8 +358,9 @@ def course_rating(course_id: int, rating: int=Body(embed=True, ge=0, le=10), aut
     
     return Conflict409('You are not allowed to rate this course!')
 
-@course_router.get('/{course_id}/sections', tags=['Courses'])
-def view_all_sections_for_a_course(course_id: int, authorization: str = Header(None)):
+@course_router.get('/{course_id}/sections', tags=['Courses'], response_model=list[SectionSummary])
+def view_all_sections_for_a_course(course_id: int, response: Response, authorization: str = Header(None),
+                                   if_none_match: str | None = Header(None)):
     ''' View section of a course'''
 
     if authorization is None:
@@ -284,7 +372,14 @@ def view_all_sections_for_a_course(course_id: int, authorization: str = Header(N
     # Verify if role is approved
     if not is_user_approved_by_admin(user_id):
         return JSONResponse(status_code=409, content={'detail': 'Your role is still not approved.'})
-    
+
+    version = courses_service.get_course_version(course_id)
+    if version is not None:
+        etag = f'"sections-{course_id}-v{version}"'
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+
     return courses_service.view_all_sections_for_a_course(course_id)
 
 @course_router.get('/reports', tags=['Courses'])
@@ -322,15 +417,31 @@ def get_reports_by_course_id(course_id: int, authorization: str = Header()):
 
 
 @course_router.get('/', tags=['Courses'])
-def view_all_courses(title: str | None = None,
+def view_all_courses(response: Response,
+                     title: str | None = None,
                      rating: float = None,
                      tag: str | None = None,
                      teacher: str = None,
                      student: str  = None,
-                     authorization: str =Header(None)):
-    ''' View all courses depending on role - anonymous, student, teacher, admin'''
+                     q: str | None = None,
+                     limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                     cursor: str | None = None,
+                     authorization: str =Header(None),
+                     if_none_match: str | None = Header(None)):
+    ''' View all courses depending on role - anonymous, student, teacher, admin.
+        Returns at most limit courses; the cursor of the next page is sent in the X-Next-Cursor header.
+        For admins title, teacher and student match by prefix; start them with * for a word-prefix search,
+        matching where the value starts any word.
+        Anonymous users and students can pass q instead: the best limit matches of a full-text search over
+        titles, descriptions, tags and objectives, ranked by term matches and rating, with no next page.
+        Teachers and admins get 400 for q.'''
+    after_id = decode_after_id(cursor)
+    # ranked results have no id order to continue from
+    page_limit = None if q else limit
+
     if not authorization:
-        return courses_service.view_public_courses(rating,tag)
+        courses = courses_service.view_public_courses(rating, tag, title, limit, after_id, q)
+        return _catalog_page(response, courses, page_limit, if_none_match, cache_control='no-cache')
 
     user = get_user_or_raise_401(authorization)
     id=user.id
@@ -339,10 +450,44 @@ def view_all_courses(title: str | None = None,
         return Conflict409('Your role is still not approved.')
     
     if user.is_student():
-        return courses_service.view_students_courses(id, title, tag)
+        courses = courses_service.view_students_courses(id, title, tag, rating, limit, after_id, q)
+        return _catalog_page(response, courses, page_limit, if_none_match)
+
+    if q:
+        # the search index only holds the active catalog, not the hidden courses teachers and admins also see
+        return BadRequest400('q is only available to anonymous users and students. Search by title and tag instead.')
 
     elif user.is_teacher():
-        return courses_service.view_teacher_courses(id, title, tag)
+        courses = courses_service.view_teacher_courses(id, title, tag, rating, limit, after_id)
     
     elif user.is_admin():
-        return courses_service.view_admin_courses(title, tag, teacher, student)
+        courses = courses_service.view_admin_courses(title, tag, teacher, student, limit, after_id)
+
+    else:
+        return Forbidden403('Unknown role.')
+
+    _set_next_cursor(response, courses, limit)
+    return courses
+
+
+def _catalog_page(response: Response, courses: list, limit: int | None, if_none_match: str | None,
+                  cache_control: str = REVALIDATE):
+    ''' Catalog page served from the in-memory snapshot, with an ETag of its content'''
+    # hashing the page itself keeps the ETag valid across worker processes whose snapshots were reloaded at different times
+    etag = hashed_etag(jsonable_encoder(courses))
+    if etag_matches(if_none_match, etag):
+        not_modified_response = not_modified(etag, cache_control)
+        _set_next_cursor(not_modified_response, courses, limit)
+        return not_modified_response
+
+    set_etag(response, etag, cache_control)
+    _set_next_cursor(response, courses, limit)
+    return courses
+
+
+def _set_next_cursor(response: Response, courses: list, limit: int | None):
+    if limit is None:
+        return
+    next_cursor = next_page_cursor(courses, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
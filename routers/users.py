@@ -7,6 +7,8 @@ from data.common.models.user import User
 from services import users_service, courses_service
 # from services.users_service import Teacher
 from data.common.auth import  get_user_or_raise_401, is_user_approved_by_admin
+from data.common import passwords
+from data.database import pool_stats
 import uuid
 
 user_router = APIRouter(prefix="/users")
@@ -173,7 +175,8 @@ def update_user(update_info: UpdateData, authorization: str = Header(None)):
 @user_router.get('/all', tags=['Users'])
 def view_all_users_by_admin(email: str = None,
                             last_name: str = None, authorization: str = Header(None)):
-    '''View all users by admin'''
+    '''View all users by admin. Email and last name match by prefix; start them with * for a word-prefix search,
+        matching where the value starts any word.'''
     if authorization is None:
         raise Exception403Forbidden()
     user = get_user_or_raise_401(authorization)
@@ -181,6 +184,18 @@ def view_all_users_by_admin(email: str = None,
         return users_service.view_admin(email, last_name) 
     return Forbidden403('You are not an administator.')
 
+@user_router.get('/stats', tags=['Users'])
+def view_server_stats(authorization: str = Header(None)):
+    '''Admin view of the database pool, password hashing pool and course load counters of this process'''
+    if authorization is None:
+        raise Exception403Forbidden()
+    user = get_user_or_raise_401(authorization)
+    if user.is_admin():
+        return {'database_pool': pool_stats(),
+                'password_hashing': passwords.hashing_stats(),
+                'course_loads': courses_service.course_load_stats()}
+    return Forbidden403('You are not an administator.')
+
 @user_router.put('/{user_id}/admin_approvals', tags=['Users'])
 def admin_approves_users(user_id: int, authorization: str = Header(None)):
     '''Admin approves user role'''
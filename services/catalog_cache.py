@@ -0,0 +1,122 @@
+from bisect import bisect_right
+import threading
+import time
+from pydantic import BaseModel
+from data.common.models.view_courses import ViewPublicCourse, ViewStudentCourse
+from services.search_index import SearchIndex
+from services.suggestions import SUGGEST_TOP_K, CatalogSuggestions
+
+CATALOG_TTL_SECONDS = 300
+
+
+class CatalogCourse(BaseModel):
+    ''' One active course of the catalog, with the views handed out to anonymous users and students'''
+    id: int
+    is_premium: bool
+    public_view: ViewPublicCourse
+    student_view: ViewStudentCourse
+
+
+class CatalogSnapshot:
+    ''' Versioned in-memory copy of the active course catalog.
+
+    Writes call invalidate() for the course they touched and the next read reloads only the stale courses,
+    re-indexing them in the full-text search index and the title suggestions kept alongside.
+    The whole catalog is reloaded once it is older than the TTL, which also bounds how long a change made
+    by another worker process can stay invisible.
+    '''
+
+    def __init__(self, loader, ttl: float = CATALOG_TTL_SECONDS):
+        self._loader = loader  # loader(course_ids or None for all) -> dict[int, CatalogCourse]
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._courses: dict[int, CatalogCourse] | None = None
+        self._ids: list[int] = []
+        self._index = SearchIndex()
+        self._suggestions = CatalogSuggestions()
+        self._stale: set[int] = set()
+        self._loaded_at = 0.0
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self, course_id: int = None):
+        ''' Mark one course, or the whole catalog when course_id is None, as stale'''
+        with self._lock:
+            if course_id is None:
+                self._courses = None
+            elif self._courses is not None:
+                self._stale.add(course_id)
+            self._version += 1
+
+    def courses(self) -> tuple[dict[int, CatalogCourse], list[int]]:
+        ''' Current catalog keyed by course id, and its ids in ascending order'''
+        with self._lock:
+            return self._refreshed()
+
+    def page(self, after_id: int = None) -> list[CatalogCourse]:
+        ''' Catalog courses with an id greater than after_id, in id order'''
+        courses, ids = self.courses()
+        start = 0 if after_id is None else bisect_right(ids, after_id)
+        return [courses[course_id] for course_id in ids[start:]]
+
+    def search(self, query: str, course_ids: set[int] = None) -> list[CatalogCourse]:
+        ''' Catalog courses matching the words of query, best match first'''
+        with self._lock:
+            courses, _ = self._refreshed()
+            return [courses[course_id] for course_id in self._index.search(query, course_ids)]
+
+    def suggest(self, prefix: str, include_premium: bool, limit: int = SUGGEST_TOP_K) -> list[str]:
+        ''' Best rated titles and tag names starting with prefix'''
+        with self._lock:
+            self._refreshed()
+            return self._suggestions.suggest(prefix, include_premium, limit)
+
+    def _refreshed(self) -> tuple[dict[int, CatalogCourse], list[int]]:
+        if self._courses is None or time.monotonic() - self._loaded_at > self._ttl:
+            self._reload_all()
+        elif self._stale:
+            self._reload_stale()
+        return self._courses, self._ids
+
+    def _reload_all(self):
+        loaded_at = time.monotonic()
+        courses = self._loader(None)
+        index = SearchIndex()
+        for course in courses.values():
+            _index_course(index, course)
+        suggestions = CatalogSuggestions.build([_suggestion_source(course) for course in courses.values()])
+        self._courses = courses
+        self._ids = sorted(courses)
+        self._index = index
+        self._suggestions = suggestions
+        self._stale.clear()
+        self._loaded_at = loaded_at
+        self._version += 1
+
+    def _reload_stale(self):
+        stale = set(self._stale)
+        fresh = self._loader(stale)
+        courses = {course_id: course for course_id, course in self._courses.items() if course_id not in stale}
+        courses.update(fresh)
+        for course_id in stale:
+            self._index.remove(course_id)
+            self._suggestions.remove_course(course_id)
+        for course in fresh.values():
+            _index_course(self._index, course)
+            self._suggestions.add_course(*_suggestion_source(course))
+        self._courses = courses
+        self._ids = sorted(courses)
+        self._stale -= stale
+
+
+def _index_course(index: SearchIndex, course: CatalogCourse):
+    view = course.student_view
+    index.add(course.id, view.title, view.description, view.tags, view.objectives, view.course_rating)
+
+
+def _suggestion_source(course: CatalogCourse) -> tuple:
+    view = course.student_view
+    return course.id, view.title, view.tags, view.course_rating, course.is_premium
@@ -1,97 +1,205 @@
 
-from data.database import read_query, insert_query, update_query
+from data.database import read_query, update_query, transaction
 from data.common.models.course_response import CourseResponse
 from data.common.models.course_update import CourseUpdate
 from data.common.models.course import Course
 from data.common.models.objective import Objective
 from data.common.models.report import Report
-from data.common.models.section import Section
+from data.common.models.section import Section, SectionSummary
 from data.common.models.tag import Tag
 from data.common.models.user_rating import UserRating
 from data.common.models.user import User
-from data.common.models.view_courses import ViewPublicCourse, ViewStudentCourse, ViewTeacherCourse, ViewAdminCourse
+from data.common.models.view_courses import ViewPublicCourse, ViewStudentCourse, ViewTeacherCourse, ViewAdminCourse, course_pic_url
 from data.common.constants import CourseStatus, CourseType
-from fastapi import UploadFile
-import base64
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
+from services.catalog_cache import CatalogCourse, CatalogSnapshot
+from data.common.cache import SingleFlight, TTLCache
+from data.common import identity_map
+from data.common.search import escape_like, text_filter
+from services.email_service import enqueue_emails
+from data.image_store import create_variants, save_image, save_image_stream
+from data.section_content import decode_content, encode_content
+from typing import BinaryIO
+import hashlib
+
+PROGRESS_BATCH_SIZE = 500   # students whose progress is recomputed per statement
+NAME_ID_CACHE_SIZE = 4096   # tag and objective ids kept per cache
+NAME_ID_CACHE_TTL = 3600    # seconds; ids never change, this only bounds the memory of rarely used names
+
+
+def get_tags_and_objectives(course_ids: list[int],
+                            with_objectives: bool = True) -> tuple[dict[int, list[str]], dict[int, list[str]]]:
+    ''' Tags and objectives of many courses at once - one query for the tags and one for the objectives'''
+
+    course_ids = list(dict.fromkeys(course_ids))
+    tags = {course_id: [] for course_id in course_ids}
+    objectives = {course_id: [] for course_id in course_ids}
+    if not course_ids:
+        return tags, objectives
+
+    placeholders = ', '.join('?' * len(course_ids))
+
+    sql_tags_list = f'''
+        SELECT ct.courses_id, t.expertise_area
+        FROM courses_have_tags AS ct
+        JOIN tags AS t ON t.id = ct.tags_id
+        WHERE ct.courses_id IN ({placeholders})
+    '''
+    for course_id, tag in read_query(sql_tags_list, tuple(course_ids)):
+        tags[course_id].append(tag)
 
+    if with_objectives:
+        sql_obj_list = f'''
+            SELECT co.courses_id, o.description
+            FROM courses_have_objectives AS co
+            JOIN objectives AS o ON o.id = co.objectives_id
+            WHERE co.courses_id IN ({placeholders})
+        '''
+        for course_id, objective in read_query(sql_obj_list, tuple(course_ids)):
+            objectives[course_id].append(objective)
 
-def view_public_courses(rating: float = None,
-                        tag: str  = None) -> list[ViewPublicCourse] :
-    ''' View only title, description and tag of public course and search them by rating and tag'''
+    return tags, objectives
+
+def _to_student_courses(courses_data: list) -> list[ViewStudentCourse]:
+    ''' Build student course views from (id, title, description, course_rating, home_page_pic_hash) rows'''
+
+    tags, objectives = get_tags_and_objectives([c[0] for c in courses_data])
 
-    sql='''SELECT c.id, c.title,  c.description, c.course_rating
-           FROM courses as c
-           WHERE c.is_premium = 0 and c.is_active = 1'''
-    courses_data=read_query(sql, (id,))
     courses = []
     for c in courses_data:
-        course_id = c[0]
+        course = ViewStudentCourse.from_query_result(id=c[0], title=c[1], description=c[2], course_rating=c[3],
+                                                     home_page_pic_hash=c[4], tags=tags[c[0]], objectives=objectives[c[0]])
+        courses.append(course)
 
-        sql_tags_list = '''
-            SELECT t.expertise_area
-            FROM courses_have_tags AS ct
-            JOIN tags AS t ON t.id = ct.tags_id
-            WHERE ct.courses_id = ?
-        '''
-            
-        sql_tags_params = (course_id,)
-        tags_data = read_query(sql_tags_list, sql_tags_params)
-        tags_data = [tag[0] for tag in tags_data]  # Flatten the list of tags
+    return courses
+
+def _like_pattern(value: str) -> str:
+    ''' LIKE pattern matching value anywhere, with the wildcards in value escaped'''
+    return f'%{escape_like(value)}%'
+
+def _catalog_filters(title: str = None, tag: str = None, rating: float = None) -> tuple[list[str], list]:
+    ''' WHERE clauses and their parameters for the catalog search fields'''
+    where_clauses=[]
+    params=[]
+    if title:
+        where_clauses.append('c.title LIKE ?')
+        params.append(_like_pattern(title))
+    if tag:
+        where_clauses.append('''EXISTS (SELECT 1
+                                        FROM courses_have_tags AS ct
+                                        JOIN tags AS t ON t.id = ct.tags_id
+                                        WHERE ct.courses_id = c.id AND t.expertise_area LIKE ?)''')
+        params.append(_like_pattern(tag))
+    if rating is not None:
+        where_clauses.append('c.course_rating >= ?')
+        params.append(rating)
+
+    return where_clauses, params
+
+def _paginated(sql: str, params: tuple, where_clauses: list[str], filter_params: list,
+               limit: int = None, after_id: int = None) -> tuple[str, tuple]:
+    ''' Append the filters and keyset pagination (ordered by course id) to a query that already has a WHERE'''
+    where_clauses = list(where_clauses)
+    params = list(params) + list(filter_params)
+    if after_id is not None:
+        where_clauses.append('c.id > ?')
+        params.append(after_id)
+    if where_clauses:
+        sql += ' AND ' + ' AND '.join(where_clauses)
+    sql += ' ORDER BY c.id'
+    if limit is not None:
+        sql += ' LIMIT ?'
+        params.append(limit)
+
+    return sql, tuple(params)
+
+def _load_catalog(course_ids: set[int] = None) -> dict[int, CatalogCourse]:
+    ''' Active courses with their tags and objectives - all of them, or only the given ids'''
+
+    sql = '''SELECT c.id, c.title, c.description, c.course_rating, c.home_page_pic_hash, c.is_premium
+             FROM courses AS c
+             WHERE c.is_active = 1'''
+    sql_params = ()
+    if course_ids is not None:
+        if not course_ids:
+            return {}
+        sql += f' AND c.id IN ({", ".join("?" * len(course_ids))})'
+        sql_params = tuple(course_ids)
+
+    courses_data = read_query(sql, sql_params)
+    courses = _to_student_courses([c[:5] for c in courses_data])
+
+    return {course.id: CatalogCourse(id=course.id,
+                                     is_premium=bool(c[5]),
+                                     public_view=ViewPublicCourse.from_query_result(id=course.id, title=course.title,
+                                                                                    description=course.description,
+                                                                                    course_rating=course.course_rating,
+                                                                                    tags=course.tags),
+                                     student_view=course)
+            for c, course in zip(courses_data, courses)}
+
+catalog = CatalogSnapshot(_load_catalog)
+course_loads = SingleFlight()
+tag_id_cache = TTLCache(NAME_ID_CACHE_SIZE, NAME_ID_CACHE_TTL)
+objective_id_cache = TTLCache(NAME_ID_CACHE_SIZE, NAME_ID_CACHE_TTL)
+
+def _matches_search(course: ViewStudentCourse, title: str = None, tag: str = None, rating: float = None) -> bool:
+    ''' In-memory equivalent of the SQL catalog filters'''
+    if title and title.casefold() not in course.title.casefold():
+        return False
+    if tag and not any(tag.casefold() in course_tag.casefold() for course_tag in course.tags):
+        return False
+    if rating is not None and (course.course_rating is None or course.course_rating < rating):
+        return False
+    return True
+
+def _catalog_entries(after_id: int = None, q: str = None) -> list[CatalogCourse]:
+    ''' Catalog courses ranked by the full-text search for q, or the page after after_id in id order'''
+    if q:
+        return catalog.search(q)
+    return catalog.page(after_id)
+
+def view_public_courses(rating: float = None,
+                        tag: str  = None,
+                        title: str = None,
+                        limit: int = None,
+                        after_id: int = None,
+                        q: str = None) -> list[ViewPublicCourse] :
+    ''' View only title, description and tag of public course and search them by rating and tag.
+        With q the best matches of the full-text search are returned instead of the page after after_id.'''
+
+    courses = []
+    for entry in _catalog_entries(after_id, q):
+        if limit is not None and len(courses) == limit:
+            break
+        if not entry.is_premium and _matches_search(entry.student_view, title, tag, rating):
+            courses.append(entry.public_view)
 
-        course = ViewPublicCourse.from_query_result(id=c[0], title=c[1], description=c[2], course_rating=c[3],
-                                                     tags=tags_data)
-        courses.append(course)
-    
     return courses
     
+def suggest_courses(prefix: str, include_premium: bool, limit: int) -> list[str]:
+    ''' Titles and tag names of active courses starting with prefix, best rated first.
+        Anonymous users are only offered the ones of public courses.'''
+    return catalog.suggest(prefix, include_premium, limit)
+
 def view_enrolled_courses(id: int, 
                           title: str = None,
-                          tag: str  = None) -> list[ViewStudentCourse]:
-    '''View enrolled courses of a logged student and search them by title and tag'''
+                          tag: str  = None,
+                          q: str = None) -> list[ViewStudentCourse]:
+    '''View enrolled courses of a logged student and search them by title and tag, or rank them by q'''
 
-    sql='''SELECT c.id, c.title, c.description, c.course_rating, c.home_page_pic
+    sql='''SELECT c.id, c.title, c.description, c.course_rating, c.home_page_pic_hash
            FROM courses AS c
            JOIN users_have_courses AS uc ON c.id = uc.courses_id
            WHERE c.is_active = 1 AND uc.status = 1 AND uc.users_id = ?'''
     
 
     courses_data=read_query(sql, (id,))
-    courses = []
-    for c in courses_data:
-        course_id = c[0]
+    courses = [course for course in _to_student_courses(courses_data) if _matches_search(course, title, tag)]
+    if not q:
+        return courses
 
-        sql_tags_list = '''
-            SELECT t.expertise_area
-            FROM courses_have_tags AS ct
-            JOIN tags AS t ON t.id = ct.tags_id
-            WHERE ct.courses_id = ?
-        '''
-            
-        sql_tags_params = (course_id,)
-        tags_data = read_query(sql_tags_list, sql_tags_params)
-        tags_data = [tag[0] for tag in tags_data]  # Flatten the list of tags
-
-        sql_obj_list = '''
-            SELECT o.description
-            FROM courses_have_objectives AS co
-            JOIN objectives AS o ON o.id = co.objectives_id
-            WHERE co.courses_id = ?
-        '''
-            
-        sql_obj_params = (course_id,)
-        obj_data = read_query(sql_obj_list, sql_obj_params)
-        obj_data = [objective[0] for objective in obj_data]  # Flatten the list of objectives
-
-        course = ViewStudentCourse.from_query_result(id=c[0], title=c[1], description=c[2], course_rating=c[3],
-                                                     home_page_pic=c[4], tags=tags_data, objectives=obj_data)
-        if course.home_page_pic is not None:
-            course.home_page_pic = base64.b64encode(course.home_page_pic).decode('utf-8')
-        courses.append(course)
-    
-    return courses
+    by_id = {course.id: course for course in courses}
+    return [by_id[entry.id] for entry in catalog.search(q, set(by_id))]
 
     # where_clauses=[]
     # if title:
@@ -102,122 +210,70 @@ def view_enrolled_courses(id: int,
     # if where_clauses:
     #     sql+= ' AND ' + ' AND '.join(where_clauses)
 
-def view_students_courses(user_id: int, title: str = None, tag: str = None) -> list[ViewStudentCourse]:
-    '''View all public and premium courses available for students and search them by title and tag'''
+def view_students_courses(user_id: int, title: str = None, tag: str = None, rating: float = None,
+                          limit: int = None, after_id: int = None, q: str = None) -> list[ViewStudentCourse]:
+    '''View all public and premium courses available for students and search them by title, tag and rating,
+       or by the words of q, best match first'''
 
-    sql = '''
-        SELECT c.id, c.title, c.description, c.course_rating, c.home_page_pic
-        FROM courses AS c
-        LEFT JOIN users_have_courses AS uhc ON c.id = uhc.courses_id AND uhc.users_id = ?
-        WHERE c.is_active = 1 AND (uhc.users_id IS NULL OR uhc.status = 2)
-    '''
-    
-    courses_data = read_query(sql, (user_id,))
+    # courses the student is pending approval for or enrolled in are not offered again
+    sql = '''SELECT courses_id FROM users_have_courses WHERE users_id = ? AND status <> 2'''
+    taken = {row[0] for row in read_query(sql, (user_id,))}
 
     courses = []
-    for c in courses_data:
-        course_id = c[0]
+    for entry in _catalog_entries(after_id, q):
+        if limit is not None and len(courses) == limit:
+            break
+        if entry.id not in taken and _matches_search(entry.student_view, title, tag, rating):
+            courses.append(entry.student_view)
 
-        sql_tags_list = '''
-            SELECT t.expertise_area
-            FROM courses_have_tags AS ct
-            JOIN tags AS t ON t.id = ct.tags_id
-            WHERE ct.courses_id = ?
-        '''
-            
-        sql_tags_params = (course_id,)
-        tags_data = read_query(sql_tags_list, sql_tags_params)
-        tags_data = [tag[0] for tag in tags_data]  # Flatten the list of tags
-
-        sql_obj_list = '''
-            SELECT o.description
-            FROM courses_have_objectives AS co
-            JOIN objectives AS o ON o.id = co.objectives_id
-            WHERE co.courses_id = ?
-        '''
-            
-        sql_obj_params = (course_id,)
-        obj_data = read_query(sql_obj_list, sql_obj_params)
-        obj_data = [objective[0] for objective in obj_data]  # Flatten the list of objectives
-
-        course = ViewStudentCourse.from_query_result(id=c[0], title=c[1], description=c[2], course_rating=c[3],
-                                                     home_page_pic=c[4], tags=tags_data, objectives=obj_data)
-        if course.home_page_pic is not None:
-            course.home_page_pic = base64.b64encode(course.home_page_pic).decode('utf-8')
-        courses.append(course)
-    
     return courses
 
-def view_teacher_courses(id: int, title: str = None, tag: str = None) -> list[ViewTeacherCourse]:
-    '''View all public and premium courses of logged teacher and search them by title and tag'''
+def view_teacher_courses(id: int, title: str = None, tag: str = None, rating: float = None,
+                         limit: int = None, after_id: int = None) -> list[ViewTeacherCourse]:
+    '''View all public and premium courses of logged teacher and search them by title, tag and rating'''
 
     sql = '''
-        SELECT c.id, c.title, c.description, c.course_rating, c.home_page_pic, c.is_active, c.is_premium
+        SELECT c.id, c.title, c.description, c.course_rating, c.home_page_pic_hash, c.is_active, c.is_premium
         FROM courses AS c
         WHERE c.owner_id = ?
     '''
+    where_clauses, filter_params = _catalog_filters(title, tag, rating)
+    sql, sql_params = _paginated(sql, (id,), where_clauses, filter_params, limit, after_id)
 
-    course_data = read_query(sql, (id,))
+    course_data = read_query(sql, sql_params)
+    tags, objectives = get_tags_and_objectives([c[0] for c in course_data])
 
     courses = []
     for c in course_data:
-        course_id = c[0]
-
-        sql_tags_list = '''
-            SELECT t.expertise_area
-            FROM courses AS c
-            JOIN courses_have_tags AS ct ON c.id = ct.courses_id
-            JOIN tags AS t ON t.id = ct.tags_id
-            WHERE c.owner_id = ? AND c.id = ?
-        '''
-
-        sql_tags_params = (id, course_id)
-        tags_data = read_query(sql_tags_list, sql_tags_params)
-        tags_data = [tag[0] for tag in tags_data]  # Flatten the list of tags
-
-        sql_obj_list = '''
-            SELECT o.description
-            FROM courses AS c
-            JOIN courses_have_objectives AS co ON c.id = co.courses_id
-            JOIN objectives AS o ON o.id = co.objectives_id
-            WHERE c.owner_id = ? AND c.id = ?
-        '''
-
-        sql_obj_params = (id, course_id)
-        obj_data = read_query(sql_obj_list, sql_obj_params)
-        obj_data = [objective[0] for objective in obj_data]  # Flatten the list of objectives
-
         course = ViewTeacherCourse.from_query_result(id=c[0], title=c[1], description=c[2], course_rating=c[3],
-                                                     home_page_pic=c[4], is_active=c[5], is_premium=c[6],
-                                                     tags=tags_data, objectives=obj_data)
-        if course.home_page_pic is not None:
-            course.home_page_pic = base64.b64encode(course.home_page_pic).decode('utf-8')
+                                                     home_page_pic_hash=c[4], is_active=c[5], is_premium=c[6],
+                                                     tags=tags[c[0]], objectives=objectives[c[0]])
         courses.append(course)
 
     return courses
 
 def course_rating(rating: int , course_id: int, student_id: int)-> bool:
     ''' Student can rate his enrolled course only one time'''
-    try:
-        sql='''SELECT rating 
-            FROM users_have_courses 
-            WHERE courses_id=? AND users_id=?'''
-        data=read_query(sql, (course_id, student_id))
-        if data[0][0]:
-            return None # student can rate a course only once
-        else:
-            sql='''UPDATE users_have_courses 
+    with transaction() as cursor:
+        # rating IS NULL: a student can rate a course only once, and the row lock stops a concurrent second rating
+        cursor.execute('''UPDATE users_have_courses 
                 SET rating = ? 
-                WHERE (users_id = ?) and (courses_id = ?)'''
-                
-            result=update_query(sql,(rating, student_id, course_id))
-            if result:
-                transaction=_course_rating_change_transaction(course_id)
-                if transaction:
-                    return True
-                return None
-    except:
-        return None # student is not enrolled in this course
+                WHERE users_id = ? AND courses_id = ? AND rating IS NULL''',
+                (rating, student_id, course_id))
+        if cursor.rowcount <= 0:
+            return None # already rated or student is not enrolled in this course
+
+        # course_rating is assigned first, so it reads the counters before they change
+        cursor.execute('''UPDATE courses 
+                SET course_rating = ROUND((rating_sum + ?) / (rating_count + 1), 1),
+                    rating_sum = rating_sum + ?,
+                    rating_count = rating_count + 1,
+                    version = version + 1
+                WHERE id = ?''',
+                (rating, rating, course_id))
+
+    _course_changed(course_id)
+    return True
 
 def get_all_reports(user_id: int):
     sql = '''SELECT u.users_id, u.courses_id, u.status, u.rating, u.progress
@@ -242,10 +298,26 @@ def get_reports_by_id(course_id: int):
     data = read_query(sql, sql_params)
     return (Report.from_query_result(*row) for row in data)
 
+def get_course_version(course_id: int)-> int | None:
+    ''' Counter bumped by every write to the course or its sections, None if no such course exists'''
+    data = read_query('SELECT version FROM courses WHERE id = ?', (course_id,))
+    return data[0][0] if data else None
+
 def get_course_by_id(course_id: int)-> Course | None:
     ''' Get the course by id or return None if no such course exists'''
+    return identity_map.get_or_load('course', course_id, lambda: _load_shared_course(course_id))
+
+def _load_shared_course(course_id: int)-> Course | None:
+    # concurrent requests for the same course share one load; each gets its own copy, as routes may change it
+    course = course_loads.do(course_id, lambda: _load_course(course_id))
+    return course.copy(deep=True) if course is not None else None
+
+def course_load_stats() -> dict:
+    return course_loads.stats()
+
+def _load_course(course_id: int)-> Course | None:
     sql = '''
-            SELECT c.id, c.title, c.description, c.home_page_pic, c.course_rating, c.owner_id, c.is_active, c.is_premium
+            SELECT c.id, c.title, c.description, c.home_page_pic_hash, c.course_rating, c.owner_id, c.is_active, c.is_premium
             FROM courses AS c
             WHERE c.id = ?'''
     sql_params = (course_id,)
@@ -277,11 +349,9 @@ def get_course_by_id(course_id: int)-> Course | None:
         obj_data = read_query(sql_obj_list, sql_obj_params)
         obj_data = [objective[0] for objective in obj_data]  # Flatten the list of objectives
 
-        course = Course.from_query_result(id=data[0][0], title=data[0][1], description=data[0][2], home_page_pic = data[0][3], course_rating=data[0][4],
+        course = Course.from_query_result(id=data[0][0], title=data[0][1], description=data[0][2], home_page_pic_hash = data[0][3], course_rating=data[0][4],
                                                     owner_id=data[0][5], is_active=data[0][6], is_premium=data[0][7],
                                                     tags=tags_data, objectives=obj_data)
-        if course.home_page_pic is not None:
-                course.home_page_pic = base64.b64encode(course.home_page_pic).decode('utf-8')
 
     return course
 
@@ -314,90 +384,84 @@ def get_objectives(ids: list[int]) -> list[Objective]:
 
     return [Objective.from_query_result(*row) for row in data]
 
-def tag_exists(tag):
-    sql = "SELECT id FROM tags WHERE expertise_area = ?"
-    sql_params = (tag,)
-
-    result = read_query(sql, sql_params)
-
-    if result:
-        return result[0]
-    else:
-        return None
-
-def create_new_tag(tag: str):
-    sql = "INSERT INTO tags (expertise_area) VALUES (?)"
-    sql_params = (tag,)
-
-    return insert_query(sql, sql_params) # Return the newly created tag_id
-
-def create_course_tag(course_id: int, tag_id: int):
-    sql = '''INSERT INTO courses_have_tags(courses_id, tags_id) VALUES (?, ?)'''
-    sql_params = (course_id, tag_id)
-
-    return insert_query(sql, sql_params)   
-
-def insert_tags_in_course(course_id: int, tags: list[str]):
-    
-    for tag in tags:
-        if tag_exists(tag):
-            tag_id = tag_exists(tag)[0]
-            create_course_tag(course_id, tag_id)
+def _resolve_name_ids(cursor, table: str, column: str, cache: TTLCache, names: list[str]) -> dict[str, int]:
+    ''' Ids of the rows of table named names, keyed by casefolded name, as the column collation compares them.
+        Names missing from the cache are created if needed with one multi-row INSERT IGNORE and read back at once.'''
+    ids = {}
+    missing = {}
+    for name in names:
+        key = name.casefold()
+        if key in ids or key in missing:
+            continue
+        cached = cache.get(key)
+        if cached is None:
+            missing[key] = name
         else:
-            newly_create_tag_id = create_new_tag(tag)
-            create_course_tag(course_id, newly_create_tag_id)
-
-def objective_exists(objective):
-    sql = "SELECT id FROM objectives WHERE description = ?"
-    sql_params = (objective,)
-
-    result = read_query(sql, sql_params)
-
-    if result:
-        return result[0]  # Return the objecive_id if objective exists
-    else:
-        return None
-
-def create_new_objective(objective: str):
-    sql = "INSERT INTO objectives (description) VALUES (?)"
-    sql_params = (objective,)
-
-    return insert_query(sql, sql_params) # Return the newly created objective_id
-
-def create_course_objective(course_id: int, objective_id: int):
-    sql = "INSERT INTO courses_have_objectives (courses_id, objectives_id) VALUES (?, ?)"
-    sql_params = (course_id, objective_id)
-
-    return insert_query(sql, sql_params)   
-
-def insert_objectives_in_course(course_id: int, objectives: list[str]):
-
-    for obj in objectives:
-
-        if objective_exists(obj):
-            obj_id = objective_exists(obj)[0]
-            create_course_objective(course_id, obj_id)
-        else:
-            newly_create_obj_id = create_new_objective(obj)
-            create_course_objective(course_id, newly_create_obj_id)
+            ids[key] = cached
+
+    if missing:
+        values = ', '.join('(?)' for _ in missing)
+        cursor.execute(f'INSERT IGNORE INTO {table} ({column}) VALUES {values}', tuple(missing.values()))
+        placeholders = ', '.join('?' for _ in missing)
+        cursor.execute(f'SELECT id, {column} FROM {table} WHERE {column} IN ({placeholders})', tuple(missing.values()))
+        found = {name.casefold(): id for id, name in cursor.fetchall()}
+        for key, name in missing.items():
+            if key not in found:
+                # the collation matched it to a name that differs in more than case, e.g. trailing spaces
+                cursor.execute(f'SELECT id FROM {table} WHERE {column} = ?', (name,))
+                found[key] = cursor.fetchone()[0]
+            ids[key] = found[key]
+
+    return ids
+
+def insert_tags_in_course(cursor, course_id: int, tags: list[str]) -> dict[str, int]:
+    ''' Link the tags to the course inside the caller's transaction, creating the new ones.
+        Returns the tag ids, to be cached by the caller once the transaction is committed.'''
+    tag_ids = _resolve_name_ids(cursor, 'tags', 'expertise_area', tag_id_cache, tags)
+    if tag_ids:
+        cursor.executemany('INSERT INTO courses_have_tags(courses_id, tags_id) VALUES (?, ?)',
+                           [(course_id, tag_id) for tag_id in set(tag_ids.values())])
+    return tag_ids
+
+def insert_objectives_in_course(cursor, course_id: int, objectives: list[str]) -> dict[str, int]:
+    ''' Link the objectives to the course inside the caller's transaction, creating the new ones.
+        Returns the objective ids, to be cached by the caller once the transaction is committed.'''
+    objective_ids = _resolve_name_ids(cursor, 'objectives', 'description', objective_id_cache, objectives)
+    if objective_ids:
+        cursor.executemany('INSERT INTO courses_have_objectives(courses_id, objectives_id) VALUES (?, ?)',
+                           [(course_id, objective_id) for objective_id in set(objective_ids.values())])
+    return objective_ids
+
+def _cache_name_ids(cache: TTLCache, ids: dict[str, int]):
+    for key, id in ids.items():
+        cache.set(key, id)
 
 def create_course(course: Course):
-    sql = '''INSERT into courses(title, description, home_page_pic, owner_id, is_active, is_premium)
+    if course.home_page_pic:
+        course.home_page_pic_hash = save_image(course.home_page_pic)
+        course.home_page_pic = None
+        create_variants(course.home_page_pic_hash)
+
+    sql = '''INSERT into courses(title, description, home_page_pic_hash, owner_id, is_active, is_premium)
             VALUES (?, ?, ?, ?, ?, ?)'''
     sql_params = (course.title, 
                   course.description, 
-                  course.home_page_pic, 
+                  course.home_page_pic_hash, 
                   course.owner_id,
                   1 if course.is_active == 'active' else 0, 
                   1 if course.is_premium == 'premium' else 0
                  )
-    generated_id = insert_query(sql, sql_params)
-
-    course.id = generated_id
-
-
-    insert_tags_in_course(course.id, course.tags)
-    insert_objectives_in_course(course.id, course.objectives)
+    # the course and its tags and objectives are created together or not at all
+    with transaction() as cursor:
+        cursor.execute(sql, sql_params)
+        course.id = cursor.lastrowid
+        tag_ids = insert_tags_in_course(cursor, course.id, course.tags or [])
+        objective_ids = insert_objectives_in_course(cursor, course.id, course.objectives or [])
+
+    _cache_name_ids(tag_id_cache, tag_ids)
+    _cache_name_ids(objective_id_cache, objective_ids)
+    course.home_page_pic_url = course_pic_url(course.id, course.home_page_pic_hash)
+    _course_changed(course.id)
 
     return course
 
@@ -407,7 +471,8 @@ def update_course(course_update: CourseUpdate, course: Course):
             SET title = ?, 
                 description = ?,  
                 is_active = ?, 
-                is_premium = ?
+                is_premium = ?,
+                version = version + 1
             WHERE id = ?
             ''')
     sql_params = (course_update.title, 
@@ -417,6 +482,7 @@ def update_course(course_update: CourseUpdate, course: Course):
                   course.id
                   )
     result = update_query(sql, sql_params)
+    _course_changed(course.id)
 
     if result > 0:
         course.title = course_update.title
@@ -426,20 +492,49 @@ def update_course(course_update: CourseUpdate, course: Course):
 
     return course
 
-def upload_pic(course_id: int, pic: UploadFile):
+def upload_pic(course_id: int, pic: BinaryIO):
+    ''' Stream the picture into the image store and point the course to it'''
 
     if pic is None or course_id is None:
         return None
 
-    sql = "UPDATE courses SET home_page_pic = ? WHERE id = ?"
-    sql_p = (pic, course_id)
-    return update_query(sql, sql_p)
+    pic_hash = save_image_stream(pic)
+    create_variants(pic_hash)
+    sql = "UPDATE courses SET home_page_pic_hash = ?, home_page_pic = NULL, version = version + 1 WHERE id = ?"
+    sql_p = (pic_hash, course_id)
+    result = update_query(sql, sql_p)
+    _course_changed(course_id)
+
+    return result
+
+def get_course_pic_hash(course_id: int) -> str | None:
+    ''' Content hash of the course picture or None if the course has no picture'''
+    data = read_query('SELECT home_page_pic_hash FROM courses WHERE id = ?', (course_id,))
+    if not data:
+        return None
+    return data[0][0]
 
 def course_exists(id: int):
-    return any(
-        read_query(
-            'SELECT * FROM courses WHERE id = ?',
-            (id,)))
+    return _course_flags(id) is not None
+
+def _course_flags(course_id: int)-> tuple[bool, bool] | None:
+    ''' (is active, is premium) of a course, or None if no such course exists.
+        Uses the course if this request already loaded it.'''
+    course = identity_map.peek('course', course_id)
+    if course is not identity_map.MISSING:
+        return None if course is None else (course.is_active == CourseStatus.ACTIVE, course.is_premium == CourseType.PREMIUM)
+
+    def load():
+        data = read_query('SELECT is_active, is_premium FROM courses WHERE id = ?', (course_id,))
+        return (bool(data[0][0]), bool(data[0][1])) if data else None
+
+    return identity_map.get_or_load('course_flags', course_id, load)
+
+def _course_changed(course_id: int):
+    ''' Forget every copy of the course kept in memory after a write to it'''
+    catalog.invalidate(course_id)
+    identity_map.forget('course', course_id)
+    identity_map.forget('course_flags', course_id)
 
 def get_section_by_id(section_id: int):
     data = read_query(
@@ -447,21 +542,34 @@ def get_section_by_id(section_id: int):
             FROM sections 
             WHERE id = ?''', (section_id,))
     
-    return next((Section.from_query_result(*row) for row in data), None)
+    return next((_section_from_row(*row) for row in data), None)
+
+def _section_from_row(id, title, content, description, external_link, courses_id) -> Section:
+    return Section.from_query_result(id, title, decode_content(content), description, external_link, courses_id)
 
 def get_course_sections(course_id: int):
     data = read_query(
-        '''SELECT id, title, content, description, external_link, courses_id
+        '''SELECT id, title, description, content_length, content_hash
             FROM sections 
-            WHERE courses_id = ?''', (course_id,))
+            WHERE courses_id = ?
+            ORDER BY id''', (course_id,))
+
+    return (SectionSummary.from_query_result(*row) for row in data)
 
-    return (Section.from_query_result(*row) for row in data)
+def content_fingerprint(content: str | None) -> tuple[int, str | None]:
+    ''' Length in characters and SHA-256 of a section content, as stored next to it'''
+    if content is None:
+        return 0, None
+    return len(content), hashlib.sha256(content.encode('utf-8')).hexdigest()
 
 def create_section(course_id: int, section: Section):
-    sql = '''INSERT into sections(title, content, description, external_link, courses_id)
-            VALUES (?, ?, ?, ?, ?)'''
-    sql_params = section.title, section.content, section.description, section.external_link, course_id
-    generated_id = insert_query(sql, sql_params)
+    sql = '''INSERT into sections(title, content, content_length, content_hash, description, external_link, courses_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?)'''
+    sql_params = section.title, encode_content(section.content), *content_fingerprint(section.content), section.description, section.external_link, course_id
+    with transaction() as cursor:
+        cursor.execute(sql, sql_params)
+        generated_id = cursor.lastrowid
+        _refresh_sections_count(cursor, course_id)
 
     section.id = generated_id
 
@@ -476,50 +584,64 @@ def update_section(old: Section, new: Section):
         external_link=new.external_link or old.external_link,
         courses_id=new.courses_id or old.courses_id)
 
-    update_query(
-        '''UPDATE sections 
-           SET title = ?, content = ?, description = ?, external_link = ?, courses_id = ?
-           WHERE id = ? 
-        ''',
-        (merged.title, merged.content, merged.description, merged.external_link, merged.courses_id, merged.id))
+    with transaction() as cursor:
+        cursor.execute(
+            '''UPDATE sections 
+               SET title = ?, content = ?, content_length = ?, content_hash = ?, description = ?, external_link = ?, courses_id = ?
+               WHERE id = ? 
+            ''',
+            (merged.title, encode_content(merged.content), *content_fingerprint(merged.content), merged.description, merged.external_link, merged.courses_id, merged.id))
+        if merged.courses_id != old.courses_id:
+            _refresh_sections_count(cursor, old.courses_id)
+        _refresh_sections_count(cursor, merged.courses_id)
 
     return merged
 
+def _refresh_sections_count(cursor, course_id: int):
+    ''' Recount the sections of a course after one was added, changed or moved'''
+    cursor.execute('''UPDATE courses
+                      SET sections_count = (SELECT count(id) FROM sections WHERE courses_id = ?),
+                          version = version + 1
+                      WHERE id = ?''',
+                   (course_id, course_id))
+
 def view_admin_courses( title: str = None,
                            tag: str  = None,
                            teacher: str = None,
-                           student: str  = None)-> list[ViewAdminCourse]:
+                           student: str  = None,
+                           limit: int = None,
+                           after_id: int = None)-> list[ViewAdminCourse]:
     '''View all public and premium courses available for admin and search them by title and tag, teacher email and student email'''
-    
-    sql='''SELECT c.id, c.title, c.description, c.course_rating, c.home_page_pic, c.is_active, c.is_premium, t.expertise_area, o.description as objectiv, uc.number_students
-           FROM courses AS c
-           JOIN courses_have_tags AS ct ON c.id = ct.courses_id
-           JOIN tags AS t ON t.id = ct.tags_id
-		   JOIN courses_have_objectives as co ON c.id=co.courses_id
-		   JOIN objectives as o ON o.id=co.objectives_id
-           JOIN (SELECT courses_id, count(courses_id) as number_students FROM users_have_courses GROUP BY courses_id) as uc ON c.id=uc.courses_id'''
-    
-    where_clauses=[]
+
+    # one row per course: the student count is kept on the course, tags and objectives are fetched per page
+    sql = '''SELECT c.id, c.title, c.description, c.course_rating, c.home_page_pic_hash, c.is_active, c.is_premium, c.students_count
+             FROM courses AS c
+             WHERE 1 = 1'''
+    # title and emails are matched by prefix (or by word through the fulltext index), so the lookups use an index
+    where_clauses, filter_params = _catalog_filters(tag=tag)
     if title:
-        where_clauses.append(f"c.title like '%{title}%'")
-    if tag:
-        where_clauses.append(f"t.expertise_area like '%{tag}%'")
+        title_clause, title_params = text_filter('c.title', title)
+        where_clauses.append(title_clause)
+        filter_params.extend(title_params)
     if teacher:
-        sql+=' JOIN users as u ON c.owner_id=u.id'
-        where_clauses.append(f"u.email like '%{teacher}%'")
+        email_clause, email_params = text_filter('u.email', teacher)
+        where_clauses.append(f'''c.owner_id IN (SELECT u.id FROM users AS u
+                                                WHERE {email_clause})''')
+        filter_params.extend(email_params)
     if student:
-        sql+=''' JOIN users_have_courses as us ON us.courses_id=c.id
-                 JOIN users as u1 ON us.users_id=u1.id'''
-        where_clauses.append(f"u1.email like '%{student}%'")
-    if where_clauses:
-        sql+= ' WHERE ' + ' AND '.join(where_clauses)
+        email_clause, email_params = text_filter('u.email', student)
+        where_clauses.append(f'''c.id IN (SELECT us.courses_id FROM users_have_courses AS us
+                                          JOIN users AS u ON us.users_id = u.id
+                                          WHERE {email_clause})''')
+        filter_params.extend(email_params)
+    sql, sql_params = _paginated(sql, (), where_clauses, filter_params, limit, after_id)
+
+    course_data = read_query(sql, sql_params)
+    tags, objectives = get_tags_and_objectives([c[0] for c in course_data])
 
-    data=read_query(sql)
     courses = []
-    for obj in data:
-        course = ViewAdminCourse.from_query_result(*obj)
-        if course.home_page_pic is not None:
-            course.home_page_pic = base64.b64encode(course.home_page_pic).decode('utf-8')
+    for c in course_data:
+        course = ViewAdminCourse.from_query_result(*c, tags=tags[c[0]], objectives=objectives[c[0]])
         courses.append(course)
 
     return courses
@@ -552,20 +674,16 @@ def has_course_section(course_id: int, section_id: int)->bool:
 
 def view_section(course_id: int, section_id: int, user_id: int)->Section | None:
     '''View section by user AND increase the progress of student if for first time'''
-    sql='''SELECT * FROM sections WHERE id=?'''
-    data=read_query(sql, (section_id,))
+    section=get_section_by_id(section_id)
     if is_section_viewed(section_id, user_id):
-        return Section.from_query_result(*data[0])
+        return section
     #increase the progess of student
     if validate_section(course_id, user_id, section_id):
-        return Section.from_query_result(*data[0])
+        return section
     
-def view_all_sections_for_a_course(course_id: int):
-    sql = '''SELECT * FROM sections WHERE courses_id=?'''
-    sql_params = (course_id,)
-    data=read_query(sql, sql_params)
-
-    return [Section.from_query_result(*obj) for obj in data]
+def view_all_sections_for_a_course(course_id: int)-> list[SectionSummary]:
+    ''' Table of contents of a course. The content of a section is only sent by view_section'''
+    return list(get_course_sections(course_id))
 
 def is_section_viewed(section_id: int, user_id: int)-> bool:
     '''Verify if student viewed the section'''
@@ -576,58 +694,80 @@ def is_section_viewed(section_id: int, user_id: int)-> bool:
 def validate_section(course_id: int, user_id:int, section_id: int)-> bool:
     ''' Increase student progress'''
 
-    total_number_sections=number_sections_per_course(course_id)
-
-    sql='''INSERT INTO users_has_sections (users_id, sections_id) VALUES (?, ?)'''
-    if update_query(sql, (user_id, section_id)):
-        viewed_sections=number_views_per_student(course_id, user_id)
-        progress=round((viewed_sections/total_number_sections)*100, 0)
-        # update course progress
-        if update_query('''UPDATE users_have_courses 
-                           SET progress = ? 
-                           WHERE (`users_id` = ?) and (`courses_id` = ?)''', 
-                        (progress, user_id, course_id)):
-            return True
-    return False
-
-def number_sections_per_course(course_id: int)-> int:
-    ''' Calculates the number of sections in the course'''
-
-    sql='''SELECT count(id) FROM sections WHERE courses_id=?'''
-    data=read_query(sql, (course_id,))
-    return data[0][0]
-
-def number_views_per_student(course_id: int, user_id: int)-> int:
-    ''' Calculates the number sections view per course by student'''
-
-    sql='''SELECT count(users_id) 
-           FROM users_has_sections 
-           WHERE users_id=? AND sections_id in (SELECT id FROM sections WHERE courses_id=?)'''
-    data=read_query(sql, (user_id, course_id))
-    return data[0][0]
-
-def _course_rating_change_transaction(course_id: int)-> bool:
-    ''' Calculate and change new course rating'''
-    # calculates average course rating
-    sql='SELECT rating FROM users_have_courses WHERE courses_id=?'
-
-    data=read_query(sql,(course_id,))
-    ratings=[]
-    if data:
-        for i in data:
-            ratings.append(i[0])
-        course_rating=round(sum(ratings)/len(ratings),1)
-
-    # update course_rating in DB
-        sql='''UPDATE courses 
-            SET course_rating = ? WHERE (id = ?);'''
-                
-        result=update_query(sql,(course_rating, course_id))
-        if result:
-            return True
-        else:
-            return False # transaction not successful
-    return False
+    with transaction() as cursor:
+        cursor.execute('''INSERT IGNORE INTO users_has_sections (users_id, sections_id) VALUES (?, ?)''',
+                       (user_id, section_id))
+        if cursor.rowcount <= 0:
+            return True # already viewed
+
+        # progress is assigned first, so it reads viewed_sections before the increment
+        cursor.execute('''UPDATE users_have_courses 
+                          SET progress = LEAST(ROUND((viewed_sections + 1) * 100 /
+                                   GREATEST((SELECT sections_count FROM courses WHERE id = ?), 1)), 100),
+                              viewed_sections = viewed_sections + 1
+                          WHERE users_id = ? AND courses_id = ?''',
+                       (course_id, user_id, course_id))
+        return cursor.rowcount > 0
+
+def recompute_course_progress(course_id: int, batch_size: int = PROGRESS_BATCH_SIZE):
+    ''' Recalculate viewed sections and progress of every student in the course after its sections changed.
+
+    Students are updated in batches of consecutive ids, so no single statement locks the whole course.
+    '''
+    after_id = 0
+    while True:
+        batch = read_query('''SELECT users_id FROM users_have_courses
+                              WHERE courses_id = ? AND users_id > ?
+                              ORDER BY users_id LIMIT ?''',
+                           (course_id, after_id, batch_size))
+        if not batch:
+            return
+        last_id = batch[-1][0]
+
+        update_query('''UPDATE users_have_courses AS uc
+                          JOIN courses AS c ON c.id = uc.courses_id
+                          LEFT JOIN (SELECT us.users_id, count(*) AS viewed
+                                     FROM users_has_sections AS us
+                                     JOIN sections AS s ON s.id = us.sections_id
+                                     WHERE s.courses_id = ? AND us.users_id > ? AND us.users_id <= ?
+                                     GROUP BY us.users_id) AS v ON v.users_id = uc.users_id
+                          SET uc.viewed_sections = COALESCE(v.viewed, 0),
+                              uc.progress = LEAST(ROUND(COALESCE(v.viewed, 0) * 100 / GREATEST(c.sections_count, 1)), 100)
+                          WHERE uc.courses_id = ? AND uc.users_id > ? AND uc.users_id <= ?''',
+                     (course_id, after_id, last_id, course_id, after_id, last_id))
+
+        if len(batch) < batch_size:
+            return
+        after_id = last_id
+
+def mark_sections_viewed(course_id: int, user_id: int, section_ids: list[int])-> int | None:
+    ''' Record many viewed sections of a course at once and return the student's new progress.
+
+    Ids of sections that are not part of the course are ignored, as are sections viewed before.
+    '''
+    section_ids = list(dict.fromkeys(section_ids))
+    with transaction() as cursor:
+        if section_ids:
+            placeholders = ', '.join('?' * len(section_ids))
+            cursor.execute(f'''INSERT IGNORE INTO users_has_sections (users_id, sections_id)
+                               SELECT ?, id FROM sections WHERE courses_id = ? AND id IN ({placeholders})''',
+                           (user_id, course_id, *section_ids))
+            newly_viewed = max(cursor.rowcount, 0)
+            if newly_viewed:
+                cursor.execute('''UPDATE users_have_courses 
+                                  SET progress = LEAST(ROUND((viewed_sections + ?) * 100 /
+                                           GREATEST((SELECT sections_count FROM courses WHERE id = ?), 1)), 100),
+                                      viewed_sections = viewed_sections + ?
+                                  WHERE users_id = ? AND courses_id = ?''',
+                               (newly_viewed, course_id, newly_viewed, user_id, course_id))
+
+        cursor.execute('''SELECT progress FROM users_have_courses WHERE users_id = ? AND courses_id = ?''',
+                       (user_id, course_id))
+        row = cursor.fetchone()
+
+    if row is None:
+        return None
+    return row[0] or 0
 
 def number_premium_courses_par_student(user_id: int)-> int:
     '''Get number of premium courses a student is enrolled in'''
@@ -641,8 +781,8 @@ def number_premium_courses_par_student(user_id: int)-> int:
 def is_course_premium(course_id: int)-> bool:
     '''Verify if course is premium'''
 
-    sql='''SELECT 1 FROM courses WHERE is_premium=1 AND id=?'''
-    return any(read_query(sql, (course_id,)))
+    flags = _course_flags(course_id)
+    return flags is not None and flags[1]
 
 def rating_history(course_id: int)-> list[UserRating] | None:
     '''Students ratings for a course or None if no enrolled'''
@@ -656,16 +796,15 @@ def rating_history(course_id: int)-> list[UserRating] | None:
 
 def is_course_active(course_id: int)-> bool:
     '''Verify if the course is active'''
-    sql='''SELECT is_active FROM courses WHERE id=?'''
-    data=read_query(sql, (course_id,))
-    if data[0][0]: return True
-    return False
+    flags = _course_flags(course_id)
+    return flags is not None and flags[0]
 
 def admin_removes_course(course_id: int)-> bool:
     '''Admin hide a course. Return True if status to non active change si non False'''
     # course status: active -1, hidden -0
-    sql='''UPDATE courses SET is_active = 0 WHERE (id = ?)'''
+    sql='''UPDATE courses SET is_active = 0, version = version + 1 WHERE (id = ?)'''
     if update_query(sql, (course_id,)):
+        _course_changed(course_id)
         if students_notification_by_email(course_id):
             return True
     return False
@@ -676,38 +815,20 @@ def students_notification_by_email(course_id: int)-> bool:
            JOIN users as u on uc.users_id=u.id 
            JOIN courses as c ON uc.courses_id=c.id WHERE uc.courses_id=?'''
     data=read_query(sql, (course_id,))
-    for obj in data:
-        try:
-            send_email_to_student_for_hidden_course(obj[0],obj[1],obj[2],obj[3])
-        except:
-            return False
-        return True
-
-def send_email_to_student_for_hidden_course(student_email: int, student_first_name: str, student_last_name: str, course_title: str)-> bool:
-    '''Send email to student that the course is not more available'''
-    smtp_host = "smtp.office365.com"
-    smtp_port = 587
-    smtp_username = "poodle.learning@outlook.com"
-    smtp_password = "1234@alpha"  # Use your Outlook.com account password
-
-    message = MIMEMultipart()
-    message["From"] = "poodle.learning@outlook.com"
-    message["To"] = student_email
-    message["Subject"] = "Hidden course notification"
+    emails=[(obj[0], "Hidden course notification", hidden_course_email_body(obj[1], obj[2], obj[3])) for obj in data]
+    try:
+        enqueue_emails(emails)
+    except:
+        return False
+    return True
 
+def hidden_course_email_body(student_first_name: str, student_last_name: str, course_title: str)-> str:
+    '''Email telling a student that the course is not more available'''
     body = f"Dear {student_first_name} {student_last_name},\n\n"
     body += f"We would like to inform you that class '{course_title}' has been removed.\n"
     body += f"You cannot see this course anymore.\n\n"
     body += "Thank you for your understanding!\n"
-
-    message.attach(MIMEText(body, "plain"))
-
-    with smtplib.SMTP(smtp_host, smtp_port) as server:
-        server.starttls()
-        server.login(smtp_username, smtp_password)
-        server.sendmail(message["From"], message["To"], message.as_string())
-
-        return True
+    return body
 
 
 def create_response_object(course: Course, tags: list[Tag], objectives: list[Objective], sections: list[Section]):
@@ -728,43 +849,12 @@ def create_response_object(course: Course, tags: list[Tag], objectives: list[Obj
 
 def view_student_pending_approval_by_teacher_courses(student_id: int):
 
-    sql='''SELECT c.id, c.title, c.description, c.course_rating, c.home_page_pic
+    sql='''SELECT c.id, c.title, c.description, c.course_rating, c.home_page_pic_hash
            FROM courses AS c
            JOIN users_have_courses AS uc ON c.id = uc.courses_id
            WHERE c.is_active = 1 AND uc.status = 0 AND uc.users_id = ?'''
     
 
     courses_data=read_query(sql, (student_id,))
-    courses = []
-    for c in courses_data:
-        course_id = c[0]
-
-        sql_tags_list = '''
-            SELECT t.expertise_area
-            FROM courses_have_tags AS ct
-            JOIN tags AS t ON t.id = ct.tags_id
-            WHERE ct.courses_id = ?
-        '''
-            
-        sql_tags_params = (course_id,)
-        tags_data = read_query(sql_tags_list, sql_tags_params)
-        tags_data = [tag[0] for tag in tags_data]  # Flatten the list of tags
 
-        sql_obj_list = '''
-            SELECT o.description
-            FROM courses_have_objectives AS co
-            JOIN objectives AS o ON o.id = co.objectives_id
-            WHERE co.courses_id = ?
-        '''
-            
-        sql_obj_params = (course_id,)
-        obj_data = read_query(sql_obj_list, sql_obj_params)
-        obj_data = [objective[0] for objective in obj_data]  # Flatten the list of objectives
-
-        course = ViewStudentCourse.from_query_result(id=c[0], title=c[1], description=c[2], course_rating=c[3],
-                                                     home_page_pic=c[4], tags=tags_data, objectives=obj_data)
-        if course.home_page_pic is not None:
-            course.home_page_pic = base64.b64encode(course.home_page_pic).decode('utf-8')
-        courses.append(course)
-    
-    return courses
\ No newline at end of file
+    return _to_student_courses(courses_data)
\ No newline at end of file
@@ -0,0 +1,160 @@
+import smtplib
+import threading
+import uuid
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from data.database import read_query, insert_query, update_query
+
+SMTP_HOST = "smtp.office365.com"
+SMTP_PORT = 587
+SMTP_USE_TLS = True
+SMTP_USERNAME = "poodle.learning@outlook.com"
+SMTP_PASSWORD = "1234@alpha"  # Use your Outlook.com account password
+SENDER = "poodle.learning@outlook.com"
+
+OUTBOX_BATCH_SIZE = 50          # emails sent over one SMTP session
+OUTBOX_POLL_SECONDS = 5         # how often the worker looks for new emails when the outbox is empty
+OUTBOX_CLAIM_SECONDS = 300      # a claimed batch is retried by anyone after this, e.g. if its worker died
+OUTBOX_MAX_ATTEMPTS = 8         # emails failing this often are left in the outbox and no longer retried
+OUTBOX_BACKOFF_SECONDS = 30     # delay after the first failure, doubled after each further one
+OUTBOX_MAX_BACKOFF_SECONDS = 3600
+
+
+def enqueue_email(recipient: str, subject: str, body: str) -> int:
+    '''Add one email to the outbox. It is sent by the background worker.'''
+    sql = '''INSERT INTO email_outbox (recipient, subject, body) VALUES (?, ?, ?)'''
+    return insert_query(sql, (recipient, subject, body))
+
+
+def enqueue_emails(emails: list[tuple[str, str, str]]):
+    '''Add many (recipient, subject, body) emails to the outbox with one statement'''
+    if not emails:
+        return
+    values = ', '.join('(?, ?, ?)' for _ in emails)
+    sql = f'''INSERT INTO email_outbox (recipient, subject, body) VALUES {values}'''
+    insert_query(sql, tuple(value for email in emails for value in email))
+
+
+def backoff_seconds(attempts: int) -> int:
+    '''Delay before the next try of an email that has failed attempts times'''
+    return min(OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1), OUTBOX_MAX_BACKOFF_SECONDS)
+
+
+def claim_batch(limit: int = OUTBOX_BATCH_SIZE) -> list[tuple]:
+    '''Reserve the oldest due emails for this worker and return them as (id, recipient, subject, body, attempts)'''
+    # one UPDATE both picks and locks the rows, so several workers never send the same email
+    claim_token = uuid.uuid4().hex
+    sql = '''UPDATE email_outbox
+             SET claim_token = ?, next_attempt_at = NOW() + INTERVAL ? SECOND
+             WHERE sent_at IS NULL AND attempts < ? AND next_attempt_at <= NOW()
+             ORDER BY id LIMIT ?'''
+    if not update_query(sql, (claim_token, OUTBOX_CLAIM_SECONDS, OUTBOX_MAX_ATTEMPTS, limit)):
+        return []
+
+    sql = '''SELECT id, recipient, subject, body, attempts FROM email_outbox WHERE claim_token = ? ORDER BY id'''
+    return read_query(sql, (claim_token,))
+
+
+def mark_sent(email_ids: list[int]):
+    if not email_ids:
+        return
+    placeholders = ', '.join('?' for _ in email_ids)
+    sql = f'''UPDATE email_outbox SET sent_at = NOW(), claim_token = NULL WHERE id IN ({placeholders})'''
+    update_query(sql, tuple(email_ids))
+
+
+def mark_failed(email_id: int, attempts: int, error: str):
+    '''Record a failed try and schedule the next one'''
+    attempts += 1
+    sql = '''UPDATE email_outbox
+             SET attempts = ?, last_error = ?, claim_token = NULL, next_attempt_at = NOW() + INTERVAL ? SECOND
+             WHERE id = ?'''
+    update_query(sql, (attempts, error[:500], backoff_seconds(attempts), email_id))
+
+
+def _build_message(recipient: str, subject: str, body: str) -> MIMEMultipart:
+    message = MIMEMultipart()
+    message["From"] = SENDER
+    message["To"] = recipient
+    message["Subject"] = subject
+    message.attach(MIMEText(body, "plain"))
+    return message
+
+
+def deliver_batch(emails: list[tuple]) -> tuple[list[int], dict[int, str]]:
+    '''Send the claimed emails over a single SMTP session.
+
+    Returns the ids that were sent and the error of every id that was not.
+    '''
+    sent, failed = [], {}
+    try:
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
+            if SMTP_USE_TLS:
+                server.starttls()
+            if SMTP_USERNAME:
+                server.login(SMTP_USERNAME, SMTP_PASSWORD)
+
+            for email_id, recipient, subject, body, _ in emails:
+                message = _build_message(recipient, subject, body)
+                try:
+                    server.sendmail(message["From"], message["To"], message.as_string())
+                    sent.append(email_id)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError, smtplib.SMTPSenderRefused) as error:
+                    failed[email_id] = str(error)
+    except (smtplib.SMTPException, OSError) as error:
+        # the session broke: everything not sent yet is retried later
+        for email_id, *_ in emails:
+            if email_id not in sent and email_id not in failed:
+                failed[email_id] = str(error) or error.__class__.__name__
+
+    return sent, failed
+
+
+def process_batch() -> int:
+    '''Claim, send and record one batch. Returns the number of emails claimed.'''
+    emails = claim_batch()
+    if not emails:
+        return 0
+
+    sent, failed = deliver_batch(emails)
+    mark_sent(sent)
+    attempts = {email_id: email_attempts for email_id, *_, email_attempts in emails}
+    for email_id, error in failed.items():
+        mark_failed(email_id, attempts[email_id], error)
+
+    return len(emails)
+
+
+class OutboxWorker:
+    ''' Background thread that drains the email outbox'''
+
+    def __init__(self, poll_seconds: float = OUTBOX_POLL_SECONDS):
+        self._poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='email-outbox', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                claimed = process_batch()
+            except Exception:
+                # the database is unavailable; try again at the next poll
+                claimed = 0
+            if claimed < OUTBOX_BATCH_SIZE:
+                self._stop.wait(self._poll_seconds)
+
+
+outbox_worker = OutboxWorker()
@@ -0,0 +1,79 @@
+import re
+from collections import defaultdict
+
+# weight of a query term found in each field of a course
+TITLE_WEIGHT = 3.0
+TAG_WEIGHT = 2.0
+TEXT_WEIGHT = 1.0          # description and objectives
+RATING_WEIGHT = 0.1        # a course rated 10 gains as much as one more description match
+
+_WORD = re.compile(r'\w+')
+
+
+def terms(text: str | None) -> list[str]:
+    ''' Words of text as they are indexed and searched for'''
+    if not text:
+        return []
+    return _WORD.findall(text.casefold())
+
+
+class SearchIndex:
+    ''' In-memory inverted index of course titles, descriptions, tags and objectives.
+
+    Courses are added and removed one by one, so a write only re-indexes the course it touched.
+    Not thread-safe: the owner serializes access.
+    '''
+
+    def __init__(self):
+        self._postings: dict[str, dict[int, float]] = defaultdict(dict)  # term -> course id -> weight
+        self._course_terms: dict[int, set[str]] = {}
+        self._ratings: dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._course_terms)
+
+    def add(self, course_id: int, title: str, description: str | None, tags: list[str] | None,
+            objectives: list[str] | None, rating: float | None):
+        ''' Index a course, replacing what was indexed for it before'''
+        self.remove(course_id)
+
+        weights = defaultdict(float)
+        fields = [(TITLE_WEIGHT, title), (TEXT_WEIGHT, description)]
+        fields += [(TAG_WEIGHT, tag) for tag in tags or ()]
+        fields += [(TEXT_WEIGHT, objective) for objective in objectives or ()]
+        for weight, text in fields:
+            for term in terms(text):
+                weights[term] += weight
+
+        for term, weight in weights.items():
+            self._postings[term][course_id] = weight
+        self._course_terms[course_id] = set(weights)
+        self._ratings[course_id] = rating or 0.0
+
+    def remove(self, course_id: int):
+        for term in self._course_terms.pop(course_id, ()):
+            postings = self._postings[term]
+            postings.pop(course_id, None)
+            if not postings:
+                del self._postings[term]
+        self._ratings.pop(course_id, None)
+
+    def search(self, query: str, course_ids: set[int] = None) -> list[int]:
+        ''' Ids of the courses matching any word of query, best first.
+
+        Courses matching more of the words come first, then the ones with the higher
+        term weights plus rating, then the lower id. course_ids restricts the candidates.
+        '''
+        query_terms = set(terms(query))
+        matched = defaultdict(int)
+        scores = defaultdict(float)
+        for term in query_terms:
+            for course_id, weight in self._postings.get(term, {}).items():
+                if course_ids is None or course_id in course_ids:
+                    matched[course_id] += 1
+                    scores[course_id] += weight
+
+        for course_id in scores:
+            scores[course_id] += RATING_WEIGHT * self._ratings[course_id]
+
+        return sorted(scores, key=lambda course_id: (-matched[course_id], -scores[course_id], course_id))
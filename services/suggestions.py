@@ -0,0 +1,176 @@
+SUGGEST_TOP_K = 10      # suggestions kept per prefix, and the most a request can ask for
+
+
+class _Node:
+    __slots__ = ('children', 'entry', 'top')
+
+    def __init__(self):
+        self.children: dict[str, _Node] = {}
+        self.entry: tuple[float, str] | None = None   # (score, text) of the key ending here
+        self.top: list[tuple[float, str]] = []        # best entries of this subtree, best first
+
+
+def _best(entries, top_k: int) -> list[tuple[float, str]]:
+    return sorted(entries, key=lambda entry: (-entry[0], entry[1]))[:top_k]
+
+
+class PrefixIndex:
+    ''' Trie of suggestion texts keyed by their casefolded text.
+
+    Every node keeps the top_k entries of its subtree by score, so a lookup only walks the prefix.
+    Not thread-safe: the owner serializes access.
+    '''
+
+    def __init__(self, top_k: int = SUGGEST_TOP_K):
+        self._top_k = top_k
+        self._root = _Node()
+
+    @classmethod
+    def build(cls, entries: dict[str, tuple[float, str]], top_k: int = SUGGEST_TOP_K) -> 'PrefixIndex':
+        ''' Index of key -> (score, text), filling the per-node tops in one pass instead of per insert'''
+        index = cls(top_k)
+        for key, entry in entries.items():
+            index._path(key, create=True)[-1].entry = entry
+        index._fill_tops(index._root)
+        return index
+
+    def set(self, key: str, text: str, score: float):
+        path = self._path(key, create=True)
+        path[-1].entry = (score, text)
+        self._refresh(path)
+
+    def remove(self, key: str):
+        path = self._path(key)
+        if path is None or path[-1].entry is None:
+            return
+        path[-1].entry = None
+        self._refresh(path)
+        # prune the nodes left without entries
+        for depth in range(len(key), 0, -1):
+            node = path[depth]
+            if node.entry is not None or node.children:
+                break
+            del path[depth - 1].children[key[depth - 1]]
+
+    def top(self, prefix: str, limit: int = SUGGEST_TOP_K) -> list[str]:
+        ''' Best texts whose key starts with prefix'''
+        path = self._path(prefix)
+        if path is None:
+            return []
+        return [text for _, text in path[-1].top[:limit]]
+
+    def _path(self, key: str, create: bool = False) -> list[_Node] | None:
+        node = self._root
+        path = [node]
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[char] = _Node()
+            node = child
+            path.append(node)
+        return path
+
+    def _node_top(self, node: _Node) -> list[tuple[float, str]]:
+        candidates = [entry for child in node.children.values() for entry in child.top]
+        if node.entry is not None:
+            candidates.append(node.entry)
+        return _best(candidates, self._top_k)
+
+    def _refresh(self, path: list[_Node]):
+        for node in reversed(path):
+            node.top = self._node_top(node)
+
+    def _fill_tops(self, root: _Node):
+        # children before parents, without recursing once per character of the longest key
+        stack, order = [root], []
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(node.children.values())
+        for node in reversed(order):
+            node.top = self._node_top(node)
+
+
+class CatalogSuggestions:
+    ''' Typeahead over the titles and tag names of the active catalog.
+
+    Keeps one PrefixIndex with every course for signed-in users and one without premium courses
+    for anonymous users. A text shared by several courses (a tag, or a tag equal to a title)
+    is scored by the best rated of them.
+    '''
+
+    def __init__(self, top_k: int = SUGGEST_TOP_K):
+        self._top_k = top_k
+        # key -> (kind, course id) -> (text, rating, is premium)
+        self._sources: dict[str, dict[tuple[str, int], tuple[str, float, bool]]] = {}
+        self._course_keys: dict[int, set[str]] = {}
+        self._public = PrefixIndex(top_k)
+        self._all = PrefixIndex(top_k)
+
+    @classmethod
+    def build(cls, courses: list[tuple[int, str, list[str], float | None, bool]],
+              top_k: int = SUGGEST_TOP_K) -> 'CatalogSuggestions':
+        ''' Suggestions for (id, title, tags, rating, is premium) of each course'''
+        suggestions = cls(top_k)
+        for course in courses:
+            suggestions._add_sources(*course)
+        public, everything = {}, {}
+        for key in suggestions._sources:
+            for entries, include_premium in ((public, False), (everything, True)):
+                best = suggestions._best_source(key, include_premium)
+                if best is not None:
+                    entries[key] = best
+        suggestions._public = PrefixIndex.build(public, top_k)
+        suggestions._all = PrefixIndex.build(everything, top_k)
+        return suggestions
+
+    def add_course(self, course_id: int, title: str, tags: list[str] | None, rating: float | None, is_premium: bool):
+        ''' Add a course, replacing what was indexed for it before'''
+        touched = self._remove_sources(course_id)
+        touched |= self._add_sources(course_id, title, tags, rating, is_premium)
+        self._update(touched)
+
+    def remove_course(self, course_id: int):
+        self._update(self._remove_sources(course_id))
+
+    def suggest(self, prefix: str, include_premium: bool, limit: int = SUGGEST_TOP_K) -> list[str]:
+        index = self._all if include_premium else self._public
+        return index.top(prefix.casefold(), limit)
+
+    def _add_sources(self, course_id, title, tags, rating, is_premium) -> set[str]:
+        texts = [('title', title)] + [('tag', tag) for tag in tags or ()]
+        keys = set()
+        for kind, text in texts:
+            key = text.casefold()
+            self._sources.setdefault(key, {})[(kind, course_id)] = (text, rating or 0.0, bool(is_premium))
+            keys.add(key)
+        self._course_keys[course_id] = keys
+        return set(keys)
+
+    def _remove_sources(self, course_id: int) -> set[str]:
+        keys = self._course_keys.pop(course_id, set())
+        for key in keys:
+            sources = self._sources[key]
+            for source in [source for source in sources if source[1] == course_id]:
+                del sources[source]
+            if not sources:
+                del self._sources[key]
+        return keys
+
+    def _best_source(self, key: str, include_premium: bool) -> tuple[float, str] | None:
+        visible = [(rating, text) for text, rating, is_premium in self._sources.get(key, {}).values()
+                   if include_premium or not is_premium]
+        if not visible:
+            return None
+        return max(visible, key=lambda source: (source[0], source[1]))
+
+    def _update(self, keys: set[str]):
+        for key in keys:
+            for index, include_premium in ((self._public, False), (self._all, True)):
+                best = self._best_source(key, include_premium)
+                if best is None:
+                    index.remove(key)
+                else:
+                    index.set(key, best[1], best[0])
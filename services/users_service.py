@@ -1,19 +1,25 @@
 from data.common.models.view_courses import ViewUserCourse
 from data.common.models.update_data import UpdateData
 from data.common.models.user import User
-from data.database import read_query, insert_query, update_query
+from data.database import read_query, insert_query, update_query, transaction
+from data.common.cache import TTLCache
+from data.common import passwords
+from data.common.search import text_filter
+from services.email_service import enqueue_email
 import bcrypt
 from datetime import datetime, timedelta
 import jwt
 import secrets
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 
 main_salt = bcrypt.gensalt()
 secret_key = secrets.token_hex(32)
 expiration_time = timedelta(minutes=300)
 
+# user id -> (user, is_approved); the TTL bounds how long another worker process can serve a stale entry
+PRINCIPAL_CACHE_SIZE = 1024
+PRINCIPAL_CACHE_TTL_SECONDS = 60
+principal_cache = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
+
 def find_by_id(id: int) -> User | None:
     if id is None:
         return None
@@ -27,6 +33,23 @@ def find_by_id(id: int) -> User | None:
     else:
         return None
 
+def get_principal(id: int) -> tuple[User, bool] | None:
+    ''' Identity, role and approval of a user in one query, cached between requests'''
+    if id is None:
+        return None
+
+    principal = principal_cache.get(id)
+    if principal is None:
+        sql = "SELECT id, email, password, first_name, last_name, role, is_approved FROM users WHERE id = ?;"
+        data = read_query(sql, (id,))
+        if not data:
+            return None
+        principal = (User.from_query_result(*data[0][:6]), bool(data[0][6]))
+        principal_cache.set(id, principal)
+
+    user, is_approved = principal
+    return user.copy(), is_approved
+
 def find_by_email(email: str) -> User | None:
 
     if email is None:
@@ -46,7 +69,7 @@ def create_new_user(user: User):
         return None
     
     passwd = user.password.encode("utf-8")
-    hashed_password = bcrypt.hashpw(passwd, main_salt)
+    hashed_password = passwords.hashpw(passwd, main_salt)
     is_verified = 0
     is_approved = 0
 
@@ -68,7 +91,7 @@ def try_login(user: User, password: str) -> User | None:
     if user is None or password is None:
         return None
     
-    pass_match = bcrypt.checkpw(password.encode("utf-8"), user.password.encode("utf-8"))
+    pass_match = passwords.checkpw(password.encode("utf-8"), user.password.encode("utf-8"))
     
     if user and pass_match:
         return user
@@ -132,7 +155,11 @@ def subscribe_to_course(user_id: int, course_id:int)-> bool:
         # Insert a new record for subscription
         insert_sql = "INSERT INTO users_have_courses (users_id, courses_id, status) VALUES (?, ?, ?)"
         insert_params = (user_id, course_id, 0)
-        return update_query(insert_sql, insert_params)
+        with transaction() as cursor:
+            cursor.execute(insert_sql, insert_params)
+            subscribed = cursor.rowcount > 0
+            cursor.execute("UPDATE courses SET students_count = students_count + 1 WHERE id = ?", (course_id,))
+        return subscribed
 
 def unsubscribe_from_course(user_id: int, course_id:int)-> bool:
     ''' Student unsubscribe to course'''
@@ -172,7 +199,7 @@ def update_user(user: User, update_info: UpdateData) -> bool | None:
     hashed_password=''
     if update_info.password:
         passwd = update_info.password.encode("utf-8")
-        hashed_password = bcrypt.hashpw(passwd, main_salt)
+        hashed_password = passwords.hashpw(passwd, main_salt)
 
     merged=User(
         id=user.id,
@@ -206,29 +233,17 @@ def update_user(user: User, update_info: UpdateData) -> bool | None:
                     WHERE id = ?''',
                     (merged.password, merged.first_name, merged.last_name, merged.role, merged.id))
         update_completed = True
+
+    if update_completed:
+        principal_cache.pop(user.id)
     
     return update_completed
 
 def send_verification_email(email: str, verification_link: str):
-    smtp_host = "smtp.office365.com"
-    smtp_port = 587
-    smtp_username = "poodle.learning@outlook.com"
-    smtp_password = "1234@alpha"  # Use your Outlook.com account password
-
-    message = MIMEMultipart()
-    message["From"] = "poodle.learning@outlook.com"
-    message["To"] = email
-    message["Subject"] = "Account Verification"
-
     body = f"Please click the following link to verify your account: {verification_link}"
-    message.attach(MIMEText(body, "plain"))
-
-    with smtplib.SMTP(smtp_host, smtp_port) as server:
-        server.starttls()
-        server.login(smtp_username, smtp_password)
-        server.sendmail(message["From"], message["To"], message.as_string())
+    enqueue_email(email, "Account Verification", body)
 
-        return("Verification email sent successfully.")
+    return("Verification email sent successfully.")
 
 def verify_email(email:str, token:str) -> bool:
     if email is None or token is None:
@@ -252,6 +267,7 @@ def admin_approves_user(user_id: int)->bool:
     '''Admin approves user role'''
     sql='''UPDATE users SET is_approved = 1 WHERE (`id` = ?);'''
     data=update_query(sql,(user_id,))
+    principal_cache.pop(user_id)
     if data:
         return True
     return False
@@ -260,6 +276,7 @@ def admin_disapproves_user(user_id: int)->bool:
     '''Admin disapproves user role'''
     sql='''UPDATE users SET is_approved = 0 WHERE (`id` = ?);'''
     data=update_query(sql,(user_id,))
+    principal_cache.pop(user_id)
     if data:
         return True
     return False
@@ -276,27 +293,12 @@ def get_teacher_info_with_course_id(course_id:int) -> list:
         return data
 
 def send_student_enrolled_in_course_email_to_teacher(teacher_email: str, verification_link: str, teacher_first_name, teacher_last_name, class_name: str):
-    smtp_host = "smtp.office365.com"
-    smtp_port = 587
-    smtp_username = "poodle.learning@outlook.com"
-    smtp_password = "1234@alpha" 
-
-    message = MIMEMultipart()
-    message["From"] = "poodle.learning@outlook.com"
-    message["To"] = teacher_email
-    message["Subject"] = "New Student Enrollment"
-
     body = f"Dear {teacher_first_name} {teacher_last_name},\n\n"
     body += f"A new student has enrolled in your class: '{class_name}'.\n"
     body += f"Click the following link to approve their enrollment: {verification_link}\n\n"
     body += "Thank you!\n"
 
-    message.attach(MIMEText(body, "plain"))
-
-    with smtplib.SMTP(smtp_host, smtp_port) as server:
-        server.starttls()
-        server.login(smtp_username, smtp_password)
-        server.sendmail(message["From"], message["To"], message.as_string())
+    enqueue_email(teacher_email, "New Student Enrollment", body)
 
     return "Verification email sent successfully."
 
@@ -306,15 +308,17 @@ def view_admin(email: str = None, last_name: str = None)->list[User]:
            FROM users 
            LEFT JOIN teachers as t ON id=t.users_id'''
     where_clauses=[]
-    if email:
-        where_clauses.append(f"email like '%{email}%'")
-    if last_name:
-        where_clauses.append(f"last_name like '%{last_name}%'")
+    sql_params=[]
+    for column, value in (('email', email), ('last_name', last_name)):
+        if value:
+            clause, params = text_filter(column, value)
+            where_clauses.append(clause)
+            sql_params.extend(params)
     
     if where_clauses:
         sql+= ' WHERE ' + ' AND '.join(where_clauses)
 
-    data=read_query(sql, (id,))
+    data=read_query(sql, tuple(sql_params))
     return (User.from_query_result_for_admin(*obj) for obj in data)
 
 def approve_enrollment(student_id: int, course_id: int)-> bool:
@@ -0,0 +1,75 @@
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import patch
+from data.common.cache import SingleFlight, TTLCache
+
+
+class TTLCache_Should(TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set(1, 'a')
+        cache.set(2, 'b')
+        cache.get(1)
+        cache.set(3, 'c')
+
+        self.assertEqual('a', cache.get(1))
+        self.assertIsNone(cache.get(2))
+
+    def test_expires_entries_after_ttl(self):
+        cache = TTLCache(maxsize=2, ttl=10)
+        with patch('data.common.cache.time.monotonic', return_value=100):
+            cache.set(1, 'a')
+        with patch('data.common.cache.time.monotonic', return_value=111):
+            self.assertIsNone(cache.get(1))
+
+
+class SingleFlight_Should(TestCase):
+
+    def test_concurrent_callers_share_one_load(self):
+        flights = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def load():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'course'
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flights.do(1, load)))
+        leader.start()
+        started.wait(5)
+        waiters = [threading.Thread(target=lambda: results.append(flights.do(1, load))) for _ in range(3)]
+        for waiter in waiters:
+            waiter.start()
+        while flights.stats()['coalesced'] < 3:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader, *waiters]:
+            thread.join(5)
+
+        self.assertEqual(['course'] * 4, results)
+        self.assertEqual(1, len(calls))
+        self.assertEqual({'requests': 4, 'loads': 1, 'coalesced': 3, 'in_flight': 0}, flights.stats())
+
+    def test_sequential_calls_load_again(self):
+        flights = SingleFlight()
+
+        flights.do(1, lambda: 'a')
+        result = flights.do(1, lambda: 'b')
+
+        self.assertEqual('b', result)
+        self.assertEqual(2, flights.stats()['loads'])
+
+    def test_error_is_raised_and_key_released(self):
+        flights = SingleFlight()
+
+        def fail():
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            flights.do(1, fail)
+        self.assertEqual('ok', flights.do(1, lambda: 'ok'))
@@ -0,0 +1,99 @@
+from unittest import TestCase
+from fastapi import FastAPI, Header
+from fastapi.responses import PlainTextResponse, Response
+from fastapi.testclient import TestClient
+from data.common.compression import CompressionMiddleware, accepts_gzip
+from data.common.http_cache import etag_matches, not_modified
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+
+@app.get('/large')
+def large():
+    return {'items': ['lorem ipsum'] * 100}
+
+
+@app.get('/small')
+def small():
+    return {'items': []}
+
+
+@app.get('/image')
+def image():
+    return Response(b'\xff\xd8\xff' + b'\x00' * 1000, media_type='image/jpeg')
+
+
+@app.get('/tagged')
+def tagged(if_none_match: str | None = Header(None)):
+    if etag_matches(if_none_match, '"v1"'):
+        return not_modified('"v1"')
+    return PlainTextResponse('x' * 1000, headers={'ETag': '"v1"'})
+
+
+@app.get('/encoded')
+def encoded():
+    return PlainTextResponse('x' * 1000, headers={'Content-Encoding': 'br'})
+
+
+class CompressionMiddleware_Should(TestCase):
+
+    def setUp(self):
+        self.client = TestClient(app)
+
+    def test_compresses_large_json_when_client_accepts_gzip(self):
+        response = self.client.get('/large', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual('gzip', response.headers['content-encoding'])
+        self.assertLess(int(response.headers['content-length']), len(response.content))
+        self.assertEqual(100, len(response.json()['items']))
+
+    def test_leaves_small_responses_alone(self):
+        response = self.client.get('/small', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertNotIn('content-encoding', response.headers)
+
+    def test_leaves_images_alone(self):
+        response = self.client.get('/image', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertNotIn('content-encoding', response.headers)
+        self.assertEqual(1003, len(response.content))
+
+    def test_leaves_encoded_responses_alone(self):
+        response = self.client.get('/encoded', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual('br', response.headers['content-encoding'])
+
+    def test_does_not_compress_when_gzip_is_refused(self):
+        response = self.client.get('/large', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+
+        self.assertNotIn('content-encoding', response.headers)
+
+    def test_gives_gzip_response_its_own_etag(self):
+        gzipped = self.client.get('/tagged', headers={'Accept-Encoding': 'gzip'})
+        plain = self.client.get('/tagged', headers={'Accept-Encoding': 'identity'})
+
+        self.assertEqual('"v1-gzip"', gzipped.headers['etag'])
+        self.assertEqual('"v1"', plain.headers['etag'])
+
+    def test_revalidates_gzip_etag_with_304(self):
+        response = self.client.get('/tagged', headers={'Accept-Encoding': 'gzip', 'If-None-Match': '"v1-gzip"'})
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual('"v1-gzip"', response.headers['etag'])
+        self.assertEqual('Accept-Encoding', response.headers['vary'])
+
+    def test_revalidates_plain_etag_with_304_varying_by_encoding(self):
+        response = self.client.get('/tagged', headers={'Accept-Encoding': 'identity', 'If-None-Match': '"v1"'})
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual('"v1"', response.headers['etag'])
+        self.assertEqual('Accept-Encoding', response.headers['vary'])
+
+    def test_accepts_gzip_parses_accept_encoding(self):
+        self.assertTrue(accepts_gzip('gzip, deflate, br'))
+        self.assertTrue(accepts_gzip('br;q=1.0, GZIP;q=0.5'))
+        self.assertTrue(accepts_gzip('*'))
+        self.assertFalse(accepts_gzip('gzip;q=0'))
+        self.assertFalse(accepts_gzip('br, identity'))
+        self.assertFalse(accepts_gzip(''))
@@ -1,27 +1,69 @@
 from unittest import TestCase
 from services import courses_service
+from data.common import identity_map
 from unittest import mock
-from unittest.mock import MagicMock, patch, ANY, call
+from unittest.mock import MagicMock, patch, ANY
 from data.common.models.view_courses import ViewPublicCourse, ViewStudentCourse, ViewTeacherCourse
 from data.common.models.report import Report
 from data.common.models.course import Course
 from data.common.models.course_update import CourseUpdate
-from data.common.models.section import Section
+from data.common.models.section import Section, SectionSummary
+from data.section_content import encode_content
 class CoursesService_Should(TestCase):
+
+    def setUp(self):
+        courses_service.catalog.invalidate()
+        courses_service.tag_id_cache.clear()
+        courses_service.objective_id_cache.clear()
     
     @patch('services.courses_service.read_query', autospec=True)
     def test_view_public_courses_return_list_public_courses(self, mock_read_query):
-        mock_read_query.return_value=[(1, 'Core Python', 'This is core python description',8.0, ['python', 'core']), 
-                                      (2, 'General Python', 'This is general python description ',7.0, ['python', 'general'])]
+        mock_read_query.side_effect=[[(1, 'Core Python', 'This is core python description',8.0, None, 0), 
+                                      (2, 'General Python', 'This is general python description ',7.0, None, 0),
+                                      (3, 'OOP', 'This is OOP modul', 9.0, None, 1)],
+                                     [(1, 'python'), (1, 'core'), (2, 'python'), (2, 'general'), (3, 'oop')],
+                                     []]
         result=list(courses_service.view_public_courses())
         self.assertEqual(2, len(result))
         self.assertIsInstance(result[0],ViewPublicCourse)
         self.assertIsInstance(result[1],ViewPublicCourse)
+        self.assertEqual(['python', 'general'], result[1].tags)
+
+    @patch('services.courses_service.read_query', autospec=True)
+    def test_view_public_courses_servedFromSnapshot_until_invalidated(self, mock_read_query):
+        mock_read_query.side_effect=[[(1, 'Core Python', 'core', 8.0, None, 0)], [], [],
+                                     [(1, 'Core Python 2', 'core', 8.0, None, 0)], [], []]
+        courses_service.view_public_courses()
+        self.assertEqual('Core Python', courses_service.view_public_courses()[0].title)
+        self.assertEqual(3, mock_read_query.call_count)
+
+        courses_service.catalog.invalidate(1)
+
+        self.assertEqual('Core Python 2', courses_service.view_public_courses()[0].title)
+        self.assertEqual((1,), mock_read_query.call_args_list[3].args[1])
+
+    @patch('services.courses_service.read_query', autospec=True)
+    def test_view_public_courses_ranksFullTextMatches_and_reindexesChangedCourses(self, mock_read_query):
+        mock_read_query.side_effect=[[(1, 'Core Python', 'basics', 6.0, None, 0),
+                                      (2, 'Java', 'for python developers', 9.0, None, 0),
+                                      (3, 'Web', 'flask', 8.0, None, 0)],
+                                     [(1, 'python'), (3, 'python')], [],
+                                     [(2, 'Java', 'for java developers', 9.0, None, 0)], [], []]
+
+        self.assertEqual([1, 3, 2], [c.id for c in courses_service.view_public_courses(q='Python')])
+        self.assertEqual([1], [c.id for c in courses_service.view_public_courses(q='python', limit=1)])
+
+        courses_service.catalog.invalidate(2)
+
+        self.assertEqual([1, 3], [c.id for c in courses_service.view_public_courses(q='python')])
+        self.assertEqual(6, mock_read_query.call_count)
 
     @patch('services.courses_service.read_query', autospec=True)
     def test_view_enrolled_courses_return_list_enrolled_courses(self, mock_read_query):
-        mock_read_query.return_value=[(1, 'Core Python', 'This is core modul',8.0, None, ['python', 'core'], ['obj 1', 'obj 2'], 7.5),
-                                      (2, 'OOP', 'This is OOP modul',8.0, None, ['python', 'oop'], ['obj 3', 'obj 4'], 10)]
+        mock_read_query.side_effect=[[(1, 'Core Python', 'This is core modul',8.0, None),
+                                      (2, 'OOP', 'This is OOP modul',8.0, None)],
+                                     [(1, 'python'), (1, 'core'), (2, 'python'), (2, 'oop')],
+                                     [(1, 'obj 1'), (1, 'obj 2'), (2, 'obj 3'), (2, 'obj 4')]]
         result=list(courses_service.view_enrolled_courses(2))
         self.assertEqual(2, len(result))
         self.assertIsInstance(result[0],ViewStudentCourse)
@@ -29,9 +71,12 @@ class CoursesService_Should(TestCase):
 
     @patch('services.courses_service.read_query', autospec=True)
     def test_view_students_courses_return_list_public_and_premium_courses(self, mock_read_query):
-        mock_read_query.return_value=[(1, 'Core Python', 'This is core modul',8.0, None, ['python', 'core'], ['obj 1', 'obj 2'], 7.5),
-                                      (2, 'OOP', 'This is OOP modul',8.0, None, ['python', 'oop'], ['obj 3', 'obj 4'], 10 ),
-                                      (3, 'General Python', 'This is general',8.0, None, ['python', 'general'], ['obj 5', 'obj 6'], 10 )]
+        mock_read_query.side_effect=[[],
+                                     [(1, 'Core Python', 'This is core modul',8.0, None, 0),
+                                      (2, 'OOP', 'This is OOP modul',8.0, None, 1),
+                                      (3, 'General Python', 'This is general',8.0, None, 0)],
+                                     [(1, 'python'), (2, 'oop'), (3, 'general')],
+                                     [(1, 'obj 1'), (2, 'obj 3'), (3, 'obj 5')]]
         user_id = 1
         result=list(courses_service.view_students_courses(user_id))
         self.assertEqual(3, len(result))
@@ -39,6 +84,21 @@ class CoursesService_Should(TestCase):
         self.assertIsInstance(result[1],ViewStudentCourse)
         self.assertIsInstance(result[2],ViewStudentCourse)
 
+    @patch('services.courses_service.read_query', autospec=True)
+    def test_view_students_courses_skipsTakenCourses_and_paginates(self, mock_read_query):
+        mock_read_query.side_effect=[[(2,)],
+                                     [(1, 'Core Python', 'core', 8.0, None, 0),
+                                      (2, 'Python OOP', 'oop', 9.0, None, 1),
+                                      (3, 'Python Web', 'web', 7.0, None, 0),
+                                      (4, 'Java', 'java', 9.0, None, 0),
+                                      (5, 'Python Data', 'data', 9.5, None, 1)],
+                                     [(1, 'python'), (2, 'python'), (3, 'python'), (5, 'python')],
+                                     []]
+
+        result=courses_service.view_students_courses(1, title='PYTHON', tag='py', rating=7.5, limit=1, after_id=1)
+
+        self.assertEqual([5], [course.id for course in result])
+
     @patch('services.courses_service.read_query', autospec=True)
     def test_view_teacher_course_return_list_owned_public_and_premium_courses(self, mock_read_query):
         mock_read_query.side_effect = [
@@ -48,51 +108,120 @@ class CoursesService_Should(TestCase):
             (3, 'General Python', 'This is general', 8.0, None, 'hidden', 'public')
         ],
         
-        [('python',), ('core',)],
-        [('obj 1',), ('obj 2',)],
-       
-        [('python',), ('oop',)],
-        [('obj 3',), ('obj 4',)],
-        
-        [('python',), ('general',)],
-        [('obj 5',), ('obj 6',)]
+        [(1, 'python'), (1, 'core'), (2, 'python'), (2, 'oop'), (3, 'python'), (3, 'general')],
+        [(1, 'obj 1'), (1, 'obj 2'), (2, 'obj 3'), (2, 'obj 4'), (3, 'obj 5'), (3, 'obj 6')]
     ]
         teacher_id = 1
         result = courses_service.view_teacher_courses(teacher_id)
     
         expected_results = [
         ViewTeacherCourse.from_query_result(
-            id=1, title='Core Python', description='This is core module', course_rating=8.0, home_page_pic=None, is_active='active', is_premium='public', tags=['python', 'core'], objectives=['obj 1', 'obj 2']),
+            id=1, title='Core Python', description='This is core module', course_rating=8.0, home_page_pic_hash=None, is_active='active', is_premium='public', tags=['python', 'core'], objectives=['obj 1', 'obj 2']),
         ViewTeacherCourse.from_query_result(
-            id=2, title='OOP', description='This is OOP module', course_rating=8.0, home_page_pic=None, is_active='active', is_premium='premium', tags=['python', 'oop'], objectives=['obj 3', 'obj 4']),
+            id=2, title='OOP', description='This is OOP module', course_rating=8.0, home_page_pic_hash=None, is_active='active', is_premium='premium', tags=['python', 'oop'], objectives=['obj 3', 'obj 4']),
         ViewTeacherCourse.from_query_result(
-            id=3, title='General Python', description='This is general', course_rating=8.0,home_page_pic=None, is_active='hidden', is_premium='public', tags=['python', 'general'], objectives=['obj 5', 'obj 6'])
+            id=3, title='General Python', description='This is general', course_rating=8.0,home_page_pic_hash=None, is_active='hidden', is_premium='public', tags=['python', 'general'], objectives=['obj 5', 'obj 6'])
     ]
         self.assertEqual(len(result), 3)
         self.assertEqual(result, expected_results)
+        self.assertEqual(3, mock_read_query.call_count)
 
     @patch('services.courses_service.read_query', autospec=True)
-    def test_course_rating_return_None_when_student_rates_for_second_time(self, mock_read_query):
-        mock_read_query.return_value=[(1,)]
-        result=courses_service.course_rating(6.0,2,2)
-        self.assertIsNone(result)
+    def test_view_teacher_courses_filtersAndPaginatesInSql(self, mock_read_query):
+        mock_read_query.return_value=[]
+
+        courses_service.view_teacher_courses(1, title='py_', tag='oop', rating=7.5, limit=20, after_id=40)
+
+        sql, params = mock_read_query.call_args.args
+        self.assertIn('c.title LIKE ?', sql)
+        self.assertIn('c.id > ?', sql)
+        self.assertTrue(sql.rstrip().endswith('ORDER BY c.id LIMIT ?'))
+        self.assertEqual((1, '%py\\_%', '%oop%', 7.5, 40, 20), params)
 
     @patch('services.courses_service.read_query', autospec=True)
-    def test_course_rating_return_True_when_student_rates_his_course_for_first_time(self, mock_read_query):
-        mock_read_query.return_value=[(None,)]
-        with patch('services.courses_service.update_query') as mock_update_query:
-            mock_update_query.return_value=1
-            with patch('services.courses_service._course_rating_change_transaction') as mock_trans:
-                mock_trans.return_value=True
-                result=courses_service.course_rating(6.0,2,2)
-        self.assertEqual(True, result)
+    def test_view_admin_courses_bindsSearchValues(self, mock_read_query):
+        mock_read_query.return_value=[]
+
+        courses_service.view_admin_courses(title="x' OR 1=1 --", teacher='alice', limit=10)
+
+        sql, params = mock_read_query.call_args.args
+        self.assertNotIn('OR 1=1', sql)
+        self.assertEqual(("x' OR 1=1 --%", 'alice%', 10), params)
+
+    @patch('services.courses_service.read_query', autospec=True)
+    def test_view_admin_courses_searchesStudentByWord_withLeadingWildcard(self, mock_read_query):
+        mock_read_query.return_value=[]
+
+        courses_service.view_admin_courses(student='*parker', limit=10)
+
+        sql, params = mock_read_query.call_args.args
+        self.assertIn('MATCH(u.email) AGAINST (? IN BOOLEAN MODE) AND u.email REGEXP ?', sql)
+        self.assertEqual(('+parker*', '(^|[^[:alnum:]_])parker', 10), params)
+
+    @patch('services.courses_service.read_query', autospec=True)
+    def test_view_admin_courses_returnsOneRowPerCourse(self, mock_read_query):
+        mock_read_query.side_effect = [[(1, 'Python', 'desc', 8.0, None, 1, 0, 2),
+                                        (2, 'Java', 'desc', None, None, 0, 1, 0)],
+                                       [(1, 'python'), (1, 'backend')],
+                                       [(1, 'obj 1'), (1, 'obj 2'), (2, 'obj 3')]]
+
+        courses = courses_service.view_admin_courses(limit=10)
+
+        self.assertEqual([1, 2], [c.id for c in courses])
+        self.assertEqual((['python', 'backend'], ['obj 1', 'obj 2'], 2),
+                         (courses[0].tags, courses[0].objectives, courses[0].number_students))
+        self.assertEqual(([], ['obj 3'], 0), (courses[1].tags, courses[1].objectives, courses[1].number_students))
+        sql = mock_read_query.call_args_list[0].args[0]
+        self.assertIn('c.students_count', sql)
+        self.assertNotIn('JOIN', sql)
+
+    @patch('services.courses_service.read_query', autospec=True)
+    def test_get_tags_and_objectives_groupsRowsByCourse(self, mock_read_query):
+        mock_read_query.side_effect = [[(1, 'python'), (2, 'java'), (1, 'core')],
+                                       [(2, 'obj 1')]]
+
+        tags, objectives = courses_service.get_tags_and_objectives([1, 2, 3])
+
+        self.assertEqual({1: ['python', 'core'], 2: ['java'], 3: []}, tags)
+        self.assertEqual({1: [], 2: ['obj 1'], 3: []}, objectives)
+        self.assertEqual((1, 2, 3), mock_read_query.call_args_list[0].args[1])
 
     @patch('services.courses_service.read_query', autospec=True)
-    def test_course_rating_return_None_when_student_rates_course_not_enrolled_in(self, mock_read_query):
-        mock_read_query.return_value=[(None,)]
-        with patch('services.courses_service.update_query') as mock_update_query:
-            mock_update_query.return_value=-1
-            result=courses_service.course_rating(6.0,2,2)
+    def test_get_tags_and_objectives_skipsQueries_when_noCourses(self, mock_read_query):
+        tags, objectives = courses_service.get_tags_and_objectives([])
+
+        self.assertEqual(({}, {}), (tags, objectives))
+        mock_read_query.assert_not_called()
+
+    def _mock_transaction(self, rowcount):
+        cursor = MagicMock()
+        cursor.rowcount = rowcount
+        transaction = MagicMock()
+        transaction.return_value.__enter__.return_value = cursor
+        return transaction, cursor
+
+    def test_course_rating_return_None_when_student_rates_for_second_time(self):
+        transaction, cursor = self._mock_transaction(rowcount=0)
+        with patch('services.courses_service.transaction', transaction):
+            result=courses_service.course_rating(6,2,2)
+        self.assertIsNone(result)
+        cursor.execute.assert_called_once()
+
+    def test_course_rating_return_True_when_student_rates_his_course_for_first_time(self):
+        transaction, cursor = self._mock_transaction(rowcount=1)
+        with patch('services.courses_service.transaction', transaction):
+            result=courses_service.course_rating(6,2,2)
+        self.assertEqual(True, result)
+        rating_write, counters_write = cursor.execute.call_args_list
+        self.assertIn('rating IS NULL', rating_write.args[0])
+        self.assertEqual((6, 2, 2), rating_write.args[1])
+        self.assertIn('rating_count = rating_count + 1', counters_write.args[0])
+        self.assertEqual((6, 6, 2), counters_write.args[1])
+
+    def test_course_rating_return_None_when_student_rates_course_not_enrolled_in(self):
+        transaction, cursor = self._mock_transaction(rowcount=-1)
+        with patch('services.courses_service.transaction', transaction):
+            result=courses_service.course_rating(6,2,2)
         self.assertIsNone(result)
 
     @patch('services.courses_service.read_query', autospec=True)
@@ -126,7 +255,7 @@ class CoursesService_Should(TestCase):
         [('obj 1',), ('obj 2',)],
         ]
         expected_results = Course.from_query_result(
-            id=1, title='Core Python', description='This is core module', course_rating=8.0, owner_id = 1, home_page_pic=None, is_active='active', is_premium='public', tags=['python', 'core'], objectives=['obj 1', 'obj 2'])
+            id=1, title='Core Python', description='This is core module', course_rating=8.0, owner_id = 1, home_page_pic_hash=None, is_active='active', is_premium='public', tags=['python', 'core'], objectives=['obj 1', 'obj 2'])
 
         result=courses_service.get_course_by_id(1)
         self.assertEqual(result, expected_results)
@@ -137,9 +266,10 @@ class CoursesService_Should(TestCase):
         result=courses_service.get_course_by_id(100)
         self.assertIsNone(result)
 
-    @patch('services.courses_service.insert_query', autospec=True)
-    def test_create_course_return_Course(self, mock_insert_query):
-        mock_insert_query.return_value=1
+    def test_create_course_return_Course(self):
+        transaction, cursor = self._mock_transaction(rowcount=1)
+        cursor.lastrowid = 5
+        cursor.fetchall.side_effect = [[(1, 'tag 1'), (2, 'tag 2')], [(3, 'obj 1'), (4, 'obj 2')]]
         course=Course(title='fake_title',
                       description='any',
                       owner_id=1,
@@ -149,9 +279,15 @@ class CoursesService_Should(TestCase):
                       objectives=['obj 1', 'obj 2']
                       )
         
-        result=courses_service.create_course(course)
+        with patch('services.courses_service.transaction', transaction):
+            result=courses_service.create_course(course)
 
         self.assertIsInstance(result, Course)
+        self.assertEqual(5, result.id)
+        transaction.assert_called_once()
+        self.assertEqual(2, cursor.executemany.call_count)
+        self.assertEqual(2, courses_service.tag_id_cache.get('tag 2'))
+        self.assertEqual(3, courses_service.objective_id_cache.get('obj 1'))
 
     @patch('services.courses_service.update_query', autospec=True)
     def test_update_course_return_Course(self, mock_update_query):
@@ -188,6 +324,30 @@ class CoursesService_Should(TestCase):
         result=courses_service.course_exists(1)
         self.assertEqual(False, result)
 
+    @patch('services.courses_service.read_query', autospec=True)
+    def test_course_flags_reuse_course_loaded_in_same_request(self, mock_read_query):
+        mock_read_query.side_effect = [[(1, 'Core Python', 'core', None, 8.0, 1, 1, 1)], [], []]
+
+        with identity_map.request_scope():
+            courses_service.get_course_by_id(1)
+            self.assertTrue(courses_service.course_exists(1))
+            self.assertTrue(courses_service.is_course_active(1))
+            self.assertTrue(courses_service.is_course_premium(1))
+            courses_service.get_course_by_id(1)
+
+        self.assertEqual(3, mock_read_query.call_count)
+
+    @patch('services.courses_service.read_query', autospec=True)
+    def test_course_flags_are_queried_once_per_request(self, mock_read_query):
+        mock_read_query.return_value = [(1, 0)]
+
+        with identity_map.request_scope():
+            self.assertTrue(courses_service.course_exists(1))
+            self.assertTrue(courses_service.is_course_active(1))
+            self.assertFalse(courses_service.is_course_premium(1))
+
+        mock_read_query.assert_called_once()
+
     @patch('services.courses_service.read_query', autospec=True)
     def test_get_section_by_id_returnSection_ifExists(self, mock_read_query):
         mock_read_query.return_value=[(1, 'Basics',
@@ -197,6 +357,13 @@ class CoursesService_Should(TestCase):
         result=courses_service.get_section_by_id(1)
         self.assertIsInstance(result, Section)
 
+    @patch('services.courses_service.read_query', autospec=True)
+    def test_get_section_by_id_decodes_compressed_content(self, mock_read_query):
+        content='Lorem ipsum dolor sit amet. ' * 100
+        mock_read_query.return_value=[(1, 'Basics', encode_content(content), 'Explain the basics', 'ext_link', 1)]
+        result=courses_service.get_section_by_id(1)
+        self.assertEqual(content, result.content)
+
     @patch('services.courses_service.read_query', autospec=True)
     def test_get_section_by_id_returnNone_ifNoExist(self, mock_read_query):
         mock_read_query.return_value=[]
@@ -205,17 +372,18 @@ class CoursesService_Should(TestCase):
 
     @patch('services.courses_service.read_query', autospec=True)
     def test_get_course_sections_returnlistOfSections_ifCourseExist(self, mock_read_query):
-        mock_read_query.return_value=[(1, 'Basics',
-                                        'Lorem ipsum dolor',
-                                        'Explain the basics',
-                                        'ext_link', 1),
-                                        (2, 'Basics2',
-                                        'Lorem ipsum dolor',
-                                        'Explain the basics2',
-                                        'ext_link2', 1)]
+        mock_read_query.return_value=[(1, 'Basics', 'Explain the basics', 17, 'a' * 64),
+                                      (2, 'Basics2', 'Explain the basics2', 17, 'a' * 64)]
         result=list(courses_service.get_course_sections(1))
-        self.assertIsInstance(result[0], Section)
+        self.assertIsInstance(result[0], SectionSummary)
         self.assertEqual(2, len(result))
+        self.assertNotIn('content,', mock_read_query.call_args.args[0])
+
+    def test_content_fingerprint_matches_length_and_sha256(self):
+        length, digest = courses_service.content_fingerprint('Lorem ipsum dolor')
+
+        self.assertEqual(17, length)
+        self.assertEqual('9b3e1beb7053e0f900a674dd1c99aca3355e1275e1b03d3cb1bc977f5154e196', digest)
 
     @patch('services.courses_service.read_query', autospec=True)
     def test_get_course_sections_returnEmptylistOfSections_ifNoCourse(self, mock_read_query):
@@ -224,21 +392,23 @@ class CoursesService_Should(TestCase):
         
         self.assertEqual(0, len(result))
 
-    @patch('services.courses_service.insert_query', autospec=True)
-    def test_create_section(self, mock_insert_query):
-        mock_insert_query.return_value=10
+    def test_create_section(self):
+        transaction, cursor = self._mock_transaction(rowcount=1)
+        cursor.lastrowid=10
         section=Section(title='title1',
                         content='content1',
                         description='desc1',
                         external_link='extlink',
                         courses_id=1)
 
-        result=courses_service.create_section(1,section)
+        with patch('services.courses_service.transaction', transaction):
+            result=courses_service.create_section(1,section)
         self.assertIsInstance(result, Section)
+        self.assertEqual(10, result.id)
+        self.assertIn('sections_count', cursor.execute.call_args_list[1].args[0])
 
-    @patch('services.courses_service.update_query', autospec=True)
-    def test_update_section(self, mock_update_query):
-        mock_update_query.return_value=True
+    def test_update_section(self):
+        transaction, cursor = self._mock_transaction(rowcount=1)
         old=Section(id=1,
                     title='title1',
                     content='content1',
@@ -250,206 +420,137 @@ class CoursesService_Should(TestCase):
                     description='desc2',
                     external_link='extlink2',
                     courses_id=2)
-        result=courses_service.update_section(old,new)
+        with patch('services.courses_service.transaction', transaction):
+            result=courses_service.update_section(old,new)
         self.assertIsInstance(result, Section)
         self.assertEqual('title2', result.title)
         self.assertEqual('content2', result.content)
         self.assertEqual('desc2', result.description)
         self.assertEqual('extlink2', result.external_link)
         self.assertEqual(2, result.courses_id)
+        # the section moved, so both courses are recounted
+        self.assertEqual([(1, 1), (2, 2)], [c.args[1] for c in cursor.execute.call_args_list[1:]])
+
+    def test_validate_section_updates_counters_in_one_transaction(self):
+        transaction, cursor = self._mock_transaction(rowcount=1)
+        with patch('services.courses_service.transaction', transaction):
+            result=courses_service.validate_section(2, 3, 7)
+        self.assertTrue(result)
+        view_write, progress_write = cursor.execute.call_args_list
+        self.assertEqual((3, 7), view_write.args[1])
+        self.assertIn('viewed_sections = viewed_sections + 1', progress_write.args[0])
+        self.assertEqual((2, 3, 2), progress_write.args[1])
+
+    def test_validate_section_skips_counters_when_section_already_viewed(self):
+        transaction, cursor = self._mock_transaction(rowcount=0)
+        with patch('services.courses_service.transaction', transaction):
+            result=courses_service.validate_section(2, 3, 7)
+        self.assertTrue(result)
+        cursor.execute.assert_called_once()
 
+    @patch('services.courses_service.update_query', autospec=True)
     @patch('services.courses_service.read_query', autospec=True)
-    def test_course_rating_change_transaction_return_True_when_trunsactionSuccessful(self, mock_read_query):
-        mock_read_query.return_value=[(6,),(7,)]
-        
-        with patch('services.courses_service.update_query') as mock_update_query:
-            mock_update_query.return_value=True
-            result=courses_service._course_rating_change_transaction(2)
-            self.assertEqual(True, result)
-
-    @patch('services.courses_service.read_query', autospec=True)
-    def test_course_rating_change_transaction_return_False_when_NoRating(self, mock_read_query):
-        mock_read_query.return_value=[]
-
-        with patch('services.courses_service.update_query') as mock_update_query:
-            mock_update_query.return_value=True
-            result=courses_service._course_rating_change_transaction(2)
-            self.assertEqual(False, result)
-
-    @patch('services.courses_service.read_query', autospec=True)
-    def test_tag_exists_returns_id_if_tag_exists(self, mock_read_query):
-        mock_read_query.return_value = [(1,)]  
+    def test_recompute_course_progress_updates_students_in_id_batches(self, mock_read_query, mock_update_query):
+        mock_read_query.side_effect = [[(3,), (5,)], [(8,)]]
 
-        tag = 'python'
-        result = courses_service.tag_exists(tag)
+        courses_service.recompute_course_progress(1, batch_size=2)
 
-        self.assertEqual(result, (1,))
+        self.assertEqual([(1, 0, 2), (1, 5, 2)], [c.args[1] for c in mock_read_query.call_args_list])
+        self.assertEqual([(1, 0, 5, 1, 0, 5), (1, 5, 8, 1, 5, 8)], [c.args[1] for c in mock_update_query.call_args_list])
 
+    @patch('services.courses_service.update_query', autospec=True)
     @patch('services.courses_service.read_query', autospec=True)
-    def test_tag_exists_returns_none_if_tag_does_not_exist(self, mock_read_query):
-        mock_read_query.return_value = [] 
-
-        tag = 'java'
-        result = courses_service.tag_exists(tag)
-
-        self.assertIsNone(result)
-    
-    @patch('services.courses_service.insert_query', autospec=True)
-    def test_create_new_tag_inserts_tag_and_returns_tag_id(self, mock_insert_query):
-        mock_insert_query.return_value = 1  
-
-        tag = 'python'
-        result = courses_service.create_new_tag(tag)
+    def test_recompute_course_progress_does_nothing_without_students(self, mock_read_query, mock_update_query):
+        mock_read_query.return_value = []
 
-        self.assertEqual(result, 1)
-        mock_insert_query.assert_called_once_with("INSERT INTO tags (expertise_area) VALUES (?)", ('python',))
+        courses_service.recompute_course_progress(1)
 
-    @patch('services.courses_service.insert_query', autospec=True)
-    def test_create_course_tag_inserts_course_and_tag_ids(self, mock_insert_query):
-        mock_insert_query.return_value = 1  
+        mock_update_query.assert_not_called()
 
-        course_id = 1
-        tag_id = 2
-        result = courses_service.create_course_tag(course_id, tag_id)
+    def test_mark_sections_viewed_inserts_all_sections_with_one_statement(self):
+        transaction, cursor = self._mock_transaction(rowcount=2)
+        cursor.fetchone.return_value = (67,)
+        with patch('services.courses_service.transaction', transaction):
+            result = courses_service.mark_sections_viewed(2, 3, [7, 8, 7])
 
-        self.assertEqual(result, 1)
-        mock_insert_query.assert_called_once_with("INSERT INTO courses_have_tags(courses_id, tags_id) VALUES (?, ?)", (course_id, tag_id))
+        self.assertEqual(67, result)
+        insert, progress_write, _ = cursor.execute.call_args_list
+        self.assertIn('INSERT IGNORE', insert.args[0])
+        self.assertEqual((3, 2, 7, 8), insert.args[1])
+        self.assertEqual((2, 2, 2, 3, 2), progress_write.args[1])
 
-    @patch('services.courses_service.tag_exists', autospec=True)
-    @patch('services.courses_service.create_course_tag', autospec=True)
-    @patch('services.courses_service.create_new_tag', autospec=True)
-    def test_insert_tags_in_course_calls_tag_exists_and_create_course_tag_for_existing_tags(self, mock_create_new_tag, mock_create_course_tag, mock_tag_exists):
-        mock_tag_exists.return_value = [1] 
-        course_id = 1
-        tags = ['python', 'oop', 'java']
+    def test_mark_sections_viewed_keeps_progress_when_nothing_new(self):
+        transaction, cursor = self._mock_transaction(rowcount=0)
+        cursor.fetchone.return_value = (50,)
+        with patch('services.courses_service.transaction', transaction):
+            result = courses_service.mark_sections_viewed(2, 3, [7])
 
-        courses_service.insert_tags_in_course(course_id, tags)
-
-        expected_calls = [
-            call('python'),
-            call('oop'),
-            call('java')
-        ]
-        mock_tag_exists.assert_has_calls(expected_calls, any_order=True)
-        mock_create_course_tag.assert_called_with(course_id, 1)
-        mock_create_new_tag.assert_not_called()
-
-    @patch('services.courses_service.tag_exists', autospec=True)
-    @patch('services.courses_service.create_course_tag', autospec=True)
-    @patch('services.courses_service.create_new_tag', autospec=True)
-    def test_insert_tags_in_course_calls_create_new_tag_and_create_course_tag_for_new_tags(
-            self, mock_create_new_tag, mock_create_course_tag, mock_tag_exists):
-        mock_tag_exists.return_value = None  
-        mock_create_new_tag.return_value = 2  
-        course_id = 1
-        tags = ['python', 'oop', 'java']
-
-        courses_service.insert_tags_in_course(course_id, tags)
-
-        expected_calls = [
-            call('python'),
-            call('oop'),
-            call('java')
-        ]
-        mock_tag_exists.assert_has_calls(expected_calls, any_order=True)
-        mock_create_course_tag.assert_called_with(course_id, 2)
-        mock_create_new_tag.assert_called_with('java')
-
-    @patch('services.courses_service.tag_exists', autospec=True)
-    @patch('services.courses_service.create_course_tag', autospec=True)
-    @patch('services.courses_service.create_new_tag', autospec=True)
-    def test_insert_tags_in_course_does_not_call_create_course_tag_when_tags_empty(
-            self, mock_create_new_tag, mock_create_course_tag, mock_tag_exists):
-        course_id = 1
-        tags = []
-
-        courses_service.insert_tags_in_course(course_id, tags)
-
-        mock_tag_exists.assert_not_called()
-        mock_create_course_tag.assert_not_called()
-        mock_create_new_tag.assert_not_called()
+        self.assertEqual(50, result)
+        self.assertEqual(2, cursor.execute.call_count)
 
     @patch('services.courses_service.read_query', autospec=True)
-    def test_objective_exists_returns_objective_id_if_objective_exists(self, mock_read_query):
-        objective = 'Test Objective'
-        mock_read_query.return_value = [(1,)]  
+    def test_get_course_version_returnsNone_ifNoCourse(self, mock_read_query):
+        mock_read_query.side_effect = [[(4,)], []]
 
-        result = courses_service.objective_exists(objective)
+        self.assertEqual(4, courses_service.get_course_version(1))
+        self.assertIsNone(courses_service.get_course_version(2))
 
-        self.assertEqual(result, (1,))  
+    def test_insert_tags_in_course_createsMissingTags_withOneInsert(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [(1, 'python'), (2, 'Java')]
 
-    @patch('services.courses_service.read_query', autospec=True)
-    def test_objective_exists_returns_none_if_objective_does_not_exist(self, mock_read_query):
-        objective = 'Non-existent Objective'
-        mock_read_query.return_value = []  
+        result = courses_service.insert_tags_in_course(cursor, 7, ['python', 'Java', 'PYTHON'])
 
-        result = courses_service.objective_exists(objective)
+        self.assertEqual({'python': 1, 'java': 2}, result)
+        insert, select = cursor.execute.call_args_list
+        self.assertEqual(('INSERT IGNORE INTO tags (expertise_area) VALUES (?), (?)', ('python', 'Java')), insert.args)
+        self.assertEqual(('python', 'Java'), select.args[1])
+        sql, rows = cursor.executemany.call_args.args
+        self.assertEqual('INSERT INTO courses_have_tags(courses_id, tags_id) VALUES (?, ?)', sql)
+        self.assertEqual([(7, 1), (7, 2)], sorted(rows))
 
-        self.assertIsNone(result)  
+    def test_insert_tags_in_course_usesCachedIds_withoutQueries(self):
+        courses_service.tag_id_cache.set('python', 1)
+        cursor = MagicMock()
 
-    @patch('services.courses_service.insert_query', autospec=True)
-    def test_create_new_objective_returns_newly_created_objective_id(self, mock_insert_query):
-        objective = 'New Objective'
-        mock_insert_query.return_value = 1 
-    
-        result = courses_service.create_new_objective(objective)
+        result = courses_service.insert_tags_in_course(cursor, 7, ['Python'])
 
-        self.assertEqual(result, 1) 
-    
-    @patch('services.courses_service.objective_exists', autospec=True)
-    @patch('services.courses_service.create_course_objective', autospec=True)
-    @patch('services.courses_service.create_new_objective', autospec=True)
-    def test_insert_objectives_in_course_calls_create_course_objective_for_existing_objectives(
-            self, mock_create_new_objective, mock_create_course_objective, mock_objective_exists
-    ):
-        mock_objective_exists.return_value = [1]
-        course_id = 1
-        objectives = ['Objective 1', 'Objective 2']
+        self.assertEqual({'python': 1}, result)
+        cursor.execute.assert_not_called()
+        self.assertEqual([(7, 1)], cursor.executemany.call_args.args[1])
 
-        courses_service.insert_objectives_in_course(course_id, objectives)
+    def test_insert_objectives_in_course_writesNothing_when_noObjectives(self):
+        cursor = MagicMock()
 
-        expected_calls = [
-            call('Objective 1'),
-            call('Objective 2'),
-    
-        ]
-        mock_objective_exists.assert_has_calls(expected_calls, any_order=True)
-        mock_create_course_objective.assert_called_with(course_id, 1)
-        mock_create_new_objective.assert_not_called()
-
-    @patch('services.courses_service.objective_exists', autospec=True)
-    @patch('services.courses_service.create_course_objective', autospec=True)
-    @patch('services.courses_service.create_new_objective', autospec=True)
-    def test_insert_objectives_in_course_calls_create_new_objective_and_create_course_objective_for_new_objectives(
-    
-            self, mock_create_new_objective, mock_create_course_objective, mock_objective_exists
-    ):
-        mock_objective_exists.return_value = None  
-        mock_create_new_objective.return_value = 2
-        course_id = 1
-        objectives = ['Objective 1', 'Objective 2']
-
-        courses_service.insert_objectives_in_course(course_id, objectives)
+        self.assertEqual({}, courses_service.insert_objectives_in_course(cursor, 7, []))
 
-        expected_calls = [
-            call('Objective 1'),
-            call('Objective 2'),
-
-        ]
-        mock_objective_exists.assert_has_calls(expected_calls, any_order=True)
-        mock_create_course_objective.assert_called_with(course_id, 2)
-        mock_create_new_objective.assert_called_with('Objective 2')
+        cursor.execute.assert_not_called()
+        cursor.executemany.assert_not_called()
 
+    @patch('services.courses_service.create_variants', autospec=True)
+    @patch('services.courses_service.save_image_stream', autospec=True)
     @patch('services.courses_service.update_query', autospec=True)
-    def test_upload_pic_updates_home_page_pic_for_valid_input(self, mock_update_query):
+    def test_upload_pic_updates_home_page_pic_for_valid_input(self, mock_update_query, mock_save_image_stream, mock_create_variants):
         course_id = 1
-        pic = MagicMock()  
+        pic = MagicMock()
+        mock_save_image_stream.return_value = 'a' * 64
 
         result = courses_service.upload_pic(course_id, pic)
 
-        mock_update_query.assert_called_once_with("UPDATE courses SET home_page_pic = ? WHERE id = ?", (pic, course_id))
+        mock_save_image_stream.assert_called_once_with(pic)
+        mock_create_variants.assert_called_once_with('a' * 64)
+        mock_update_query.assert_called_once_with("UPDATE courses SET home_page_pic_hash = ?, home_page_pic = NULL, version = version + 1 WHERE id = ?", ('a' * 64, course_id))
         self.assertEqual(result, mock_update_query.return_value)
 
+    @patch('services.courses_service.read_query', autospec=True)
+    def test_view_teacher_courses_returnsPicUrl_ifCourseHasPic(self, mock_read_query):
+        mock_read_query.side_effect = [[(1, 'Core Python', 'core', 8.0, 'b' * 64, 1, 0)], [], []]
+
+        result = courses_service.view_teacher_courses(1)
+
+        self.assertEqual('b' * 64, result[0].home_page_pic_hash)
+        self.assertEqual(f'/courses/1/pic?variant=thumb&v={"b" * 64}', result[0].home_page_pic_url)
+
     @patch('services.courses_service.update_query', autospec=True)
     def test_upload_pic_returns_none_for_invalid_input(self, mock_update_query):
         course_id = None
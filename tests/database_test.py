@@ -0,0 +1,121 @@
+import threading
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from data import database
+from data.database import ConnectionPool
+from data.common.exceptions import Exception503ServiceUnavailable
+
+
+class ConnectionPool_Should(TestCase):
+
+    def test_acquire_reusesReleasedConnection(self):
+        factory = MagicMock()
+        pool = ConnectionPool(factory=factory, min_size=0, max_size=2)
+
+        conn = pool.acquire()
+        pool.release(conn)
+        again = pool.acquire()
+
+        self.assertIs(conn, again)
+        factory.assert_called_once()
+
+    def test_fill_opensMinimumConnections(self):
+        factory = MagicMock(side_effect=lambda: MagicMock())
+        pool = ConnectionPool(factory=factory, min_size=3, max_size=5)
+
+        pool.fill()
+
+        self.assertEqual(3, factory.call_count)
+        self.assertEqual(3, pool.stats()['idle'])
+
+    def test_acquire_raises503_when_poolExhausted(self):
+        pool = ConnectionPool(factory=MagicMock, min_size=0, max_size=1, timeout=0.05)
+        pool.acquire()
+
+        with self.assertRaises(Exception503ServiceUnavailable):
+            pool.acquire()
+
+        self.assertEqual(1, pool.stats()['timeouts'])
+
+    def test_acquire_waitsForRelease_when_poolExhausted(self):
+        pool = ConnectionPool(factory=MagicMock, min_size=0, max_size=1, timeout=2)
+        conn = pool.acquire()
+        threading.Timer(0.05, pool.release, args=(conn,)).start()
+
+        again = pool.acquire()
+
+        self.assertIs(conn, again)
+        self.assertGreater(pool.stats()['wait_ms_max'], 0)
+
+    def test_acquire_replacesConnection_when_pingFails(self):
+        broken = MagicMock()
+        broken.ping.side_effect = Exception('gone away')
+        fresh = MagicMock()
+        factory = MagicMock(side_effect=[broken, fresh])
+        pool = ConnectionPool(factory=factory, min_size=0, max_size=1, ping_after=0)
+
+        pool.release(pool.acquire())
+        result = pool.acquire()
+
+        self.assertIs(fresh, result)
+        broken.close.assert_called_once()
+        self.assertEqual(1, pool.stats()['discarded'])
+
+    def test_acquire_evictsIdleConnections_aboveMinimum(self):
+        factory = MagicMock(side_effect=lambda: MagicMock())
+        pool = ConnectionPool(factory=factory, min_size=1, max_size=3, max_idle=0)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        pool.release(second)
+
+        pool.acquire()
+
+        stats = pool.stats()
+        self.assertEqual(1, stats['evicted'])
+        self.assertEqual(1, stats['size'])
+
+    def test_release_dropsBrokenConnection(self):
+        pool = ConnectionPool(factory=MagicMock, min_size=0, max_size=1)
+        conn = pool.acquire()
+
+        pool.release(conn, broken=True)
+
+        conn.close.assert_called_once()
+        self.assertEqual(0, pool.stats()['size'])
+
+    def test_readQuery_returnsConnectionToPool(self):
+        conn = MagicMock()
+        conn.cursor.return_value.__iter__.return_value = iter([(1,), (2,)])
+        pool = ConnectionPool(factory=lambda: conn, min_size=0, max_size=1)
+
+        with patch('data.database.get_pool', return_value=pool):
+            result = database.read_query('SELECT 1')
+
+        self.assertEqual([(1,), (2,)], result)
+        self.assertEqual(1, pool.stats()['idle'])
+
+    def test_transaction_commits_when_block_succeeds(self):
+        conn = MagicMock()
+        pool = ConnectionPool(factory=lambda: conn, min_size=0, max_size=1)
+
+        with patch('data.database.get_pool', return_value=pool):
+            with database.transaction() as cursor:
+                cursor.execute('UPDATE courses SET title = ?', ('a',))
+
+        conn.begin.assert_called_once()
+        conn.commit.assert_called_once()
+        conn.rollback.assert_not_called()
+
+    def test_transaction_rollsBack_when_block_raises(self):
+        conn = MagicMock()
+        pool = ConnectionPool(factory=lambda: conn, min_size=0, max_size=1)
+
+        with patch('data.database.get_pool', return_value=pool):
+            with self.assertRaises(ValueError):
+                with database.transaction():
+                    raise ValueError()
+
+        conn.commit.assert_not_called()
+        conn.rollback.assert_called_once()
+        self.assertEqual(1, pool.stats()['idle'])
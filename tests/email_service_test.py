@@ -0,0 +1,136 @@
+import socketserver
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+from services import email_service
+
+
+class _SmtpSinkHandler(socketserver.StreamRequestHandler):
+    ''' Just enough of SMTP for smtplib: every message is accepted and kept in server.messages'''
+
+    def reply(self, line: str):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.sessions += 1
+        self.reply('220 sink ready')
+        mail_from, rcpt_to = None, []
+        while line := self.rfile.readline():
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 sink')
+            elif verb == 'MAIL':
+                mail_from, rcpt_to = command[10:].strip('<>'), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipient = command[8:].strip('<>')
+                if recipient in self.server.refused:
+                    self.reply('550 No such user')
+                else:
+                    rcpt_to.append(recipient)
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while (data_line := self.rfile.readline()) not in (b'.\r\n', b''):
+                    data.append(data_line)
+                self.server.messages.append((mail_from, rcpt_to, b''.join(data).decode()))
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class _SmtpSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _SmtpSinkHandler)
+        self.messages = []
+        self.refused = set()
+        self.sessions = 0
+
+
+class EmailService_Should(TestCase):
+
+    def setUp(self):
+        self.sink = _SmtpSink()
+        threading.Thread(target=self.sink.serve_forever, daemon=True).start()
+        host, port = self.sink.server_address
+        self.patches = [patch.object(email_service, 'SMTP_HOST', host),
+                        patch.object(email_service, 'SMTP_PORT', port),
+                        patch.object(email_service, 'SMTP_USE_TLS', False),
+                        patch.object(email_service, 'SMTP_USERNAME', None)]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.sink.shutdown()
+        self.sink.server_close()
+
+    def test_deliver_batch_sends_all_emails_over_one_session(self):
+        emails = [(1, 'a@example.com', 'Hello', 'first', 0),
+                  (2, 'b@example.com', 'Hello', 'second', 0)]
+
+        sent, failed = email_service.deliver_batch(emails)
+
+        self.assertEqual([1, 2], sent)
+        self.assertEqual({}, failed)
+        self.assertEqual(1, self.sink.sessions)
+        self.assertEqual(['a@example.com', 'b@example.com'], [m[1][0] for m in self.sink.messages])
+        self.assertIn('second', self.sink.messages[1][2])
+
+    def test_deliver_batch_reports_refused_recipient_and_sends_the_rest(self):
+        self.sink.refused.add('bad@example.com')
+        emails = [(1, 'bad@example.com', 'Hello', 'first', 0),
+                  (2, 'b@example.com', 'Hello', 'second', 0)]
+
+        sent, failed = email_service.deliver_batch(emails)
+
+        self.assertEqual([2], sent)
+        self.assertEqual([1], list(failed))
+
+    def test_deliver_batch_fails_every_email_when_server_is_down(self):
+        self.sink.shutdown()
+        self.sink.server_close()
+        emails = [(1, 'a@example.com', 'Hello', 'first', 0),
+                  (2, 'b@example.com', 'Hello', 'second', 0)]
+
+        sent, failed = email_service.deliver_batch(emails)
+
+        self.assertEqual([], sent)
+        self.assertEqual([1, 2], sorted(failed))
+
+    @patch('services.email_service.update_query', autospec=True)
+    @patch('services.email_service.read_query', autospec=True)
+    def test_process_batch_marks_sent_and_schedules_retry(self, mock_read_query, mock_update_query):
+        self.sink.refused.add('bad@example.com')
+        mock_update_query.return_value = True
+        mock_read_query.return_value = [(1, 'a@example.com', 'Hello', 'first', 0),
+                                        (2, 'bad@example.com', 'Hello', 'second', 2)]
+
+        claimed = email_service.process_batch()
+
+        self.assertEqual(2, claimed)
+        sent_call, failed_call = mock_update_query.call_args_list[1:]
+        self.assertEqual((1,), sent_call.args[1])
+        self.assertEqual((3, failed_call.args[1][1], email_service.backoff_seconds(3), 2), failed_call.args[1])
+
+    @patch('services.email_service.insert_query', autospec=True)
+    def test_enqueue_emails_inserts_all_rows_with_one_statement(self, mock_insert_query):
+        email_service.enqueue_emails([('a@example.com', 'S', 'B1'), ('b@example.com', 'S', 'B2')])
+
+        mock_insert_query.assert_called_once_with(
+            'INSERT INTO email_outbox (recipient, subject, body) VALUES (?, ?, ?), (?, ?, ?)',
+            ('a@example.com', 'S', 'B1', 'b@example.com', 'S', 'B2'))
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        self.assertEqual(email_service.OUTBOX_BACKOFF_SECONDS, email_service.backoff_seconds(1))
+        self.assertEqual(email_service.OUTBOX_BACKOFF_SECONDS * 4, email_service.backoff_seconds(3))
+        self.assertEqual(email_service.OUTBOX_MAX_BACKOFF_SECONDS, email_service.backoff_seconds(50))
@@ -0,0 +1,33 @@
+from unittest import TestCase
+from data.common.http_cache import etag_matches, gzip_etag, hashed_etag, not_modified
+
+
+class HttpCache_Should(TestCase):
+
+    def test_etag_matches_any_listed_etag(self):
+        self.assertTrue(etag_matches('"a", "course-1-v2"', '"course-1-v2"'))
+        self.assertTrue(etag_matches('W/"course-1-v2"', '"course-1-v2"'))
+        self.assertTrue(etag_matches('*', '"course-1-v2"'))
+        self.assertFalse(etag_matches('"course-1-v1"', '"course-1-v2"'))
+        self.assertFalse(etag_matches(None, '"course-1-v2"'))
+
+    def test_gzip_etag_differs_but_still_matches(self):
+        self.assertEqual('"course-1-v2-gzip"', gzip_etag('"course-1-v2"'))
+        self.assertEqual('W/"a-gzip"', gzip_etag('W/"a"'))
+        self.assertTrue(etag_matches('"course-1-v2-gzip"', '"course-1-v2"'))
+        self.assertFalse(etag_matches('"course-1-v1-gzip"', '"course-1-v2"'))
+
+    def test_hashed_etag_depends_only_on_content(self):
+        page = [{'id': 1, 'title': 'Core Python'}, {'id': 2, 'title': 'OOP'}]
+
+        self.assertEqual(hashed_etag(page), hashed_etag([dict(course) for course in page]))
+        self.assertNotEqual(hashed_etag(page), hashed_etag(page[:1]))
+        self.assertTrue(hashed_etag(page).startswith('"'))
+
+    def test_not_modified_has_no_body(self):
+        response = not_modified('"course-1-v2"')
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(b'', response.body)
+        self.assertEqual('"course-1-v2"', response.headers['etag'])
+        self.assertEqual('Accept-Encoding', response.headers['vary'])
@@ -0,0 +1,64 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from data.common import identity_map
+from data.common.identity_map import IdentityMapMiddleware
+
+load = MagicMock(return_value='course')
+app = FastAPI()
+app.add_middleware(IdentityMapMiddleware)
+
+
+@app.get('/twice')
+def load_twice():
+    first = identity_map.get_or_load('course', 1, load)
+    second = identity_map.get_or_load('course', 1, load)
+    return [first, second]
+
+
+class IdentityMap_Should(TestCase):
+
+    def test_loads_each_entity_once_per_scope(self):
+        loader = MagicMock(return_value='course')
+        with identity_map.request_scope():
+            identity_map.get_or_load('course', 1, loader)
+            identity_map.get_or_load('course', 1, loader)
+            identity_map.get_or_load('course', 2, loader)
+
+        self.assertEqual(2, loader.call_count)
+
+    def test_always_loads_outside_a_scope(self):
+        loader = MagicMock(return_value='course')
+        identity_map.get_or_load('course', 1, loader)
+        identity_map.get_or_load('course', 1, loader)
+
+        self.assertEqual(2, loader.call_count)
+        self.assertIs(identity_map.MISSING, identity_map.peek('course', 1))
+
+    def test_forget_makes_next_access_load_again(self):
+        loader = MagicMock(side_effect=['old', 'new'])
+        with identity_map.request_scope():
+            identity_map.get_or_load('course', 1, loader)
+            identity_map.forget('course', 1)
+
+            self.assertEqual('new', identity_map.get_or_load('course', 1, loader))
+
+    def test_remembers_missing_entities(self):
+        loader = MagicMock(return_value=None)
+        with identity_map.request_scope():
+            identity_map.get_or_load('course', 1, loader)
+
+            self.assertIsNone(identity_map.peek('course', 1))
+            identity_map.get_or_load('course', 1, loader)
+
+        loader.assert_called_once()
+
+    def test_middleware_gives_sync_endpoints_one_map_per_request(self):
+        load.reset_mock()
+        client = TestClient(app)
+
+        client.get('/twice')
+        client.get('/twice')
+
+        self.assertEqual(2, load.call_count)
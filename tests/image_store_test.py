@@ -0,0 +1,114 @@
+import hashlib
+import io
+import os
+import tempfile
+import warnings
+from unittest import TestCase
+from unittest.mock import patch
+
+from PIL import Image
+
+from data import image_store
+from data.common.exceptions import Exception400BadRequest, Exception413PayloadTooLarge
+
+
+class ImageStore_Should(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        patcher = patch('data.image_store.IMAGE_STORE_DIR', self.tmp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_save_image_storesUnderContentHash(self):
+        data = b'\x89PNG\r\n\x1a\nrest of the png'
+
+        digest = image_store.save_image(data)
+
+        self.assertEqual(hashlib.sha256(data).hexdigest(), digest)
+        with open(image_store.image_path(digest), 'rb') as image:
+            self.assertEqual(data, image.read())
+
+    def test_save_image_deduplicatesIdenticalImages(self):
+        first = image_store.save_image(b'same bytes')
+        second = image_store.save_image(b'same bytes')
+
+        self.assertEqual(first, second)
+        self.assertEqual([first], os.listdir(os.path.dirname(image_store.image_path(first))))
+
+    def test_image_media_type_sniffsFormat(self):
+        jpeg = image_store.save_image(b'\xff\xd8\xff\xe0 jpeg data')
+        webp = image_store.save_image(b'RIFF\x00\x00\x00\x00WEBPVP8 ')
+
+        self.assertEqual('image/jpeg', image_store.image_media_type(jpeg))
+        self.assertEqual('image/webp', image_store.image_media_type(webp))
+
+    def test_image_exists_returnsFalse_when_notStored(self):
+        self.assertFalse(image_store.image_exists('0' * 64))
+
+    def test_save_image_stream_readsInChunks(self):
+        data = os.urandom(3 * image_store.CHUNK_SIZE + 10)
+        stream = io.BytesIO(data)
+
+        with patch.object(stream, 'read', wraps=stream.read) as mock_read:
+            digest = image_store.save_image_stream(stream, max_size=len(data))
+
+        self.assertEqual(hashlib.sha256(data).hexdigest(), digest)
+        self.assertTrue(all(call.args == (image_store.CHUNK_SIZE,) for call in mock_read.call_args_list))
+
+    def test_save_image_stream_raises413_and_leavesNoFile_when_tooLarge(self):
+        stream = io.BytesIO(b'x' * (image_store.CHUNK_SIZE + 1))
+
+        with self.assertRaises(Exception413PayloadTooLarge):
+            image_store.save_image_stream(stream, max_size=image_store.CHUNK_SIZE)
+
+        self.assertEqual([], os.listdir(self.tmp_dir.name))
+
+    def test_create_variant_shrinksImageToBoundingBox(self):
+        original = io.BytesIO()
+        Image.new('RGBA', (1600, 1200), (200, 10, 10, 255)).save(original, format='PNG')
+        digest = image_store.save_image(original.getvalue())
+
+        path = image_store.create_variant(digest, 'thumb')
+
+        with Image.open(path) as thumb:
+            self.assertEqual('JPEG', thumb.format)
+            self.assertEqual((240, 180), thumb.size)
+        self.assertEqual(os.path.dirname(image_store.image_path(digest)), os.path.dirname(path))
+
+    def test_create_variant_returnsNone_when_originalIsNotAnImage(self):
+        digest = image_store.save_image(b'definitely not an image')
+
+        self.assertIsNone(image_store.create_variant(digest, 'thumb'))
+
+    def test_save_image_stream_raises400_and_leavesNoFile_when_tooManyPixels(self):
+        with self.assertRaises(Exception400BadRequest):
+            image_store.save_image_stream(io.BytesIO(self._png(6000, 5000)))
+
+        self.assertEqual([], os.listdir(self.tmp_dir.name))
+
+    def test_save_image_stream_raises400_without_changingWarningFilters_when_aboveDecompressionBombLimit(self):
+        filters = list(warnings.filters)
+
+        with warnings.catch_warnings(record=True), self.assertRaises(Exception400BadRequest):
+            image_store.save_image_stream(io.BytesIO(self._png(10000, 10000)))
+
+        self.assertEqual(filters, warnings.filters)
+
+    def test_create_variant_returnsNone_without_decoding_tooManyPixels(self):
+        data = self._png(6000, 5000)
+        digest = hashlib.sha256(data).hexdigest()
+        os.makedirs(os.path.dirname(image_store.image_path(digest)))
+        with open(image_store.image_path(digest), 'wb') as stored:
+            stored.write(data)
+
+        with patch('PIL.ImageOps.exif_transpose') as mock_transpose:
+            self.assertIsNone(image_store.create_variant(digest, 'thumb'))
+        mock_transpose.assert_not_called()
+
+    def _png(self, width: int, height: int) -> bytes:
+        # a 1-bit image compresses to a few KB whatever its size
+        png = io.BytesIO()
+        Image.new('1', (width, height)).save(png, format='PNG')
+        return png.getvalue()
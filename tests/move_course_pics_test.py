@@ -0,0 +1,43 @@
+import io
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from PIL import Image
+
+from data.migrations import move_course_pics
+
+
+class MoveCoursePics_Should(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        patcher = patch('data.image_store.IMAGE_STORE_DIR', self.tmp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_move_course_pics_skipsOversizePicture_and_movesTheRest(self):
+        pics = {1: self._png(6000, 6000), 2: self._png(10, 10)}
+
+        def read_query(sql, params):
+            last_id, limit = params
+            return [(id, pic) for id, pic in sorted(pics.items()) if pic is not None and id > last_id][:limit]
+
+        def update_query(sql, params):
+            pics[params[1]] = None
+            return 1
+
+        with patch('data.migrations.move_course_pics.read_query', side_effect=read_query), \
+             patch('data.migrations.move_course_pics.update_query', side_effect=update_query) as mock_update, \
+             patch('builtins.print'):
+            moved = move_course_pics.move_course_pics(batch_size=1)
+
+        self.assertEqual(1, moved)
+        self.assertEqual([2], [call.args[1][1] for call in mock_update.call_args_list])
+        self.assertIsNotNone(pics[1])
+
+    def _png(self, width: int, height: int) -> bytes:
+        png = io.BytesIO()
+        Image.new('1', (width, height)).save(png, format='PNG')
+        return png.getvalue()
@@ -0,0 +1,26 @@
+from unittest import TestCase
+from types import SimpleNamespace
+
+from data.common.exceptions import Exception400BadRequest
+from data.common.pagination import encode_cursor, decode_after_id, next_page_cursor
+
+
+class Pagination_Should(TestCase):
+
+    def test_decode_after_id_returnsEncodedId(self):
+        self.assertEqual(42, decode_after_id(encode_cursor(id=42)))
+
+    def test_decode_after_id_returnsNone_when_noCursor(self):
+        self.assertIsNone(decode_after_id(None))
+
+    def test_decode_after_id_raises400_when_cursorIsGarbage(self):
+        with self.assertRaises(Exception400BadRequest):
+            decode_after_id('not-a-cursor')
+
+    def test_next_page_cursor_pointsAfterLastItem_when_pageIsFull(self):
+        items = [SimpleNamespace(id=3), SimpleNamespace(id=7)]
+
+        self.assertEqual(7, decode_after_id(next_page_cursor(items, 2)))
+
+    def test_next_page_cursor_returnsNone_when_pageIsShort(self):
+        self.assertIsNone(next_page_cursor([SimpleNamespace(id=3)], 2))
@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+from unittest import TestCase
+import anyio
+import bcrypt
+from data.common.exceptions import Exception503ServiceUnavailable
+from data.common.passwords import HASH_MAX_QUEUED, HASH_WORKERS, HashingPool
+
+
+class HashingPool_Should(TestCase):
+
+    def setUp(self):
+        self.pool = HashingPool(workers=1, max_queued=0)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_hashpw_and_checkpw_run_in_worker_process(self):
+        salt = bcrypt.gensalt(rounds=4)
+
+        hashed = self.pool.hashpw(b'password', salt)
+
+        self.assertTrue(bcrypt.checkpw(b'password', hashed))
+        self.assertTrue(self.pool.checkpw(b'password', hashed))
+        self.assertFalse(self.pool.checkpw(b'wrong', hashed))
+
+    def test_rejects_with_503_when_workers_and_queue_are_busy(self):
+        busy = threading.Thread(target=self.pool._run, args=(time.sleep, 2))
+        busy.start()
+        try:
+            self._wait_until(lambda: self.pool.stats()['in_flight'] == 1)
+
+            with self.assertRaises(Exception503ServiceUnavailable):
+                self.pool.checkpw(b'password', b'hash')
+
+            self.assertEqual(1, self.pool.stats()['rejected'])
+        finally:
+            busy.join()
+
+        self.assertEqual(0, self.pool.stats()['in_flight'])
+
+    def test_answers_503_when_hash_times_out(self):
+        pool = HashingPool(workers=1, max_queued=0, timeout=0.2)
+        self.addCleanup(pool.shutdown)
+
+        with self.assertRaises(Exception503ServiceUnavailable):
+            pool._run(time.sleep, 2)
+
+        self.assertEqual(0, pool.stats()['in_flight'])
+
+    def test_replaces_pool_after_worker_dies(self):
+        with self.assertRaises(Exception503ServiceUnavailable):
+            self.pool._run(os._exit, 1)
+
+        hashed = bcrypt.hashpw(b'password', bcrypt.gensalt(rounds=4))
+        self.assertTrue(self.pool.checkpw(b'password', hashed))
+
+    def test_admits_at_most_a_quarter_of_the_request_threads(self):
+        async def request_threads():
+            return anyio.to_thread.current_default_thread_limiter().total_tokens
+
+        self.assertLessEqual(HASH_WORKERS + HASH_MAX_QUEUED, anyio.run(request_threads) // 4)
+
+    def _wait_until(self, condition, timeout: float = 5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_stats_split_in_flight_and_queued(self):
+        self.pool._pending = 3
+
+        stats = self.pool.stats()
+
+        self.assertEqual(1, stats['in_flight'])
+        self.assertEqual(2, stats['queued'])
@@ -0,0 +1,35 @@
+from unittest import TestCase
+from services.search_index import SearchIndex, terms
+
+
+class SearchIndex_Should(TestCase):
+
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.add(1, 'Core Python', 'Learn the basics', ['python'], ['Write scripts'], 6.0)
+        self.index.add(2, 'Java', 'Python developers welcome', ['java'], [], 9.0)
+        self.index.add(3, 'Web with Python', 'Flask and FastAPI', ['python', 'web'], ['Build an API'], 8.0)
+
+    def test_terms_are_casefolded_words(self):
+        self.assertEqual(['fastapi', 'web_dev', '2'], terms('FastAPI, web_dev 2!'))
+        self.assertEqual([], terms(None))
+
+    def test_search_ranks_more_matched_words_first(self):
+        self.assertEqual([3, 1, 2], self.index.search('python web'))
+
+    def test_search_breaks_ties_by_rating(self):
+        self.index.add(4, 'Python', None, ['python'], [], 9.5)
+
+        self.assertEqual([4, 3, 1, 2], self.index.search('python'))
+
+    def test_search_restricted_to_course_ids(self):
+        self.assertEqual([1, 2], self.index.search('python', {1, 2}))
+
+    def test_add_replaces_and_remove_forgets_a_course(self):
+        self.index.add(1, 'Core Go', None, ['go'], [], 6.0)
+        self.index.remove(3)
+
+        self.assertEqual([2], self.index.search('python'))
+        self.assertEqual([1], self.index.search('go'))
+        self.assertEqual(2, len(self.index))
+        self.assertEqual([], self.index.search('web'))
@@ -0,0 +1,38 @@
+import re
+from unittest import TestCase
+from data.common.search import escape_like, fulltext_query, text_filter, word_prefix_pattern
+
+
+class Search_Should(TestCase):
+
+    def test_escape_like_escapes_wildcards(self):
+        self.assertEqual('50\\% off\\_now\\\\', escape_like('50% off_now\\'))
+
+    def test_text_filter_matches_prefix_by_default(self):
+        self.assertEqual(('email LIKE ?', ['alice\\_p%']), text_filter('email', 'alice_p'))
+
+    def test_text_filter_narrows_word_prefix_search_with_fulltext_index(self):
+        clause, params = text_filter('u.email', '*parker@abv')
+
+        self.assertEqual('MATCH(u.email) AGAINST (? IN BOOLEAN MODE) AND u.email REGEXP ?', clause)
+        self.assertEqual(['+parker* +abv*', '(^|[^[:alnum:]_])parker@abv'], params)
+
+    def test_text_filter_scans_with_same_semantics_when_no_word_is_indexed(self):
+        self.assertEqual(('title REGEXP ?', ['(^|[^[:alnum:]_])c\\#']), text_filter('title', '*c#'))
+        self.assertEqual(('title REGEXP ?', ['(^|[^[:alnum:]_])about']), text_filter('title', '*about'))
+
+    def test_text_filter_matches_anywhere_when_value_starts_with_separator(self):
+        self.assertEqual(('u.email REGEXP ?', ['@ab\\.bg']), text_filter('u.email', '*@ab.bg'))
+
+    def test_word_prefix_pattern_matches_only_at_word_start(self):
+        pattern = re.compile(word_prefix_pattern('park').replace('[:alnum:]', 'a-zA-Z0-9'))
+
+        self.assertTrue(pattern.search('alice.parker@abv.bg'))
+        self.assertTrue(pattern.search('parker@abv.bg'))
+        self.assertFalse(pattern.search('sparky@abv.bg'))
+
+    def test_fulltext_query_drops_words_the_index_cannot_find(self):
+        self.assertEqual('+python*', fulltext_query('go python'))
+        self.assertEqual('+them*', fulltext_query('wh them'))
+        self.assertIsNone(fulltext_query('a b'))
+        self.assertIsNone(fulltext_query('abou'))
@@ -0,0 +1,38 @@
+from unittest import TestCase
+from unittest.mock import patch
+from data import section_content
+from data.section_content import COMPRESSED_MARKER, decode_content, encode_content
+
+
+class SectionContent_Should(TestCase):
+
+    def test_compresses_long_content_and_decodes_it_back(self):
+        content = 'Lorem ipsum dolor sit amet. ' * 200
+
+        stored = encode_content(content)
+
+        self.assertTrue(stored.startswith(COMPRESSED_MARKER))
+        self.assertLess(len(stored), len(content))
+        self.assertEqual(content, decode_content(stored))
+
+    def test_keeps_short_content_as_is(self):
+        self.assertEqual('short', encode_content('short'))
+        self.assertEqual('short', decode_content('short'))
+
+    def test_always_encodes_content_starting_with_marker(self):
+        content = COMPRESSED_MARKER + 'not really compressed'
+
+        stored = encode_content(content)
+
+        self.assertNotEqual(content, stored)
+        self.assertEqual(content, decode_content(stored))
+
+    def test_stores_plain_content_when_compression_is_off(self):
+        content = 'Lorem ipsum dolor sit amet. ' * 200
+
+        with patch.object(section_content, 'COMPRESS_CONTENT', False):
+            self.assertEqual(content, encode_content(content))
+
+    def test_passes_none_through(self):
+        self.assertIsNone(encode_content(None))
+        self.assertIsNone(decode_content(None))
@@ -0,0 +1,36 @@
+from unittest import TestCase
+from unittest.mock import Mock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routers.users import user_router
+
+app = FastAPI()
+app.include_router(user_router)
+
+
+class ServerStats_Should(TestCase):
+
+    def setUp(self):
+        self.client = TestClient(app)
+
+    @patch('routers.users.courses_service.course_load_stats', return_value={'loads': 3})
+    @patch('routers.users.passwords.hashing_stats', return_value={'workers': 2})
+    @patch('routers.users.pool_stats', return_value={'size': 5})
+    @patch('routers.users.get_user_or_raise_401')
+    def test_returnAllStats_toAdmin(self, mock_get_user, *_):
+        mock_get_user.return_value = Mock(is_admin=Mock(return_value=True))
+
+        response = self.client.get('/users/stats', headers={'Authorization': 'token'})
+
+        self.assertEqual({'database_pool': {'size': 5}, 'password_hashing': {'workers': 2},
+                          'course_loads': {'loads': 3}}, response.json())
+
+    @patch('routers.users.pool_stats')
+    @patch('routers.users.get_user_or_raise_401')
+    def test_forbidStats_toNonAdmin(self, mock_get_user, mock_pool_stats):
+        mock_get_user.return_value = Mock(is_admin=Mock(return_value=False))
+
+        response = self.client.get('/users/stats', headers={'Authorization': 'token'})
+
+        self.assertEqual(403, response.status_code)
+        mock_pool_stats.assert_not_called()
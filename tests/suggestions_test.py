@@ -0,0 +1,45 @@
+from unittest import TestCase
+from services.suggestions import CatalogSuggestions, PrefixIndex
+
+
+class PrefixIndex_Should(TestCase):
+
+    def test_top_returns_best_scored_keys_with_prefix(self):
+        index = PrefixIndex.build({'python': (7.0, 'Python'), 'pygame': (9.0, 'Pygame'),
+                                   'php': (8.0, 'PHP'), 'java': (10.0, 'Java')}, top_k=2)
+
+        self.assertEqual(['Pygame', 'PHP'], index.top('p'))
+        self.assertEqual(['Pygame', 'Python'], index.top('py'))
+        self.assertEqual([], index.top('x'))
+
+    def test_set_and_remove_keep_tops_up_to_date(self):
+        index = PrefixIndex(top_k=2)
+        index.set('python', 'Python', 7.0)
+        index.set('pygame', 'Pygame', 9.0)
+        index.set('pyramid', 'Pyramid', 8.0)
+
+        self.assertEqual(['Pygame', 'Pyramid'], index.top('py'))
+
+        index.remove('pygame')
+        index.set('python', 'Python', 8.5)
+
+        self.assertEqual(['Python', 'Pyramid'], index.top('py'))
+        self.assertEqual([], index.top('pyg'))
+
+
+class CatalogSuggestions_Should(TestCase):
+
+    def setUp(self):
+        self.suggestions = CatalogSuggestions.build([(1, 'Core Python', ['python'], 6.0, False),
+                                                     (2, 'Premium Python', ['python', 'pro'], 9.0, True)])
+
+    def test_anonymous_users_get_public_courses_only(self):
+        self.assertEqual(['python'], self.suggestions.suggest('p', include_premium=False))
+        self.assertEqual(['Premium Python', 'pro', 'python'], self.suggestions.suggest('P', include_premium=True))
+
+    def test_courses_are_replaced_and_removed(self):
+        self.suggestions.add_course(1, 'Core Go', ['go'], 6.0, False)
+        self.suggestions.remove_course(2)
+
+        self.assertEqual([], self.suggestions.suggest('p', include_premium=True))
+        self.assertEqual(['Core Go'], self.suggestions.suggest('core', include_premium=False))
@@ -0,0 +1,53 @@
+from unittest import TestCase
+from fastapi import Depends, FastAPI, UploadFile
+from fastapi.testclient import TestClient
+from data.common.uploads import MAX_UPLOAD_SIZE, picture_upload
+
+app = FastAPI()
+
+
+@app.put('/pic')
+def upload(pic: UploadFile = Depends(picture_upload)):
+    return {'size': len(pic.file.read()), 'on_disk': pic.file._rolled}
+
+
+class PictureUpload_Should(TestCase):
+
+    def setUp(self):
+        self.client = TestClient(app)
+
+    def test_spools_large_picture_to_disk(self):
+        response = self.client.put('/pic', files={'pic': ('pic.png', b'x' * 2_000_000, 'image/png')})
+
+        self.assertEqual({'size': 2_000_000, 'on_disk': True}, response.json())
+
+    def test_keeps_small_picture_in_memory(self):
+        response = self.client.put('/pic', files={'pic': ('pic.png', b'x' * 1000, 'image/png')})
+
+        self.assertEqual({'size': 1000, 'on_disk': False}, response.json())
+
+    def test_refuses_declared_oversize_body_before_reading_it(self):
+        def body():
+            raise AssertionError('the body must not be read')
+            yield b''
+
+        response = self.client.put('/pic', content=body(), headers={'Content-Type': 'multipart/form-data; boundary=x',
+                                                                     'Content-Length': str(MAX_UPLOAD_SIZE + 1)})
+
+        self.assertEqual(413, response.status_code)
+
+    def test_refuses_oversize_body_while_it_arrives(self):
+        def body():
+            yield b'--x\r\nContent-Disposition: form-data; name="pic"; filename="pic.png"\r\n\r\n'
+            for _ in range(10):
+                yield b'y' * 1024 * 1024
+
+        # no Content-Length: the body is streamed in chunks
+        response = self.client.put('/pic', content=body(), headers={'Content-Type': 'multipart/form-data; boundary=x'})
+
+        self.assertEqual(413, response.status_code)
+
+    def test_requires_the_pic_field(self):
+        response = self.client.put('/pic', files={'other': ('pic.png', b'x', 'image/png')})
+
+        self.assertEqual(400, response.status_code)
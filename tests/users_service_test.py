@@ -60,6 +60,41 @@ class UserService_Should(TestCase):
 
         self.assertIsNone(actual_data)
     
+    @patch('services.users_service.read_query', autospec=True)
+    def test_get_principal_returnsUserAndApproval_withOneQuery(self, mock_read_query):
+        users_service.principal_cache.clear()
+        mock_read_query.return_value = [(1, 'ani@abv.bg', 'hash', 'ani', 'ivanova', 'teacher', 1)]
+
+        user, is_approved = users_service.get_principal(1)
+        users_service.get_principal(1)
+
+        self.assertEqual(1, user.id)
+        self.assertEqual('teacher', user.role)
+        self.assertTrue(is_approved)
+        mock_read_query.assert_called_once()
+
+    @patch('services.users_service.read_query', autospec=True)
+    def test_get_principal_returnsNone_when_userDoesNotExist(self, mock_read_query):
+        users_service.principal_cache.clear()
+        mock_read_query.return_value = []
+
+        self.assertIsNone(users_service.get_principal(1))
+
+    @patch('services.users_service.update_query', autospec=True)
+    @patch('services.users_service.read_query', autospec=True)
+    def test_admin_approves_user_invalidates_cachedPrincipal(self, mock_read_query, mock_update_query):
+        users_service.principal_cache.clear()
+        mock_read_query.side_effect = [[(1, 'ani@abv.bg', 'hash', 'ani', 'ivanova', 'teacher', 0)],
+                                       [(1, 'ani@abv.bg', 'hash', 'ani', 'ivanova', 'teacher', 1)]]
+        mock_update_query.return_value = True
+
+        _, approved_before = users_service.get_principal(1)
+        users_service.admin_approves_user(1)
+        _, approved_after = users_service.get_principal(1)
+
+        self.assertFalse(approved_before)
+        self.assertTrue(approved_after)
+
     @patch('services.users_service.read_query', autospec=True)
     def test_findByEmail_returnsUser_when_userExists(self, mock_read_query):
         expected_data = [(1, 'ani@abv.bg', '$2b$12$Eb0aKvsM/YGeLbsbGEXvU.ztXQ8uNIygejK213iYLVJT1PwuPFIt6', 'ani', 'ivanova', 'user')]
@@ -151,7 +186,7 @@ class UserService_Should(TestCase):
         
         self.assertIsNone(result)  
 
-    @patch('services.users_service.bcrypt.checkpw', autospec=True)
+    @patch('services.users_service.passwords.checkpw', autospec=True)
     def test_try_login_with_valid_credentials_returns_user(self, mock_checkpw):
         mock_checkpw.return_value = True
         
@@ -164,7 +199,7 @@ class UserService_Should(TestCase):
             USER.password.encode('utf-8')
         )
 
-    @patch('services.users_service.bcrypt.checkpw', autospec=True)
+    @patch('services.users_service.passwords.checkpw', autospec=True)
     def test_tryLogin_with_invalid_credentials_returns_none(self, mock_checkpw):
         
         mock_checkpw.return_value = False
@@ -283,19 +318,24 @@ class UserService_Should(TestCase):
             algorithms=['HS256']
         )
     
-    @patch('services.users_service.update_query', autospec=True)
-    def test_subscribe_to_course_with_valid_parameters(self, mock_update_query):
-        expected = 1
-        mock_update_query.return_value = 1
-
-        result = users_service.subscribe_to_course(123, 456)
+    @patch('services.users_service.read_query', autospec=True)
+    def test_subscribe_to_course_with_valid_parameters(self, mock_read_query):
+        mock_read_query.return_value = []
+        cursor = MagicMock()
+        cursor.rowcount = 1
+        transaction = MagicMock()
+        transaction.return_value.__enter__.return_value = cursor
 
-        self.assertEqual(expected, result)
+        with patch('services.users_service.transaction', transaction):
+            result = users_service.subscribe_to_course(123, 456)
 
-        mock_update_query.assert_called_once_with(
-            "INSERT INTO users_have_courses (users_id, courses_id, status) VALUES (?, ?, ?)",
-            (123, 456, 0)
-        )
+        self.assertEqual(True, result)
+        insert, counter = cursor.execute.call_args_list
+        self.assertEqual(
+            ("INSERT INTO users_have_courses (users_id, courses_id, status) VALUES (?, ?, ?)", (123, 456, 0)),
+            insert.args)
+        self.assertIn('students_count = students_count + 1', counter.args[0])
+        self.assertEqual((456,), counter.args[1])
 
     @patch('services.users_service.update_query', autospec=True)
     def test_subscribe_to_course_with_none_parameters(self, mock_update_query):
@@ -386,17 +426,13 @@ class UserService_Should(TestCase):
         result=users_service.update_user(USER,NEW_DATA)
         self.assertEqual(True, result)
 
-    @patch('services.users_service.smtplib.SMTP', autospec=True)
-    def test_send_verification_email(self, mock_smtp):
-        
-        mock_server = MagicMock()
-        mock_smtp.return_value = mock_server
-
-        mock_server.starttls = MagicMock()
+    @patch('services.users_service.enqueue_email', autospec=True)
+    def test_send_verification_email(self, mock_enqueue_email):
 
         result = users_service.send_verification_email("test@example.com", "http://example.com/verification")
 
         self.assertEqual(result, "Verification email sent successfully.")
+        mock_enqueue_email.assert_called_once_with("test@example.com", "Account Verification", ANY)
 
     @patch('services.users_service.read_query')
     @patch('services.users_service.update_query')
@@ -473,11 +509,8 @@ class UserService_Should(TestCase):
         result=users_service.get_teacher_info_with_course_id(None)
         self.assertIsNone(result)
 
-    @patch('services.users_service.smtplib.SMTP', autospec=True)
-    def test_send_student_enrolled_in_course_email_to_teacher_return_string(self, mock_smtp):
-        mock_server=MagicMock()
-        mock_smtp.return_value= mock_server
-        mock_server.starttls = MagicMock()
+    @patch('services.users_service.enqueue_email', autospec=True)
+    def test_send_student_enrolled_in_course_email_to_teacher_return_string(self, mock_enqueue_email):
 
         result=users_service.send_student_enrolled_in_course_email_to_teacher("test@example.com",
                                                                               "http://example.com/verification",
@@ -505,6 +538,17 @@ class UserService_Should(TestCase):
         result=list(users_service.view_admin())
         self.assertEqual(0,len(result))
 
+    @patch('services.users_service.read_query')
+    def test_view_admin_bindsPrefixSearch(self, mock_read_query):
+        mock_read_query.return_value=[]
+
+        list(users_service.view_admin(email="a' OR 1=1 --", last_name='Park'))
+
+        sql, params = mock_read_query.call_args.args
+        self.assertNotIn('OR 1=1', sql)
+        self.assertIn('WHERE email LIKE ? AND last_name LIKE ?', sql)
+        self.assertEqual(("a' OR 1=1 --%", 'Park%'), params)
+
     @patch('services.users_service.update_query')
     def test_approve_enrollment_returnTrue_iftransactionOK(self, mock_update_query):
         mock_update_query.return_value=True